@@ -0,0 +1,112 @@
+"""
+Shared helpers for ManualMind's offline benchmarks and evaluations.
+Everything here runs in-process without Redis, OpenAI or a network connection.
+"""
+
+import os
+import sys
+import time
+import subprocess
+import zlib
+import resource
+from typing import List, Dict, Any, Callable
+import numpy as np
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# Retrieval configurations compared by the benchmark and evaluation scripts,
+# expressed as DocumentProcessor attribute overrides. "hybrid" reads every BM25
+# posting; "hybrid-early-exit" first takes EARLY_EXIT_POSTINGS candidates from
+# each very common term and should find the same results
+EARLY_EXIT_POSTINGS = 1000
+RETRIEVAL_CONFIGS: Dict[str, Dict[str, Any]] = {
+    "dense": {"retrieval_mode": "dense", "quantization": "none"},
+    "hybrid": {"retrieval_mode": "hybrid", "quantization": "none", "hybrid_max_postings": 0},
+    "hybrid-early-exit": {"retrieval_mode": "hybrid", "quantization": "none",
+                          "hybrid_max_postings": EARLY_EXIT_POSTINGS},
+    "int8": {"retrieval_mode": "dense", "quantization": "int8", "rescore_candidates": 100, "rescore_fraction": 0.0},
+    "hybrid-int8": {"retrieval_mode": "hybrid", "quantization": "int8", "rescore_candidates": 100,
+                    "rescore_fraction": 0.0, "hybrid_max_postings": 0},
+    "binary": {"retrieval_mode": "dense", "quantization": "binary", "rescore_candidates": 400,
+               "rescore_fraction": 0.05},
+    "hybrid-binary": {"retrieval_mode": "hybrid", "quantization": "binary", "rescore_candidates": 400,
+                      "rescore_fraction": 0.05, "hybrid_max_postings": 0},
+}
+
+
+class _WhitespaceTokenizer:
+    def tokenize(self, text: str) -> List[str]:
+        return text.split()
+
+
+class HashEmbedder:
+    """Deterministic bag-of-words embedder standing in for the sentence transformer offline."""
+
+    max_seq_length = 256
+
+    def __init__(self, dimensions: int = 384):
+        self.dimensions = dimensions
+        self.tokenizer = _WhitespaceTokenizer()
+
+    def encode(self, texts: List[str], **kwargs) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.lower().split():
+                vectors[row, zlib.crc32(token.encode()) % self.dimensions] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-9)
+
+
+def make_processor(embedder: str = "hash"):
+    """Build a DocumentProcessor with either the offline hash embedder or the real model."""
+    # Imported here so HTTP-only scripts such as the load test don't load the embedding stack
+    from services.document_processor import DocumentProcessor
+
+    if embedder == "model":
+        processor = DocumentProcessor()
+    else:
+        processor = DocumentProcessor(embedding_model=HashEmbedder())
+    # Queries are timed one at a time, so batching would only add its wait to every latency
+    processor.query_batcher = None
+    return processor
+
+
+def apply_config(processor, config_name: str):
+    """Switch a processor to one of the named retrieval configurations."""
+    for attribute, value in RETRIEVAL_CONFIGS[config_name].items():
+        setattr(processor, attribute, value)
+
+
+def percentiles(latencies: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 and mean of latencies given in seconds, reported in milliseconds."""
+    values = np.asarray(latencies) * 1000.0
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "mean_ms": round(float(values.mean()), 3),
+    }
+
+
+def timed(function: Callable, *args, **kwargs):
+    """Run function and return (result, elapsed seconds)."""
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def git_commit() -> str:
+    """Current commit hash, if the script runs inside the git checkout."""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return "unknown"
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Retrieval evaluation for ManualMind.
+Indexes the manuals in media/ in-process and runs a golden set of questions
+with known answer pages through find_similar_chunks only, reporting recall@k,
+MRR and latency side by side for each chunking strategy and retrieval
+configuration.
+
+Usage:
+    python benchmarks/evaluate_retrieval.py --golden benchmarks/golden_set.json --output eval.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+from common import RETRIEVAL_CONFIGS, apply_config, git_commit, make_processor, percentiles, timed
+from services.index_snapshot import IndexSnapshot
+from services.near_duplicates import NearDuplicateIndex
+from services.pdf_extraction import EXTRACTORS, create_extractor
+
+
+def load_golden_set(path: str) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        questions = json.load(f)["questions"]
+    for entry in questions:
+        if "question" not in entry or "file_name" not in entry:
+            raise ValueError(f"Golden set entries need 'question' and 'file_name': {entry}")
+    return questions
+
+
+def extract_manuals(processor, media_path: str) -> Dict[str, List[str]]:
+    """Page texts of every PDF in the media folder, extracted once for all chunking strategies."""
+    manuals = {}
+    for pdf_file in sorted(Path(media_path).glob("*.pdf")):
+        try:
+            pages = processor.extract_pages_from_pdf(str(pdf_file))
+        except Exception as e:
+            print(f"Skipping {pdf_file.name}: {e}", file=sys.stderr)
+            continue
+        if "".join(pages).strip():
+            manuals[pdf_file.name] = pages
+        else:
+            print(f"Skipping {pdf_file.name}: no text extracted", file=sys.stderr)
+    return manuals
+
+
+def build_snapshot(processor, manuals: Dict[str, List[str]], strategy: str) -> IndexSnapshot:
+    """Chunk and embed the manuals with one chunking strategy, the way process_document does."""
+    processor.chunking_strategy = strategy
+    duplicates = NearDuplicateIndex(processor.dedup_threshold) if processor.dedup_threshold else None
+    documents = []
+    for file_name, pages in manuals.items():
+        chunked = processor.chunk_pages(pages)
+        chunks = [chunk["text"] for chunk in chunked]
+        documents.append({
+            "file_name": file_name,
+            "chunks": chunks,
+            "chunk_metadata": [{key: value for key, value in chunk.items() if key != "text"} for chunk in chunked],
+            "embeddings": processor.embed_chunks(chunks, duplicates)[0],
+        })
+    return IndexSnapshot.from_documents(f"eval-{strategy}", documents, dedup_threshold=processor.dedup_threshold)
+
+
+def is_relevant(result: Dict[str, Any], expected: Dict[str, Any]) -> bool:
+    """A result is relevant if it comes from the expected manual and overlaps an expected page."""
+    # A deduplicated chunk counts for every manual it appears in
+    if any(is_relevant(source, expected) for source in result.get("also_in", [])):
+        return True
+    if result["file_name"] != expected["file_name"]:
+        return False
+    pages = expected.get("pages")
+    if not pages:
+        return True
+    if "page_start" not in result:
+        return False
+    return any(result["page_start"] <= page <= result["page_end"] for page in pages)
+
+
+def first_relevant_rank(results: List[Dict[str, Any]], expected: Dict[str, Any]) -> Optional[int]:
+    for rank, result in enumerate(results, start=1):
+        if is_relevant(result, expected):
+            return rank
+    return None
+
+
+def evaluate_config(processor, questions: List[Dict[str, Any]], ks: List[int],
+                    repeats: int) -> Dict[str, Any]:
+    """Run every golden question and score the ranked results."""
+    depth = max(ks)
+    ranks = []
+    latencies = []
+    misses = []
+
+    processor.find_similar_chunks(questions[0]["question"], depth)  # warm up
+    for entry in questions:
+        for _ in range(repeats):
+            results, elapsed = timed(processor.find_similar_chunks, entry["question"], depth, entry.get("filters"))
+            latencies.append(elapsed)
+        rank = first_relevant_rank(results, entry)
+        ranks.append(rank)
+        if rank is None:
+            misses.append(entry["question"])
+
+    report = {f"recall@{k}": round(sum(1 for rank in ranks if rank and rank <= k) / len(ranks), 4) for k in ks}
+    report["mrr"] = round(sum(1.0 / rank for rank in ranks if rank) / len(ranks), 4)
+    report["latency"] = percentiles(latencies)
+    report["misses"] = misses
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate ManualMind retrieval against a golden question set")
+    parser.add_argument("--golden", default=str(Path(__file__).with_name("golden_set.json")),
+                        help="Golden set JSON with question, file_name and pages per entry")
+    parser.add_argument("--media", default="media", help="Folder with the manuals the golden set refers to")
+    parser.add_argument("--configs", default=",".join(RETRIEVAL_CONFIGS),
+                        help=f"Retrieval configurations to compare ({', '.join(RETRIEVAL_CONFIGS)})")
+    parser.add_argument("--chunking", default="fixed,structured", help="Chunking strategies to compare")
+    parser.add_argument("--k", default="1,3,5,10", help="Cut-offs reported as recall@k")
+    parser.add_argument("--embedder", choices=["hash", "model"], default="model",
+                        help="model loads the sentence transformer; hash runs offline but says little about quality")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per question")
+    parser.add_argument("--extractor", choices=list(EXTRACTORS), default="pypdf2",
+                        help="PDF text extraction backend used to index the manuals")
+    parser.add_argument("--dedup", type=float, metavar="THRESHOLD",
+                        help="Index with near-duplicate chunk deduplication at this similarity threshold")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+    configs = [name.strip() for name in args.configs.split(",") if name.strip()]
+    strategies = [name.strip() for name in args.chunking.split(",") if name.strip()]
+    ks = sorted(int(value) for value in args.k.split(","))
+
+    questions = load_golden_set(args.golden)
+    processor = make_processor(args.embedder)
+    processor.pdf_extractor = create_extractor(args.extractor)
+    processor.dedup_threshold = args.dedup
+    manuals = extract_manuals(processor, args.media)
+    if not manuals:
+        parser.error(f"No readable PDF files in {args.media}")
+
+    report = {
+        "evaluation": "retrieval",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": git_commit(),
+        "embedder": args.embedder,
+        "extractor": args.extractor,
+        "dedup_threshold": args.dedup,
+        "golden_set": args.golden,
+        "questions": len(questions),
+        "manuals": sorted(manuals),
+        "results": [],
+    }
+
+    for strategy in strategies:
+        print(f"Indexing with {strategy} chunking...", file=sys.stderr)
+        snapshot, elapsed = timed(build_snapshot, processor, manuals, strategy)
+        processor.use_snapshot(snapshot)
+        for config_name in configs:
+            apply_config(processor, config_name)
+            result = {
+                "chunking": strategy,
+                "config": config_name,
+                "chunks": len(snapshot.chunks),
+                "duplicate_chunks": snapshot.stats.get("duplicate_chunks", 0),
+                "index_seconds": round(elapsed, 3),
+                **evaluate_config(processor, questions, ks, args.repeats),
+            }
+            report["results"].append(result)
+            print(f"  {config_name}: " + ", ".join(f"{key}={result[key]}" for key in result
+                                                   if key.startswith("recall@") or key == "mrr"), file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
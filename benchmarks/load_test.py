@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Load test for a running ManualMind API.
+Pushes N concurrent users through /query for a fixed duration and reports
+throughput, cache hit ratio, error counts and latency percentiles as JSON.
+
+Start the API with LLM_PROVIDER=stub and a raised RATE_LIMIT_PER_MINUTE so the
+run measures ManualMind rather than OpenAI or the rate limiter.
+
+Usage:
+    python benchmarks/load_test.py --url http://localhost:8000 --users 20 --duration 60
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Any
+
+from common import percentiles
+
+
+def load_questions(path: str) -> List[str]:
+    """Questions from a golden set JSON file or a plain text file with one question per line."""
+    with open(path) as f:
+        if path.endswith(".json"):
+            return [entry["question"] for entry in json.load(f)["questions"]]
+        return [line.strip() for line in f if line.strip()]
+
+
+def post_query(url: str, question: str, max_results: int, api_key: str, timeout: float) -> Dict[str, Any]:
+    """Send one /query request and return its status, latency and cache flag."""
+    body = json.dumps({"question": question, "max_results": max_results}).encode()
+    headers = {"Content-Type": "application/json"}
+    if api_key:
+        headers["X-API-Key"] = api_key
+    request = urllib.request.Request(f"{url}/query", data=body, headers=headers, method="POST")
+
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            payload = json.loads(response.read())
+            status = response.status
+    except urllib.error.HTTPError as e:
+        return {"status": e.code, "latency": time.perf_counter() - start}
+    except Exception as e:
+        return {"status": type(e).__name__, "latency": time.perf_counter() - start}
+    return {"status": status, "latency": time.perf_counter() - start, "cached": bool(payload.get("cached"))}
+
+
+def run_user(user: int, args, questions: List[str], deadline: float, samples: List[Dict[str, Any]],
+             lock: threading.Lock):
+    """One simulated user sending queries back to back until the deadline."""
+    rng = random.Random(args.seed + user)
+    while time.perf_counter() < deadline:
+        sample = post_query(args.url, rng.choice(questions), args.max_results, args.api_key, args.timeout)
+        with lock:
+            samples.append(sample)
+        if args.think_time:
+            time.sleep(args.think_time)
+
+
+def summarize(samples: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    ok = [sample for sample in samples if sample["status"] == 200]
+    hits = [sample for sample in ok if sample.get("cached")]
+    misses = [sample for sample in ok if not sample.get("cached")]
+    report = {
+        "requests": len(samples),
+        "succeeded": len(ok),
+        "errors": {str(status): count for status, count in
+                   Counter(sample["status"] for sample in samples if sample["status"] != 200).items()},
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "cache_hit_ratio": round(len(hits) / len(ok), 4) if ok else 0.0,
+    }
+    if ok:
+        report["latency"] = percentiles([sample["latency"] for sample in ok])
+    if hits:
+        report["latency_cached"] = percentiles([sample["latency"] for sample in hits])
+    if misses:
+        report["latency_uncached"] = percentiles([sample["latency"] for sample in misses])
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the ManualMind /query endpoint")
+    parser.add_argument("--url", default="http://localhost:8000", help="ManualMind API base URL")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent simulated users")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to keep sending queries")
+    parser.add_argument("--questions", default=str(Path(__file__).with_name("golden_set.json")),
+                        help="Golden set JSON or text file with one question per line")
+    parser.add_argument("--max-results", type=int, default=5)
+    parser.add_argument("--think-time", type=float, default=0.0, help="Seconds each user waits between queries")
+    parser.add_argument("--api-key", default="", help="Sent as X-API-Key")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    questions = load_questions(args.questions)
+    samples: List[Dict[str, Any]] = []
+    lock = threading.Lock()
+
+    start = time.perf_counter()
+    deadline = start + args.duration
+    with ThreadPoolExecutor(max_workers=args.users) as executor:
+        for user in range(args.users):
+            executor.submit(run_user, user, args, questions, deadline, samples, lock)
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "benchmark": "load",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "url": args.url,
+        "users": args.users,
+        "duration_s": round(elapsed, 2),
+        "distinct_questions": len(set(questions)),
+        **summarize(samples, elapsed),
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+PDF extraction benchmark for ManualMind.
+Runs every available extraction backend over the manuals in media/ and reports
+pages/sec, extracted characters, empty pages and word overlap with a reference
+backend as JSON, so the fastest backend that still reads the manuals correctly
+can be chosen for PDF_EXTRACTOR.
+
+Usage:
+    python benchmarks/pdf_extraction_benchmark.py --media media --output extraction.json
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+
+from common import git_commit, timed
+from services.pdf_extraction import EXTRACTORS, create_extractor
+
+WORD = re.compile(r"\w+")
+
+
+def word_overlap(text: str, reference: str) -> float:
+    """Jaccard similarity of the distinct lower-cased words in two texts."""
+    words, reference_words = set(WORD.findall(text.lower())), set(WORD.findall(reference.lower()))
+    if not words and not reference_words:
+        return 1.0
+    return len(words & reference_words) / len(words | reference_words)
+
+
+def benchmark_extractor(extractor, pdf_files: List[Path], repeats: int) -> Dict[str, Any]:
+    """Time one backend on every file, keeping the fastest of repeats runs per file."""
+    files = {}
+    texts = {}
+    for pdf_file in pdf_files:
+        best = None
+        try:
+            for _ in range(repeats):
+                pages, elapsed = timed(extractor.extract_pages, str(pdf_file))
+                best = elapsed if best is None else min(best, elapsed)
+        except Exception as e:
+            files[pdf_file.name] = {"error": str(e)}
+            continue
+
+        texts[pdf_file.name] = "\n".join(pages)
+        files[pdf_file.name] = {
+            "pages": len(pages),
+            "seconds": round(best, 4),
+            "pages_per_sec": round(len(pages) / best, 1) if best else None,
+            "chars": sum(len(page) for page in pages),
+            "empty_pages": sum(1 for page in pages if not page.strip()),
+        }
+
+    readable = [result for result in files.values() if "error" not in result]
+    total_pages = sum(result["pages"] for result in readable)
+    total_seconds = sum(result["seconds"] for result in readable)
+    return {
+        "files": files,
+        "pages": total_pages,
+        "seconds": round(total_seconds, 4),
+        "pages_per_sec": round(total_pages / total_seconds, 1) if total_seconds else None,
+        "chars": sum(result["chars"] for result in readable),
+        "errors": len(files) - len(readable),
+        "_texts": texts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ManualMind PDF extraction backends")
+    parser.add_argument("--media", default="media", help="Folder with the PDF files to extract")
+    parser.add_argument("--extractors", default=",".join(EXTRACTORS),
+                        help=f"Backends to compare ({', '.join(EXTRACTORS)}); missing packages are skipped")
+    parser.add_argument("--reference", default="pypdf2", help="Backend the word overlap is measured against")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per file; the fastest is reported")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    pdf_files = sorted(Path(args.media).glob("*.pdf"))
+    if not pdf_files:
+        parser.error(f"No PDF files in {args.media}")
+
+    report = {
+        "benchmark": "pdf_extraction",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": git_commit(),
+        "files": [pdf_file.name for pdf_file in pdf_files],
+        "reference": args.reference,
+        "results": {},
+    }
+
+    for name in [value.strip() for value in args.extractors.split(",") if value.strip()]:
+        try:
+            extractor = create_extractor(name)
+        except (RuntimeError, ValueError) as e:
+            print(f"Skipping {name}: {e}", file=sys.stderr)
+            continue
+        print(f"Extracting with {name}...", file=sys.stderr)
+        report["results"][name] = benchmark_extractor(extractor, pdf_files, args.repeats)
+
+    reference_texts = report["results"].get(args.reference, {}).get("_texts", {})
+    for result in report["results"].values():
+        texts = result.pop("_texts")
+        for file_name, text in texts.items():
+            if file_name in reference_texts:
+                result["files"][file_name]["word_overlap"] = round(word_overlap(text, reference_texts[file_name]), 4)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Offline retrieval benchmark for ManualMind.
+Generates synthetic manual corpora and times chunk_text, generate_embeddings,
+index build and find_similar_chunks in-process, reporting latency percentiles,
+throughput, peak RSS, the cost of BM25 candidate selection and the recall of
+quantized and early-exit search against exact search as JSON so runs can
+be compared across commits. Each search configuration also reports the bytes
+it keeps resident: quantized configurations run with the float rows
+memory-mapped, as the API serves them from disk.
+
+Usage:
+    python benchmarks/retrieval_benchmark.py --sizes 1000,10000,100000 --output bench.json
+"""
+
+import argparse
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Dict, Any
+import numpy as np
+
+from common import (
+    EARLY_EXIT_POSTINGS, RETRIEVAL_CONFIGS, HashEmbedder, apply_config, git_commit, make_processor, peak_rss_mb,
+    percentiles, timed
+)
+from services.index_snapshot import IndexSnapshot, load_mapped
+
+SYNTH_TERMS = [
+    "oscillator", "filter", "cutoff", "resonance", "envelope", "attack", "decay", "sustain",
+    "release", "LFO", "RATE", "DEPTH", "vocoder", "arpeggiator", "sequencer", "tone", "patch",
+    "MIDI", "channel", "CC#74", "SYSTEM-8", "JUNO-X", "PLUG-OUT", "portamento", "unison",
+    "chorus", "delay", "reverb", "velocity", "aftertouch", "pitch", "bend", "knob", "slider",
+]
+FILLER_WORDS = [
+    "the", "to", "a", "press", "turn", "select", "button", "value", "set", "is", "and", "of",
+    "this", "when", "you", "can", "screen", "menu", "parameter", "sound", "use", "panel",
+]
+
+
+def synthetic_texts(count: int, words_per_text: int, rng: np.random.Generator) -> List[str]:
+    """Manual-like word salad: mostly filler words with synth terms mixed in."""
+    vocabulary = np.array(FILLER_WORDS * 3 + SYNTH_TERMS)
+    words = rng.choice(vocabulary, size=(count, words_per_text))
+    return [" ".join(row) + "." for row in words]
+
+
+def synthetic_document(target_chunks: int, chunk_size: int, rng: np.random.Generator) -> str:
+    """A document long enough for chunk_text to produce about target_chunks chunks."""
+    sentences = synthetic_texts(max(1, target_chunks * chunk_size // 80), 12, rng)
+    paragraphs = [" ".join(sentences[i:i + 6]) for i in range(0, len(sentences), 6)]
+    return "\n\n".join(paragraphs)
+
+
+def synthetic_queries(count: int, rng: np.random.Generator) -> List[str]:
+    templates = ["How do I set {} on the {}?", "What does {} do?", "Which {} controls {}?"]
+    queries = []
+    for _ in range(count):
+        template = templates[rng.integers(len(templates))]
+        terms = rng.choice(SYNTH_TERMS, size=template.count("{}"))
+        queries.append(template.format(*terms))
+    return queries
+
+
+def benchmark_size(processor, size: int, args, rng: np.random.Generator) -> Dict[str, Any]:
+    """Run every stage for one corpus size."""
+    result: Dict[str, Any] = {"chunks": size}
+
+    # chunk_text on a document sized for at most --chunk-sample chunks
+    document = synthetic_document(min(size, args.chunk_sample), processor.max_chunk_size, rng)
+    chunks, elapsed = timed(processor.chunk_text, document)
+    result["chunk_text"] = {
+        "chars": len(document),
+        "chunks": len(chunks),
+        "seconds": round(elapsed, 4),
+        "chars_per_sec": round(len(document) / elapsed, 1),
+        "chunks_per_sec": round(len(chunks) / elapsed, 1),
+    }
+
+    # generate_embeddings on a sample; the full index uses the fast hash embedder so that
+    # queries have real neighbours when measuring the recall of quantized search
+    sample = chunks[:min(len(chunks), args.embed_sample)]
+    embeddings, elapsed = timed(processor.generate_embeddings, sample)
+    dimensions = int(np.asarray(embeddings).shape[1])
+    result["generate_embeddings"] = {
+        "texts": len(sample),
+        "seconds": round(elapsed, 4),
+        "texts_per_sec": round(len(sample) / elapsed, 1),
+    }
+
+    texts = synthetic_texts(size, 40, rng)
+    vectors = HashEmbedder(dimensions).encode(texts)
+    documents = [{"file_name": f"SYNTH-{i}_eng01_W.pdf", "chunks": part.tolist(), "embeddings": vectors[rows]}
+                 for i, (part, rows) in enumerate(zip(np.array_split(np.array(texts, dtype=object), 10),
+                                                      np.array_split(np.arange(size), 10)))]
+    snapshot, elapsed = timed(IndexSnapshot.from_documents, f"bench-{size}", documents)
+    result["index_build"] = {"seconds": round(elapsed, 4), "chunks_per_sec": round(size / elapsed, 1)}
+    del documents, vectors
+
+    # Quantized configurations search the snapshot the way the API loads it with
+    # INDEX_STORAGE=disk: codes in memory, float rows memory-mapped and read only
+    # for the rescored shortlist
+    quantizations = {RETRIEVAL_CONFIGS[name].get("quantization", "none") for name in args.configs}
+    served = {"none": snapshot}
+    if quantizations - {"none"}:
+        snapshot.int8_index()
+        snapshot.binary_index()
+        if "binary" in quantizations:
+            # Size the binary shortlist the way publishing does
+            apply_config(processor, "binary")
+            processor.check_binary_recall(snapshot)
+            result["binary_check"] = {name: snapshot.stats.get(name)
+                                      for name in ("binary_recall", "binary_rescore_fraction", "binary_fallback")}
+        embeddings_path = Path(tempfile.mkdtemp(prefix="manualmind-bench-")) / "embeddings.npy"
+        np.save(embeddings_path, snapshot.embeddings)
+        mapped = IndexSnapshot.from_stored(snapshot.manifest(), snapshot.chunks,
+                                           {**snapshot.arrays(), "embeddings": load_mapped(embeddings_path)})
+        served.update(int8=mapped, binary=mapped)
+    # Bytes each path scans per query and has to keep in memory
+    resident_bytes = {"none": int(snapshot.embeddings.nbytes)}
+    if snapshot.int8_codes is not None:
+        resident_bytes["int8"] = int(snapshot.int8_codes.nbytes + snapshot.int8_scales.nbytes)
+        resident_bytes["binary"] = int(snapshot.binary_codes.nbytes + snapshot.binary_thresholds.nbytes)
+
+    queries = synthetic_queries(args.queries, rng)
+    result["search"] = {}
+    exact_results: Dict[str, List[set]] = {}
+    for config_name in args.configs:
+        apply_config(processor, config_name)
+        processor.use_snapshot(served[processor.quantization])
+        processor.find_similar_chunks(queries[0], args.top_k)  # warm up
+        latencies = []
+        found = []
+        start = time.perf_counter()
+        for query in queries:
+            results, elapsed = timed(processor.find_similar_chunks, query, args.top_k)
+            latencies.append(elapsed)
+            found.append({(r["file_name"], r["chunk_index"]) for r in results})
+        total = time.perf_counter() - start
+        result["search"][config_name] = {**percentiles(latencies), "qps": round(len(queries) / total, 1),
+                                         "resident_bytes": resident_bytes[processor.quantization]}
+
+        # Quantized and early-exit configurations are scored against exact search in the same retrieval mode
+        exact = processor.quantization == "none" and (processor.retrieval_mode == "dense"
+                                                      or processor.hybrid_max_postings == 0)
+        if exact:
+            exact_results[processor.retrieval_mode] = found
+        elif processor.retrieval_mode in exact_results:
+            exact = exact_results[processor.retrieval_mode]
+            overlap = sum(len(a & b) for a, b in zip(found, exact)) / max(sum(len(b) for b in exact), 1)
+            result["search"][config_name]["recall_vs_exact"] = round(overlap, 4)
+
+    # BM25 candidate selection on its own, reading every posting and with the early exit
+    lexical_found = {}
+    result["lexical"] = {}
+    for name, max_postings in (("full", 0), ("early_exit", EARLY_EXIT_POSTINGS)):
+        latencies = []
+        lexical_found[name] = []
+        for query in queries:
+            (docs, _), elapsed = timed(snapshot.lexical.top_docs, query, processor.hybrid_candidates, max_postings)
+            latencies.append(elapsed)
+            lexical_found[name].append(set(docs.tolist()))
+        result["lexical"][name] = percentiles(latencies)
+    overlap = sum(len(a & b) for a, b in zip(lexical_found["early_exit"], lexical_found["full"]))
+    result["lexical"]["early_exit"]["recall_vs_full"] = round(
+        overlap / max(sum(len(b) for b in lexical_found["full"]), 1), 4)
+
+    # Quantized codes exist when a quantized configuration was benchmarked
+    result["index_bytes"] = {"embeddings": resident_bytes["none"]}
+    if snapshot.int8_codes is not None:
+        result["index_bytes"]["int8_codes"] = resident_bytes["int8"]
+        result["index_bytes"]["binary_codes"] = resident_bytes["binary"]
+        shutil.rmtree(embeddings_path.parent, ignore_errors=True)
+
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline ManualMind retrieval benchmark")
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="Comma-separated corpus sizes in chunks (e.g. 1000,10000,100000,1000000)")
+    parser.add_argument("--queries", type=int, default=200, help="Queries timed per configuration")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--configs", default=",".join(RETRIEVAL_CONFIGS),
+                        help=f"Retrieval configurations to time ({', '.join(RETRIEVAL_CONFIGS)})")
+    parser.add_argument("--embedder", choices=["hash", "model"], default="hash",
+                        help="hash needs no network; model loads the sentence transformer")
+    parser.add_argument("--chunk-sample", type=int, default=10000, help="Max chunks produced by the chunk_text stage")
+    parser.add_argument("--embed-sample", type=int, default=1000, help="Texts encoded by the embedding stage")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+    args.configs = [name.strip() for name in args.configs.split(",") if name.strip()]
+
+    rng = np.random.default_rng(args.seed)
+    processor = make_processor(args.embedder)
+
+    report = {
+        "benchmark": "retrieval",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "embedder": args.embedder,
+        "queries": args.queries,
+        "top_k": args.top_k,
+        "results": [],
+    }
+
+    for size in [int(value) for value in args.sizes.split(",")]:
+        print(f"Benchmarking {size} chunks...", file=sys.stderr)
+        report["results"].append(benchmark_size(processor, size, args, rng))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
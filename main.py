@@ -3,27 +3,40 @@ ManualMind - AI-powered document search and query system for user manuals.
 """
 
 import os
-from fastapi import FastAPI, HTTPException, Request, BackgroundTasks, Depends, Header
+import json
+import time
+import hashlib
+from fastapi import FastAPI, HTTPException, Request, Depends, Header
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from typing import Optional, Annotated
-import redis
 import logging
 from datetime import datetime
 from dotenv import load_dotenv
 
-from services.document_processor import DocumentProcessor
 from services.query_service import QueryService
+from services.ingestion_queue import IngestionQueue
 
 load_dotenv()
 
-# Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address)
+# Initialize rate limiter; counters live in Redis so limits hold across workers and replicas
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI") or (
+    f"redis://{os.getenv('REDIS_HOST', 'localhost')}:{os.getenv('REDIS_PORT', 6379)}/{os.getenv('REDIS_DB', 0)}"
+)
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    strategy="sliding-window-counter",
+    in_memory_fallback_enabled=True
+)
+QUERY_RATE_LIMIT = f"{int(os.getenv('RATE_LIMIT_PER_MINUTE', 10))}/minute"
+SEARCH_RATE_LIMIT = f"{int(os.getenv('SEARCH_RATE_LIMIT_PER_MINUTE', 30))}/minute"
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -108,13 +121,30 @@ async def verify_api_key(
     )
 
 # Initialize services
-document_processor = DocumentProcessor()
 query_service = QueryService()
+# Share the query service's processor so each worker loads one model and one index
+document_processor = query_service.document_processor
+ingestion_queue = IngestionQueue()
+
+# /status pings Redis at most this often instead of on every poll
+STATUS_REDIS_CHECK_INTERVAL = int(os.getenv("STATUS_REDIS_CHECK_INTERVAL", 30))
+_redis_health = {"status": "unknown", "checked_at": float("-inf")}
 
 # Pydantic models
+class SearchFilters(BaseModel):
+    file_name: Optional[str] = Field(default=None, max_length=255, description="Only search this manual file")
+    instrument: Optional[str] = Field(default=None, max_length=100, description="Only search manuals for this instrument model, e.g. JUNO-X")
+    doc_type: Optional[str] = Field(default=None, max_length=100, description="Only search this document type, e.g. midi_implementation")
+
 class QueryRequest(BaseModel):
     question: str = Field(..., min_length=1, max_length=500, description="The question to ask about the manuals")
     max_results: Optional[int] = 5
+    filters: Optional[SearchFilters] = None
+
+class SearchResponse(BaseModel):
+    query: str
+    results: list
+    total_results: int
 
 class ProcessDocumentsResponse(BaseModel):
     status: str
@@ -127,6 +157,7 @@ class QueryResponse(BaseModel):
     sources: list
     confidence: str
     total_sources: int
+    cached: bool = False
 
 
 @app.get("/")
@@ -137,67 +168,102 @@ async def root():
         "version": "0.1.0",
         "endpoints": {
             "query": "/query - Ask questions about your manuals",
-            "process": "/process-documents - Process PDF files in media folder",
+            "search": "/search - Retrieve matching manual excerpts without generating an answer",
+            "process": "/process-documents - Queue processing of PDF files in media folder",
             "status": "/status - Check system status",
             "docs": "/docs - API documentation"
         }
     }
 
 
+def redis_status() -> str:
+    """Redis reachability, re-checked at most every STATUS_REDIS_CHECK_INTERVAL seconds."""
+    now = time.monotonic()
+    if now - _redis_health["checked_at"] >= STATUS_REDIS_CHECK_INTERVAL:
+        try:
+            connected = query_service.binary_client.ping()
+        except Exception:
+            connected = False
+        _redis_health.update(status="connected" if connected else "disconnected", checked_at=now)
+    return _redis_health["status"]
+
+
 @app.get("/status")
-async def get_status():
-    """Get system status and available documents."""
+async def get_status(request: Request):
+    """Get system status and available documents.
+
+    Built from the in-memory index, whose statistics are recorded at ingestion
+    time, and served with an ETag so unchanged polls are answered with 304.
+    """
     try:
-        # Check Redis connection
-        redis_client = redis.Redis(
-            host=os.getenv("REDIS_HOST", "localhost"),
-            port=int(os.getenv("REDIS_PORT", 6379)),
-            db=int(os.getenv("REDIS_DB", 0))
-        )
-        redis_status = "connected" if redis_client.ping() else "disconnected"
-        
-        # Get processed files
-        processed_files = redis_client.get("processed_files")
-        processed_files = eval(processed_files) if processed_files else []
-        
-        return {
+        snapshot = document_processor.get_snapshot()
+        files = snapshot.file_names if snapshot else []
+        status = {
             "status": "healthy",
-            "redis_status": redis_status,
-            "processed_documents": len(processed_files),
-            "available_files": processed_files,
-            "media_folder": "media"
+            "redis_status": redis_status(),
+            "processed_documents": len(files),
+            "available_files": files,
+            "media_folder": "media",
+            "index_version": snapshot.version if snapshot else None,
+            "index": snapshot.stats if snapshot else {}
         }
     except Exception as e:
-        return {
+        status = {
             "status": "unhealthy",
             "error": str(e),
-            "redis_status": "disconnected"
+            "redis_status": redis_status()
         }
 
+    body = json.dumps(status, sort_keys=True).encode("utf-8")
+    etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.get("/status/cache")
+async def get_cache_status(
+    authenticated: bool = Depends(verify_api_key)
+):
+    """Cache compression statistics, read from Redis on every call."""
+    try:
+        return query_service.cache_codec.stats(query_service.binary_client)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Cache statistics unavailable: {str(e)}")
+
 
 @app.post("/process-documents")
 async def process_documents(
-    background_tasks: BackgroundTasks,
     authenticated: bool = Depends(verify_api_key)
 ):
-    """Process all PDF files in the media folder."""
-    def process_in_background():
-        try:
-            result = document_processor.process_media_folder()
-            return result
-        except Exception as e:
-            print(f"Background processing error: {e}")
-    
-    background_tasks.add_task(process_in_background)
-    
+    """Queue processing of all PDF files in the media folder for the ingestion worker."""
+    try:
+        job = ingestion_queue.enqueue()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Could not queue document processing: {str(e)}")
+
     return {
-        "status": "started",
-        "message": "Document processing started in background. Check /status for progress."
+        "status": job["status"],
+        "job_id": job["job_id"],
+        "message": "Document processing queued for the ingestion worker. Check /status for progress."
     }
 
 
+@app.get("/process-documents/{job_id}")
+async def get_processing_job(
+    job_id: str,
+    authenticated: bool = Depends(verify_api_key)
+):
+    """Get the state of a queued document processing job."""
+    job = ingestion_queue.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Processing job not found")
+    return job
+
+
 @app.post("/query", response_model=QueryResponse)
-@limiter.limit("10/minute")
+@limiter.limit(QUERY_RATE_LIMIT)
 async def query_documents(
     request: Request, 
     query_request: QueryRequest,
@@ -208,10 +274,12 @@ async def query_documents(
         if not query_request.question.strip():
             raise HTTPException(status_code=400, detail="Question cannot be empty")
         
-        # Process the query
-        result = query_service.process_query(
+        # Run in the threadpool so concurrent queries overlap and their embeddings are batched together
+        result = await run_in_threadpool(
+            query_service.process_query,
             query_request.question,
-            top_k=query_request.max_results
+            top_k=query_request.max_results,
+            filters=query_request.filters.model_dump() if query_request.filters else None
         )
         
         return QueryResponse(**result)
@@ -220,6 +288,31 @@ async def query_documents(
         raise HTTPException(status_code=500, detail=f"Query processing failed: {str(e)}")
 
 
+@app.post("/search", response_model=SearchResponse)
+@limiter.limit(SEARCH_RATE_LIMIT)
+async def search_documents(
+    request: Request,
+    query_request: QueryRequest,
+    authenticated: bool = Depends(verify_api_key)
+):
+    """Return the manual excerpts most relevant to a question, without calling the language model."""
+    try:
+        if not query_request.question.strip():
+            raise HTTPException(status_code=400, detail="Question cannot be empty")
+        
+        results = await run_in_threadpool(
+            document_processor.find_similar_chunks,
+            query_request.question,
+            top_k=query_request.max_results,
+            filters=query_request.filters.model_dump() if query_request.filters else None
+        )
+        
+        return SearchResponse(query=query_request.question, results=results, total_results=len(results))
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+
 @app.get("/health")
 async def health_check():
     """Simple health check endpoint."""
@@ -0,0 +1,84 @@
+"""
+In-process backend for the ManualMind MCP server.
+Drives QueryService and DocumentProcessor from a ManualMind checkout directly,
+so a single-user desktop setup needs no API container and tool calls skip the
+HTTP round trip. Results have the same shape as the API's JSON responses.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddedBackend:
+    """Answers MCP tool calls with the ManualMind services loaded in this process."""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = os.path.abspath(
+            root or os.getenv("MANUALMIND_ROOT") or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        )
+        # MCP clients start servers from arbitrary directories, so paths are resolved against the checkout
+        load_dotenv(os.path.join(self.root, ".env"))
+        index_dir = os.getenv("INDEX_DIR", "index")
+        if not os.path.isabs(index_dir):
+            os.environ["INDEX_DIR"] = os.path.join(self.root, index_dir)
+        self.media_path = os.path.join(self.root, os.getenv("MANUALMIND_MEDIA", "media"))
+
+        if self.root not in sys.path:
+            sys.path.insert(0, self.root)
+        from services.query_service import QueryService
+
+        self.query_service = QueryService()
+        self.document_processor = self.query_service.document_processor
+        # One ingestion at a time; queries keep using the current index meanwhile
+        self._processing = asyncio.Lock()
+        logger.info(f"Embedded ManualMind backend loaded from {self.root}")
+
+    async def query(self, question: str, max_results: int = 5,
+                    filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Answer a question like POST /query."""
+        return await asyncio.to_thread(self.query_service.process_query, question, max_results, filters or None)
+
+    async def status(self) -> Dict[str, Any]:
+        """Report health and indexed manuals like GET /status."""
+        if not self.query_service.redis_enabled:
+            # A disk index runs without Redis, with caching off
+            redis_status = "not used"
+        else:
+            try:
+                redis_status = "connected" if self.query_service.binary_client.ping() else "disconnected"
+            except Exception:
+                redis_status = "disconnected"
+
+        snapshot = await asyncio.to_thread(self.document_processor.get_snapshot)
+        files = snapshot.file_names if snapshot else []
+        return {
+            "status": "healthy",
+            "redis_status": redis_status,
+            "processed_documents": len(files),
+            "available_files": files,
+            "index_version": snapshot.version if snapshot else None,
+            "media_folder": self.media_path
+        }
+
+    async def process_documents(self) -> Dict[str, Any]:
+        """Index the media folder in a worker thread and publish the new index version."""
+        if self._processing.locked():
+            return {"status": "running", "message": "Document processing is already running"}
+
+        async with self._processing:
+            results = await asyncio.to_thread(self.document_processor.process_media_folder, self.media_path)
+
+        if "error" in results and not isinstance(results["error"], dict):
+            return {"status": "failed", "message": results["error"]}
+        failed = [name for name, doc_data in results.items() if "error" in doc_data]
+        message = f"Indexed {len(results) - len(failed)} of {len(results)} files"
+        if failed:
+            message += f"; failed: {', '.join(failed)}"
+        return {"status": "completed", "message": message}
@@ -26,6 +26,8 @@ from mcp.types import (
     Tool,
 )
 
+from rate_limiter import RedisRateLimiter
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -34,6 +36,9 @@ logger = logging.getLogger(__name__)
 class QueryRequest(BaseModel):
     question: str = Field(..., min_length=1, max_length=500, description="The question to ask about the manuals")
     max_results: Optional[int] = Field(default=5, ge=1, le=20, description="Maximum number of results to return")
+    file_name: Optional[str] = Field(default=None, max_length=255, description="Only search this manual file")
+    instrument: Optional[str] = Field(default=None, max_length=100, description="Only search manuals for this instrument model")
+    doc_type: Optional[str] = Field(default=None, max_length=100, description="Only search this document type")
 
 class ToolCallRequest(BaseModel):
     name: str = Field(..., description="Tool name to call")
@@ -57,8 +62,20 @@ class ManualMindMCPServer:
         self.api_key = os.getenv("MANUALMIND_API_KEY")
         self.rate_limit_per_minute = int(os.getenv("RATE_LIMIT_PER_MINUTE", "10"))
         
-        # Setup request tracking for rate limiting
-        self.request_timestamps = []
+        # Token bucket shared through Redis by every MCP server replica
+        burst = os.getenv("RATE_LIMIT_BURST")
+        self.rate_limiter = RedisRateLimiter(
+            self.rate_limit_per_minute,
+            burst=int(burst) if burst else None,
+            redis_url=os.getenv("RATE_LIMIT_REDIS_URL") or None
+        )
+        
+        # "embedded" answers tool calls with the ManualMind services in this process instead of over HTTP
+        self.backend = os.getenv("MCP_BACKEND", "http").lower()
+        self.embedded = None
+        if self.backend == "embedded":
+            from embedded_backend import EmbeddedBackend
+            self.embedded = EmbeddedBackend()
         
         # Initialize FastAPI app for HTTP access
         self.app = FastAPI(
@@ -96,6 +113,18 @@ class ManualMindMCPServer:
                                     "minimum": 1,
                                     "maximum": 20,
                                     "default": 5
+                                },
+                                "file_name": {
+                                    "type": "string",
+                                    "description": "Only search this manual file, e.g. JUNO-X_MIDI_imple_eng01_W.pdf"
+                                },
+                                "instrument": {
+                                    "type": "string",
+                                    "description": "Only search manuals for this instrument model, e.g. JUNO-X or SYSTEM-8"
+                                },
+                                "doc_type": {
+                                    "type": "string",
+                                    "description": "Only search this document type, e.g. midi_implementation or owners_manual"
                                 }
                             },
                             "required": ["question"]
@@ -127,11 +156,13 @@ class ManualMindMCPServer:
             """Handle tool calls."""
             try:
                 # Rate limiting check
-                if not self._check_rate_limit():
+                allowed, retry_ms = await self.rate_limiter.acquire()
+                if not allowed:
                     return CallToolResult(
                         content=[TextContent(
                             type="text",
-                            text=f"Rate limit exceeded. Maximum {self.rate_limit_per_minute} requests per minute allowed."
+                            text=f"Rate limit exceeded. Maximum {self.rate_limit_per_minute} requests per minute allowed. "
+                                 f"Retry in {retry_ms / 1000:.1f}s."
                         )],
                         isError=True
                     )
@@ -161,29 +192,15 @@ class ManualMindMCPServer:
                     isError=True
                 )
     
-    def _check_rate_limit(self) -> bool:
-        """Check if request is within rate limits."""
-        import time
-        current_time = time.time()
-        
-        # Remove old timestamps (older than 1 minute)
-        self.request_timestamps = [
-            ts for ts in self.request_timestamps 
-            if current_time - ts < 60
-        ]
-        
-        # Check if we're under the limit
-        if len(self.request_timestamps) >= self.rate_limit_per_minute:
-            return False
-        
-        # Add current timestamp
-        self.request_timestamps.append(current_time)
-        return True
-    
     async def _query_manuals(self, arguments: Dict[str, Any]) -> CallToolResult:
         """Query the ManualMind API."""
         question = arguments.get("question", "").strip()
         max_results = arguments.get("max_results", 5)
+        filters = {
+            field: arguments[field]
+            for field in ("file_name", "instrument", "doc_type")
+            if arguments.get(field)
+        }
         
         if not question:
             return CallToolResult(
@@ -194,6 +211,13 @@ class ManualMindMCPServer:
                 isError=True
             )
         
+        if self.embedded:
+            return await self._call_embedded(
+                self.embedded.query(question, max_results, filters),
+                self._format_query_response,
+                "Error querying manuals"
+            )
+        
         try:
             async with httpx.AsyncClient(timeout=self.api_timeout) as client:
                 headers = {}
@@ -204,7 +228,8 @@ class ManualMindMCPServer:
                     urljoin(self.base_url, "/query"),
                     json={
                         "question": question,
-                        "max_results": max_results
+                        "max_results": max_results,
+                        "filters": filters or None
                     },
                     headers=headers
                 )
@@ -252,6 +277,11 @@ class ManualMindMCPServer:
     
     async def _get_system_status(self) -> CallToolResult:
         """Get system status from ManualMind API."""
+        if self.embedded:
+            return await self._call_embedded(
+                self.embedded.status(), self._format_status_response, "Error getting system status"
+            )
+        
         try:
             async with httpx.AsyncClient(timeout=self.api_timeout) as client:
                 headers = {}
@@ -294,6 +324,11 @@ class ManualMindMCPServer:
     
     async def _process_documents(self) -> CallToolResult:
         """Trigger document processing."""
+        if self.embedded:
+            return await self._call_embedded(
+                self.embedded.process_documents(), self._format_process_response, "Error processing documents"
+            )
+        
         try:
             async with httpx.AsyncClient(timeout=self.api_timeout) as client:
                 headers = {}
@@ -310,7 +345,7 @@ class ManualMindMCPServer:
                     return CallToolResult(
                         content=[TextContent(
                             type="text",
-                            text=f"Document processing {result.get('status', 'unknown')}: {result.get('message', 'No message')}"
+                            text=self._format_process_response(result)
                         )]
                     )
                 else:
@@ -332,6 +367,31 @@ class ManualMindMCPServer:
                 isError=True
             )
     
+    async def _call_embedded(self, call, formatter, error_prefix: str) -> CallToolResult:
+        """Await an embedded backend call and format its result like the matching API response."""
+        try:
+            result = await call
+        except Exception as e:
+            logger.error(f"{error_prefix}: {e}")
+            return CallToolResult(
+                content=[TextContent(
+                    type="text",
+                    text=f"{error_prefix}: {str(e)}"
+                )],
+                isError=True
+            )
+        
+        return CallToolResult(
+            content=[TextContent(
+                type="text",
+                text=formatter(result)
+            )]
+        )
+    
+    def _format_process_response(self, result: Dict[str, Any]) -> str:
+        """Format a document processing response."""
+        return f"Document processing {result.get('status', 'unknown')}: {result.get('message', 'No message')}"
+    
     def _format_query_response(self, result: Dict[str, Any]) -> str:
         """Format query response for better readability."""
         query = result.get("query", "")
@@ -409,7 +469,10 @@ class ManualMindMCPServer:
                         "description": "Query the ManualMind system to search for information in user manuals using natural language",
                         "parameters": {
                             "question": "string (required, 1-500 chars)",
-                            "max_results": "integer (optional, 1-20, default: 5)"
+                            "max_results": "integer (optional, 1-20, default: 5)",
+                            "file_name": "string (optional, only search this manual file)",
+                            "instrument": "string (optional, e.g. JUNO-X)",
+                            "doc_type": "string (optional, e.g. midi_implementation)"
                         }
                     },
                     {
@@ -481,10 +544,7 @@ class ManualMindMCPServer:
         async def query_manuals(request: QueryRequest):
             """Direct query endpoint for convenience."""
             try:
-                arguments = {
-                    "question": request.question,
-                    "max_results": request.max_results
-                }
+                arguments = request.model_dump(exclude_none=True)
                 result = await self._query_manuals(arguments)
                 
                 content = ""
@@ -590,9 +650,13 @@ async def main():
     
     # Log startup information
     logger.info("Starting ManualMind MCP Server (Hybrid Mode)")
-    logger.info(f"API URL: {server.base_url}")
+    if server.embedded:
+        logger.info(f"Backend: embedded ManualMind services from {server.embedded.root}")
+    else:
+        logger.info(f"API URL: {server.base_url}")
     logger.info(f"API Timeout: {server.api_timeout}s")
-    logger.info(f"Rate Limit: {server.rate_limit_per_minute}/minute")
+    logger.info(f"Rate Limit: {server.rate_limit_per_minute}/minute "
+                f"({'shared through Redis' if server.rate_limiter.client else 'per process'})")
     logger.info(f"HTTP Port: {os.getenv('MCP_HTTP_PORT', '8001')}")
     
     # Determine run mode
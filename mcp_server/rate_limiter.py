@@ -0,0 +1,100 @@
+"""
+Rate limiting for the ManualMind MCP server.
+A token bucket kept in Redis and updated by one atomic Lua script, so every
+replica draws from the same bucket at O(1) cost per request. Falls back to an
+in-process bucket while Redis is unreachable.
+"""
+
+import logging
+import math
+import time
+from typing import Optional, Tuple
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1] bucket hash; ARGV capacity, refill rate (tokens/second), tokens requested.
+# Redis' own clock is used so replicas with skewed clocks share one timeline.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1])
+local updated = tonumber(state[2])
+if tokens == nil then
+    tokens = capacity
+    updated = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+
+local allowed = 0
+local retry_ms = 0
+if tokens >= requested then
+    tokens = tokens - requested
+    allowed = 1
+else
+    retry_ms = math.ceil((requested - tokens) / rate * 1000)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, retry_ms}
+"""
+
+
+class LocalTokenBucket:
+    """Single-process token bucket; safe on one event loop because it never awaits."""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def acquire(self, requested: float = 1.0) -> Tuple[bool, int]:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= requested:
+            self.tokens -= requested
+            return True, 0
+        return False, math.ceil((requested - self.tokens) / self.rate * 1000)
+
+
+class RedisRateLimiter:
+    """Shared token bucket allowing limit_per_minute requests per minute with bursts up to burst."""
+
+    def __init__(self, limit_per_minute: int, burst: Optional[int] = None,
+                 redis_url: Optional[str] = None, key_prefix: str = "rate_limit:mcp:"):
+        self.limit_per_minute = limit_per_minute
+        self.capacity = float(burst or limit_per_minute)
+        self.rate = limit_per_minute / 60.0
+        self.key_prefix = key_prefix
+        self.client = redis.Redis.from_url(redis_url) if redis_url else None
+        self.script = self.client.register_script(TOKEN_BUCKET_SCRIPT) if self.client else None
+        self.local = LocalTokenBucket(self.capacity, self.rate)
+        self._redis_failed = False
+
+    async def acquire(self, key: str = "global") -> Tuple[bool, int]:
+        """Take one token for key; returns (allowed, milliseconds until a token is available)."""
+        if self.script is None:
+            return self.local.acquire()
+        try:
+            allowed, retry_ms = await self.script(keys=[self.key_prefix + key],
+                                                  args=[self.capacity, self.rate, 1])
+        except RedisError as e:
+            if not self._redis_failed:
+                logger.warning(f"Redis rate limiter unavailable, limiting per process: {e}")
+                self._redis_failed = True
+            return self.local.acquire()
+
+        if self._redis_failed:
+            logger.info("Redis rate limiter available again")
+            self._redis_failed = False
+        return bool(allowed), int(retry_ms)
@@ -103,7 +103,7 @@ process_documents() {
     
     while [ $retry_count -lt $max_retries ]; do
         if curl -s -X POST http://localhost:8000/process-documents > /dev/null; then
-            echo "✅ Document processing started successfully!"
+            echo "✅ Document processing queued successfully!"
             break
         else
             retry_count=$((retry_count + 1))
@@ -0,0 +1,25 @@
+#!/bin/bash
+# Start N local index shard services for testing a sharded index.
+# Usage: scripts/run_shards.sh [shards] [first_port]
+# Stop them with Ctrl+C.
+
+set -e
+
+SHARDS="${1:-2}"
+FIRST_PORT="${2:-8101}"
+cd "$(dirname "$0")/.."
+
+urls=()
+pids=()
+for ((shard = 0; shard < SHARDS; shard++)); do
+    port=$((FIRST_PORT + shard))
+    python shard_server.py --shard "$shard" --port "$port" &
+    pids+=($!)
+    urls+=("http://localhost:${port}")
+done
+
+trap 'kill "${pids[@]}" 2>/dev/null' EXIT INT TERM
+
+echo "🧩 Started ${SHARDS} index shards. Set this for the API and the ingestion worker:"
+echo "   INDEX_SHARD_URLS=$(IFS=,; echo "${urls[*]}")"
+wait
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Train a zstd dictionary for ManualMind's cached answers.
+Samples existing query_cache:* entries from Redis and writes a dictionary file
+to use with CACHE_COMPRESSION=zstd and CACHE_ZSTD_DICT. Entries compressed with
+a different dictionary become unreadable and are regenerated as cache misses.
+
+Usage:
+    python scripts/train_cache_dictionary.py --output cache.dict --samples 5000
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import redis
+from dotenv import load_dotenv
+
+from services.cache_codec import CacheCodec, train_dictionary
+
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train a zstd dictionary from cached ManualMind answers")
+    parser.add_argument("--output", required=True, help="Dictionary file to write")
+    parser.add_argument("--pattern", default="query_cache:*", help="Keys to sample")
+    parser.add_argument("--samples", type=int, default=5000, help="Maximum entries to sample")
+    parser.add_argument("--size", type=int, default=112640, help="Dictionary size in bytes")
+    args = parser.parse_args()
+
+    client = redis.Redis(
+        host=os.getenv("REDIS_HOST", "localhost"),
+        port=int(os.getenv("REDIS_PORT", 6379)),
+        db=int(os.getenv("REDIS_DB", 0))
+    )
+    codec = CacheCodec()
+
+    samples = []
+    for key in client.scan_iter(match=args.pattern, count=500):
+        data = client.get(key)
+        if data is None:
+            continue
+        try:
+            samples.append(json.dumps(codec.decode(data)).encode("utf-8"))
+        except Exception:
+            continue
+        if len(samples) >= args.samples:
+            break
+
+    if len(samples) < 10:
+        sys.exit(f"Only {len(samples)} entries match {args.pattern}; let the cache fill up first")
+
+    dictionary = train_dictionary(samples, args.size)
+    with open(args.output, "wb") as f:
+        f.write(dictionary)
+    print(f"Wrote {len(dictionary)} byte dictionary trained on {len(samples)} entries to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
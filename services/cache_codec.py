@@ -0,0 +1,122 @@
+"""
+Cache payload compression for ManualMind.
+Serializes cached documents and answers to JSON and compresses the larger ones
+with zlib, or zstd with an optional trained dictionary, keeping per-namespace
+byte counts in Redis so the memory saved can be checked in production.
+"""
+
+import os
+import json
+import zlib
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# JSON never starts with a NUL byte, so plain payloads written before compression stay readable
+ZLIB_HEADER = b"\x00Z"
+ZSTD_HEADER = b"\x00S"
+
+
+def train_dictionary(samples: List[bytes], size: int = 112640) -> bytes:
+    """Train a zstd dictionary from sample payloads (needs the zstandard package)."""
+    import zstandard
+    return zstandard.train_dictionary(size, samples).as_bytes()
+
+
+class CacheCodec:
+    """Encodes cache payloads, compressing those above a size threshold."""
+
+    STATS_KEY = "cache:compression_stats"
+
+    def __init__(self):
+        self.algorithm = os.getenv("CACHE_COMPRESSION", "zlib").lower()
+        self.threshold = int(os.getenv("CACHE_COMPRESSION_THRESHOLD", 1024))
+        self._zstd_compressor = None
+        self._zstd_decompressor = None
+
+        if self.algorithm == "zstd":
+            try:
+                import zstandard
+            except ImportError:
+                print("CACHE_COMPRESSION=zstd needs the zstandard package, falling back to zlib")
+                self.algorithm = "zlib"
+        self.level = int(os.getenv("CACHE_COMPRESSION_LEVEL", 3 if self.algorithm == "zstd" else 6))
+
+        if self.algorithm == "zstd":
+            # A dictionary trained on typical payloads helps most with small answers
+            dictionary = None
+            dictionary_path = os.getenv("CACHE_ZSTD_DICT")
+            if dictionary_path:
+                with open(dictionary_path, "rb") as f:
+                    dictionary = zstandard.ZstdCompressionDict(f.read())
+            self._zstd_compressor = zstandard.ZstdCompressor(level=self.level, dict_data=dictionary)
+            self._zstd_decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+
+    def encode(self, payload: Any) -> bytes:
+        """JSON-encode a payload, compressed when it is large enough to be worth it."""
+        return self.compress(json.dumps(payload).encode("utf-8"))
+
+    def compress(self, data: bytes) -> bytes:
+        if self.algorithm == "none" or len(data) < self.threshold:
+            return data
+        if self._zstd_compressor:
+            compressed = ZSTD_HEADER + self._zstd_compressor.compress(data)
+        else:
+            compressed = ZLIB_HEADER + zlib.compress(data, self.level)
+        return compressed if len(compressed) < len(data) else data
+
+    def decode(self, data: bytes) -> Any:
+        """Decode a stored payload; raises when it cannot be read, which callers treat as a miss."""
+        if data.startswith(ZLIB_HEADER):
+            return json.loads(zlib.decompress(data[len(ZLIB_HEADER):]))
+        if data.startswith(ZSTD_HEADER):
+            if not self._zstd_decompressor:
+                raise ValueError("zstd payload found but CACHE_COMPRESSION is not zstd")
+            try:
+                return json.loads(self._zstd_decompressor.decompress(data[len(ZSTD_HEADER):]))
+            except Exception as e:
+                # Typically written with a different dictionary
+                raise ValueError(f"Cannot decompress zstd payload: {e}") from e
+        return json.loads(data)
+
+    def setex(self, client, key: str, ttl: int, payload: Any, namespace: str) -> int:
+        """Store an encoded payload with a TTL and count its raw and stored size; returns stored bytes."""
+        raw = json.dumps(payload).encode("utf-8")
+        data = self.compress(raw)
+        pipe = client.pipeline(transaction=False)
+        pipe.setex(key, ttl, data)
+        pipe.hincrby(self.STATS_KEY, f"{namespace}:writes", 1)
+        pipe.hincrby(self.STATS_KEY, f"{namespace}:raw_bytes", len(raw))
+        pipe.hincrby(self.STATS_KEY, f"{namespace}:stored_bytes", len(data))
+        if data[:1] == b"\x00":
+            pipe.hincrby(self.STATS_KEY, f"{namespace}:compressed", 1)
+        pipe.execute()
+        return len(data)
+
+    def get(self, client, key: str) -> Optional[Any]:
+        """Fetch and decode a payload; unreadable entries are reported as missing."""
+        return self.read(key, client.get(key))
+
+    def read(self, key: str, data: Optional[bytes]) -> Optional[Any]:
+        """Decode a payload already fetched, e.g. in a pipeline; unreadable entries are reported as missing."""
+        if data is None:
+            return None
+        try:
+            return self.decode(data)
+        except (ValueError, zlib.error) as e:
+            print(f"Discarding unreadable cache entry {key}: {e}")
+            return None
+
+    def stats(self, client) -> Dict[str, Dict[str, Any]]:
+        """Per-namespace write counts, bytes and compression ratio since the stats were reset."""
+        raw_stats = client.hgetall(self.STATS_KEY)
+        namespaces: Dict[str, Dict[str, Any]] = {}
+        for field, value in raw_stats.items():
+            field = field.decode() if isinstance(field, bytes) else field
+            namespace, metric = field.rsplit(":", 1)
+            namespaces.setdefault(namespace, {})[metric] = int(value)
+        for values in namespaces.values():
+            if values.get("stored_bytes"):
+                values["ratio"] = round(values.get("raw_bytes", 0) / values["stored_bytes"], 2)
+        return {"algorithm": self.algorithm, "threshold": self.threshold, "namespaces": namespaces}
@@ -0,0 +1,142 @@
+"""
+Structure-aware chunking for ManualMind.
+Splits manual pages along headings, parameter tables and numbered procedures
+instead of fixed character windows, and records where each chunk came from.
+"""
+
+import re
+from typing import List, Dict, Any, Optional, Callable
+
+# "3.2 Editing a Tone", "Chapter 4 ...", "OSCILLATOR", "MIDI Implementation Chart"
+NUMBERED_HEADING = re.compile(r"^(\d+(\.\d+)*|chapter\s+\d+)\s+\S", re.IGNORECASE)
+LIST_ITEM = re.compile(r"^(\d{1,2}[.)]|\(\d{1,2}\)|step\s+\d+|[•\-\*–·])\s+", re.IGNORECASE)
+TABLE_COLUMNS = re.compile(r"\S(\s{2,}|\t)\S")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for when no tokenizer is available."""
+    return int(len(text.split()) * 1.3) + 1
+
+
+class StructuredChunker:
+    """Packs manual text into token-limited chunks along section, table and list boundaries."""
+
+    def __init__(self, max_tokens: int = 256, count_tokens: Optional[Callable[[str], int]] = None):
+        self.max_tokens = max_tokens
+        self.count_tokens = count_tokens or estimate_tokens
+
+    def classify_line(self, line: str) -> str:
+        """Label a line as heading, table row, list item or text."""
+        words = line.split()
+        if TABLE_COLUMNS.search(line):
+            return "table"
+        if LIST_ITEM.match(line):
+            return "list"
+        if len(words) <= 10 and len(line) <= 80 and not line.endswith((".", ",", ";", ":")):
+            letters = [c for c in line if c.isalpha()]
+            if NUMBERED_HEADING.match(line) and letters and letters[0].isupper():
+                return "heading"
+            if len(letters) >= 3 and all(c.isupper() for c in letters):
+                return "heading"
+        return "text"
+
+    def split_units(self, pages: List[str]) -> List[Dict[str, Any]]:
+        """Turn pages into atomic units: headings, table rows, list items and sentences."""
+        units = []
+
+        for page_number, page_text in enumerate(pages, start=1):
+            paragraph = []
+
+            def flush_paragraph():
+                if paragraph:
+                    for sentence in SENTENCE_END.split(" ".join(paragraph)):
+                        if sentence.strip():
+                            units.append({"kind": "text", "text": sentence.strip(), "page": page_number})
+                    paragraph.clear()
+
+            for raw_line in page_text.splitlines():
+                line = raw_line.rstrip()
+                if not line.strip():
+                    flush_paragraph()
+                    continue
+
+                kind = self.classify_line(line.strip())
+                if kind == "text":
+                    # Continuation lines of a wrapped list item stay with that item
+                    if not paragraph and units and units[-1]["kind"] == "list" and units[-1]["page"] == page_number \
+                            and not line.strip()[:1].isupper():
+                        units[-1]["text"] += " " + line.strip()
+                    else:
+                        paragraph.append(line.strip())
+                    continue
+
+                flush_paragraph()
+                # Table rows keep their column spacing so cells stay aligned
+                text = line if kind == "table" else line.strip()
+                units.append({"kind": kind, "text": text, "page": page_number})
+
+            flush_paragraph()
+
+        return units
+
+    def _split_oversized(self, unit: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+        """Break a unit that alone exceeds the token limit into word windows."""
+        pieces = []
+        current = []
+        current_tokens = 0
+        for word in unit["text"].split():
+            word_tokens = self.count_tokens(word)
+            if current and current_tokens + word_tokens > limit:
+                pieces.append({**unit, "text": " ".join(current)})
+                current = []
+                current_tokens = 0
+            current.append(word)
+            current_tokens += word_tokens
+        if current:
+            pieces.append({**unit, "text": " ".join(current)})
+        return pieces
+
+    def chunk_pages(self, pages: List[str]) -> List[Dict[str, Any]]:
+        """Chunk page texts, returning chunk text with its section title and page range."""
+        chunks = []
+        section = ""
+        current = []
+        current_tokens = 0
+
+        def flush():
+            nonlocal current, current_tokens
+            if current:
+                body = "\n".join(unit["text"] for unit in current)
+                # Carry the section title into every chunk so it embeds with its context
+                text = body if not section or body.startswith(section) else f"{section}\n{body}"
+                chunks.append({
+                    "text": text,
+                    "section": section,
+                    "page_start": min(unit["page"] for unit in current),
+                    "page_end": max(unit["page"] for unit in current)
+                })
+            current = []
+            current_tokens = 0
+
+        for unit in self.split_units(pages):
+            if unit["kind"] == "heading":
+                flush()
+                section = unit["text"]
+                continue
+
+            unit_tokens = self.count_tokens(unit["text"])
+            section_tokens = self.count_tokens(section) if section else 0
+            pieces = [unit] if unit_tokens + section_tokens <= self.max_tokens else \
+                self._split_oversized(unit, max(self.max_tokens - section_tokens, 1))
+
+            for piece in pieces:
+                piece_tokens = unit_tokens if piece is unit else self.count_tokens(piece["text"])
+                # A table row or procedure step never straddles two chunks
+                if current and current_tokens + piece_tokens + section_tokens > self.max_tokens:
+                    flush()
+                current.append(piece)
+                current_tokens += piece_tokens
+
+        flush()
+        return chunks
@@ -0,0 +1,128 @@
+"""
+Prompt context assembly for ManualMind.
+Fits retrieved chunks into a token budget for the chat model, dropping the
+text that overlapping chunks repeat and merging neighbours from the same file.
+"""
+
+from typing import List, Dict, Any, Optional, Callable
+
+from .chunking import estimate_tokens
+
+# Shortest repeated run treated as chunk overlap rather than coincidence
+MIN_OVERLAP_CHARS = 20
+
+
+def load_tokenizer(model: str = "gpt-3.5-turbo") -> Optional[Callable[[str], int]]:
+    """Return a local tiktoken counter for the chat model, if tiktoken and its encoding are available."""
+    try:
+        import tiktoken
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text))
+    except Exception:
+        return None
+
+
+def overlap_length(left: str, right: str, max_chars: int) -> int:
+    """Length of the longest suffix of left that is also a prefix of right."""
+    for length in range(min(len(left), len(right), max_chars), MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:length]):
+            return length
+    return 0
+
+
+class ContextBuilder:
+    """Selects and merges context chunks in ranked order until the token budget is spent."""
+
+    def __init__(self, token_budget: int = 2000, max_overlap_chars: int = 200,
+                 count_tokens: Optional[Callable[[str], int]] = None):
+        self.token_budget = token_budget
+        self.max_overlap_chars = max_overlap_chars
+        self.count_tokens = count_tokens or estimate_tokens
+
+    def _strip_overlap(self, previous: Dict[str, Any], chunk: Dict[str, Any]) -> str:
+        """Text of chunk without what it repeats from the chunk right before it."""
+        text = chunk["chunk_text"]
+        overlap = overlap_length(previous["chunk_text"], text, self.max_overlap_chars)
+        if overlap:
+            return text[overlap:].lstrip()
+
+        # Structured chunks repeat their section title instead of overlapping
+        section = chunk.get("section")
+        if section and section == previous.get("section") and text.startswith(section):
+            return text[len(section):].lstrip()
+        return text
+
+    def _header(self, chunk: Dict[str, Any]) -> str:
+        return f"From {chunk['file_name']}:\n"
+
+    def build(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return merged context blocks that fit the token budget, best block first.
+
+        Chunks are expected in retrieval order, which may differ from raw similarity
+        order when hybrid fusion or re-ranking is enabled.
+        """
+        selected = {}
+        remaining = self.token_budget
+
+        for rank, chunk in enumerate(chunks):
+            key = (chunk["file_name"], chunk["chunk_index"])
+            if key in selected:
+                continue
+
+            # Text this chunk shares with an already selected neighbour is free
+            previous = selected.get((chunk["file_name"], chunk["chunk_index"] - 1))
+            text = self._strip_overlap(previous, chunk) if previous else chunk["chunk_text"]
+            following = selected.get((chunk["file_name"], chunk["chunk_index"] + 1))
+            if following:
+                overlap = overlap_length(text, following["chunk_text"], self.max_overlap_chars)
+                text = text[:len(text) - overlap].rstrip()
+
+            cost = self.count_tokens(text)
+            if not previous and not following:
+                cost += self.count_tokens(self._header(chunk))
+
+            if cost > remaining:
+                if selected:
+                    # A lower-ranked but shorter chunk may still fit
+                    continue
+                # Always send something: trim the best chunk to the budget
+                words = chunk["chunk_text"].split()
+                while words and self.count_tokens(" ".join(words)) > remaining:
+                    words = words[:int(len(words) * 0.9)]
+                chunk = {**chunk, "chunk_text": " ".join(words)}
+                cost = remaining
+
+            selected[key] = {**chunk, "rank": rank}
+            remaining -= cost
+            if remaining <= 0:
+                break
+
+        return self._merge(selected)
+
+    def _merge(self, selected: Dict[tuple, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Join runs of consecutive chunks from the same file into single blocks."""
+        blocks = []
+        current = None
+        previous = None
+
+        for key in sorted(selected):
+            chunk = selected[key]
+            if current and previous and key == (previous["file_name"], previous["chunk_index"] + 1):
+                current["chunk_text"] += "\n" + self._strip_overlap(previous, chunk)
+                current["similarity"] = max(current["similarity"], chunk["similarity"])
+                current["rank"] = min(current["rank"], chunk["rank"])
+                current["chunk_indices"].append(chunk["chunk_index"])
+                if chunk.get("page_end"):
+                    current["page_end"] = chunk["page_end"]
+                if current.get("section") != chunk.get("section"):
+                    current.pop("section", None)
+            else:
+                current = {**chunk, "chunk_indices": [chunk["chunk_index"]]}
+                blocks.append(current)
+            previous = chunk
+
+        blocks.sort(key=lambda block: block["rank"])
+        return blocks
@@ -4,16 +4,25 @@ Handles PDF loading, text chunking, and embedding generation.
 """
 
 import os
+import json
+import time
+import bisect
 import hashlib
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
-import PyPDF2
-import openai
 from sentence_transformers import SentenceTransformer
 import numpy as np
 import redis
-import json
 from dotenv import load_dotenv
+from .index_snapshot import IndexSnapshot, SnapshotStore, new_index_version
+from .lexical_index import MAX_POSTINGS_PER_TERM
+from .chunking import StructuredChunker
+from .cache_codec import CacheCodec
+from .pdf_extraction import create_extractor
+from .embedding_batcher import EmbeddingBatcher
+from .near_duplicates import NearDuplicateIndex
+from .sharding import ShardClient, catalog_snapshot, fuse_shard_candidates, partition_documents, route_shards
 
 load_dotenv()
 
@@ -21,30 +30,79 @@ load_dotenv()
 class DocumentProcessor:
     """Handles document processing, chunking, and embedding generation."""
     
-    def __init__(self):
-        self.openai_client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-        self.redis_client = redis.Redis(
+    # Fingerprints used to be kept in this hash, which grew with every file ever seen
+    LEGACY_FINGERPRINTS_KEY = "ingestion:fingerprints"
+    # Past this share of rescored rows a binary shortlist costs about as much as an int8 scan
+    MAX_BINARY_RESCORE_FRACTION = 0.1
+    # Words per recall probe question, each drawn from a different indexed chunk
+    RECALL_PROBE_WORDS = 3
+    
+    def __init__(self, embedding_model=None):
+        # Any object with a SentenceTransformer-style encode() can be injected, e.g. for offline benchmarks
+        self.embedding_model = embedding_model or SentenceTransformer('all-MiniLM-L6-v2')
+        # Cached documents may be stored compressed, so they are read as bytes
+        self.binary_client = redis.Redis(
             host=os.getenv("REDIS_HOST", "localhost"),
             port=int(os.getenv("REDIS_PORT", 6379)),
-            db=int(os.getenv("REDIS_DB", 0)),
-            decode_responses=True
+            db=int(os.getenv("REDIS_DB", 0))
         )
+        self.cache_codec = CacheCodec()
+        self.pdf_extractor = create_extractor()
         self.max_chunk_size = int(os.getenv("MAX_CHUNK_SIZE", 1000))
         self.chunk_overlap = int(os.getenv("CHUNK_OVERLAP", 100))
+        # "structured" chunks along headings, tables and procedures within the embedding model's window
+        self.chunking_strategy = os.getenv("CHUNKING_STRATEGY", "fixed").lower()
+        # Leave room for the [CLS]/[SEP] tokens the model adds to every input
+        self.chunk_max_tokens = int(os.getenv("CHUNK_MAX_TOKENS", self.embedding_model.max_seq_length - 2))
+        # "hybrid" fuses BM25 keyword matches with the embedding ranking
+        self.retrieval_mode = os.getenv("RETRIEVAL_MODE", "dense").lower()
+        self.hybrid_candidates = int(os.getenv("HYBRID_CANDIDATES", 100))
+        self.rrf_k = int(os.getenv("RRF_K", 60))
+        # BM25 reads only the highest-weighted postings of very common query terms (0 reads all)
+        self.hybrid_max_postings = int(os.getenv("HYBRID_MAX_POSTINGS", MAX_POSTINGS_PER_TERM))
+        # Concurrent queries are embedded together; a batch size of 1 encodes each query on its own
+        batch_size = int(os.getenv("EMBEDDING_BATCH_SIZE", 32))
+        self.query_batcher = EmbeddingBatcher(
+            self.embedding_model,
+            max_batch_size=batch_size,
+            max_wait_ms=float(os.getenv("EMBEDDING_BATCH_WAIT_MS", 2))
+        ) if batch_size > 1 else None
+        # Near-duplicate chunks across manuals are stored and embedded once
+        self.dedup_threshold = (float(os.getenv("DEDUP_THRESHOLD", 0.9))
+                                if os.getenv("DEDUP_ENABLED", "false").lower() == "true" else None)
+        # "int8" or "binary" shortlists candidates on quantized codes and rescores them at full precision
+        self.quantization = os.getenv("INDEX_QUANTIZATION", "none").lower()
+        self.rescore_candidates = int(os.getenv("QUANTIZED_RESCORE_CANDIDATES",
+                                                400 if self.quantization == "binary" else 100))
+        # Hamming recall falls as the library grows, so binary shortlists scale with it
+        self.rescore_fraction = float(os.getenv("QUANTIZED_RESCORE_FRACTION",
+                                                0.05 if self.quantization == "binary" else 0.0))
+        # Binary codes are only served when they find this share of exact search's golden-set results
+        self.binary_min_recall = float(os.getenv("BINARY_MIN_RECALL", 0.9))
+        self.golden_set_path = os.getenv("GOLDEN_SET_PATH",
+                                         str(Path(__file__).resolve().parent.parent / "benchmarks" / "golden_set.json"))
+        self.snapshot_store = SnapshotStore()
+        # With INDEX_STORAGE=disk Redis is optional; without it nothing is cached
+        self.redis_enabled = self.snapshot_store.redis_enabled
+        # With shard URLs, documents are split across that many index shards and
+        # queries are sent to the shard services instead of a local index
+        shard_urls = [url.strip() for url in os.getenv("INDEX_SHARD_URLS", "").split(",") if url.strip()]
+        self.shard_client = ShardClient(
+            shard_urls,
+            deadline_ms=float(os.getenv("SHARD_DEADLINE_MS", 500)),
+            api_key=os.getenv("MANUALMIND_API_KEY")
+        ) if shard_urls else None
+        self._snapshot: Optional[IndexSnapshot] = None
+        self._snapshot_lock = threading.Lock()
+        self._listener_started = False
+    
+    def extract_pages_from_pdf(self, pdf_path: str) -> List[str]:
+        """Extract the text of each page of a PDF file; raises when the file cannot be read."""
+        return self.pdf_extractor.extract_pages(pdf_path)
     
     def extract_text_from_pdf(self, pdf_path: str) -> str:
         """Extract text content from PDF file."""
-        text = ""
-        try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-        except Exception as e:
-            print(f"Error extracting text from {pdf_path}: {e}")
-            return ""
-        return text
+        return "".join(page + "\n" for page in self.extract_pages_from_pdf(pdf_path))
     
     def chunk_text(self, text: str) -> List[str]:
         """Split text into overlapping chunks for better context preservation."""
@@ -76,35 +134,151 @@ class DocumentProcessor:
             
         return chunks
     
+    def count_tokens(self, text: str) -> int:
+        """Count tokens the way the embedding model sees them."""
+        return len(self.embedding_model.tokenizer.tokenize(text))
+    
+    def chunk_pages(self, pages: List[str]) -> List[Dict[str, Any]]:
+        """Chunk page texts with the configured strategy, keeping section and page metadata when available."""
+        if self.chunking_strategy == "structured":
+            chunker = StructuredChunker(max_tokens=self.chunk_max_tokens, count_tokens=self.count_tokens)
+            return chunker.chunk_pages(pages)
+        
+        text = "".join(page + "\n" for page in pages)
+        page_ends = []
+        offset = 0
+        for page in pages:
+            offset += len(page) + 1
+            page_ends.append(offset)
+        
+        # Fixed windows ignore page breaks, so locate each chunk to record the pages it spans
+        chunked = []
+        position = 0
+        for chunk in self.chunk_text(text):
+            start = text.find(chunk, position)
+            if start < 0:
+                chunked.append({"text": chunk})
+                continue
+            position = start
+            chunked.append({
+                "text": chunk,
+                "page_start": bisect.bisect_right(page_ends, start) + 1,
+                "page_end": bisect.bisect_right(page_ends, start + len(chunk) - 1) + 1
+            })
+        return chunked
+    
+    def chunking_signature(self) -> str:
+        """Identify the chunking configuration so cached documents are re-chunked when it changes."""
+        if self.chunking_strategy == "structured":
+            return f"structured-{self.chunk_max_tokens}"
+        return f"fixed-{self.max_chunk_size}-{self.chunk_overlap}"
+    
     def generate_embeddings(self, texts: List[str]) -> np.ndarray:
         """Generate embeddings for text chunks using sentence transformer."""
         return self.embedding_model.encode(texts)
     
-    def get_file_hash(self, file_path: str) -> str:
-        """Generate hash for file to check if it's already processed."""
+    def embed_chunks(self, chunks: List[str], duplicates: Optional[NearDuplicateIndex] = None,
+                     known: Optional[List[Optional[List[float]]]] = None) -> Tuple[np.ndarray, List[bool]]:
+        """Embed a document's chunks, reusing the embedding of near-duplicates seen earlier in the run.
+        
+        known holds embeddings already computed for this document, with None for
+        chunks still to embed. Returns the embeddings and, per chunk, whether its
+        embedding was computed for this document rather than copied.
+        """
+        vectors = list(known) if known else [None] * len(chunks)
+        computed = [vector is not None for vector in vectors]
+        signatures = [duplicates.signature(chunk) for chunk in chunks] if duplicates is not None else []
+        for i, signature in enumerate(signatures):
+            if vectors[i] is None:
+                vectors[i] = duplicates.find(signature)
+        
+        new = [i for i, vector in enumerate(vectors) if vector is None]
+        for i, embedding in zip(new, self.generate_embeddings([chunks[i] for i in new]) if new else []):
+            vectors[i] = embedding
+            computed[i] = True
+        # Only the document's own embeddings are offered to later documents
+        for i, signature in enumerate(signatures):
+            if computed[i] and duplicates.find(signature) is None:
+                duplicates.add(signature, vectors[i])
+        return np.asarray(vectors, dtype=np.float32), computed
+    
+    def embed_query(self, query: str) -> np.ndarray:
+        """Embed a single query, batched with any other queries arriving at the same time."""
+        if self.query_batcher:
+            return self.query_batcher.encode(query)
+        return self.embedding_model.encode([query])[0]
+    
+    def indexed_fingerprints(self) -> Dict[str, Dict[str, Any]]:
+        """Fingerprints of the files in the current index, by absolute path."""
+        snapshot = self.get_snapshot()
+        if not snapshot:
+            return {}
+        return {
+            file_info["fingerprint"]["path"]: file_info["fingerprint"]
+            for file_info in snapshot.files if file_info.get("fingerprint")
+        }
+    
+    def fingerprint_file(self, file_path: str,
+                         known: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Path, size, mtime and content hash of a file, to check if it's already processed.
+        
+        The file is streamed through BLAKE2b unless known (the fingerprints stored
+        in the index manifest) has it with the same size and mtime.
+        """
+        stat = os.stat(file_path)
+        fingerprint = {"path": os.path.abspath(file_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        previous = (known or {}).get(fingerprint["path"])
+        if previous and previous["size"] == stat.st_size and previous["mtime_ns"] == stat.st_mtime_ns:
+            return previous
+        
         with open(file_path, 'rb') as f:
-            return hashlib.md5(f.read()).hexdigest()
+            fingerprint["hash"] = hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16)).hexdigest()
+        return fingerprint
     
-    def process_document(self, file_path: str) -> Dict[str, Any]:
-        """Process a single document: extract text, chunk, and generate embeddings."""
-        file_hash = self.get_file_hash(file_path)
-        cache_key = f"doc:{file_hash}"
+    def process_document(self, file_path: str, duplicates: Optional[NearDuplicateIndex] = None,
+                         fingerprints: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Process a single document: extract text, chunk, and generate embeddings.
+        
+        Chunks that are near-duplicates of ones in duplicates copy their embedding
+        instead of being encoded again; the document's own chunks are added to it.
+        Copied embeddings are not cached, since they belong to another document.
+        fingerprints are the known file fingerprints passed to fingerprint_file.
+        """
+        fingerprint = self.fingerprint_file(file_path, fingerprints)
+        file_hash = fingerprint["hash"]
+        cache_key = f"doc:{file_hash}:{self.chunking_signature()}"
+        # Other extractors produce different text; the default keeps the existing cache keys
+        if self.pdf_extractor.name != "pypdf2":
+            cache_key += f":{self.pdf_extractor.name}"
         
         # Check if already processed
-        cached = self.redis_client.get(cache_key)
+        cached = self.cache_codec.get(self.binary_client, cache_key) if self.redis_enabled else None
         if cached:
-            return json.loads(cached)
+            # Chunks whose embedding was copied when the entry was cached have None
+            embeddings, computed = self.embed_chunks(cached["chunks"], duplicates, cached["embeddings"])
+            if self.redis_enabled and sum(computed) > sum(vector is not None for vector in cached["embeddings"]):
+                self._cache_document(cache_key, cached, embeddings, computed)
+            return {**cached, "embeddings": embeddings.tolist(), "fingerprint": fingerprint}
         
         # Extract text
-        text = self.extract_text_from_pdf(file_path)
-        if not text.strip():
+        try:
+            pages = self.extract_pages_from_pdf(file_path)
+        except Exception as e:
+            print(f"Error extracting text from {file_path} with {self.pdf_extractor.name}: {e}")
+            return {"error": f"Text extraction failed for {file_path}: {e}"}
+        if not "".join(pages).strip():
             return {"error": f"No text extracted from {file_path}"}
         
         # Chunk text
-        chunks = self.chunk_text(text)
+        chunked = self.chunk_pages(pages)
+        chunks = [chunk["text"] for chunk in chunked]
+        chunk_metadata = [
+            {key: value for key, value in chunk.items() if key != "text"}
+            for chunk in chunked
+        ]
         
         # Generate embeddings
-        embeddings = self.generate_embeddings(chunks)
+        embeddings, computed = self.embed_chunks(chunks, duplicates)
         
         # Prepare document data
         doc_data = {
@@ -112,67 +286,208 @@ class DocumentProcessor:
             "file_name": Path(file_path).name,
             "file_hash": file_hash,
             "chunks": chunks,
+            "chunk_metadata": chunk_metadata,
             "embeddings": embeddings.tolist(),  # Convert to list for JSON serialization
             "total_chunks": len(chunks)
         }
         
         # Cache the processed document
-        self.redis_client.setex(cache_key, 86400, json.dumps(doc_data))  # Cache for 24 hours
+        if self.redis_enabled:
+            self._cache_document(cache_key, doc_data, embeddings, computed)
         
+        # Stored in the index manifest, so the next run skips hashing this file if it is unchanged
+        doc_data["fingerprint"] = fingerprint
         return doc_data
     
+    def _cache_document(self, cache_key: str, doc_data: Dict[str, Any], embeddings: np.ndarray,
+                        computed: List[bool]):
+        """Cache a processed document with only the embeddings computed for it."""
+        own = [vector if is_own else None for vector, is_own in zip(embeddings.tolist(), computed)]
+        self.cache_codec.setex(self.binary_client, cache_key, 86400,  # Cache for 24 hours
+                               {**doc_data, "embeddings": own}, "doc")
+    
     def process_media_folder(self, media_path: str = "media") -> Dict[str, Any]:
         """Process all PDF files in the media folder."""
         if not os.path.exists(media_path):
             return {"error": f"Media folder {media_path} not found"}
         
+        started_at = time.time()
         results = {}
-        pdf_files = list(Path(media_path).glob("*.pdf"))
+        # Sorted so the same copy of shared boilerplate is kept on every run
+        pdf_files = sorted(Path(media_path).glob("*.pdf"))
+        duplicates = NearDuplicateIndex(self.dedup_threshold) if self.dedup_threshold else None
+        fingerprints = self.indexed_fingerprints()
         
         for pdf_file in pdf_files:
             print(f"Processing {pdf_file.name}...")
-            result = self.process_document(str(pdf_file))
+            result = self.process_document(str(pdf_file), duplicates, fingerprints)
             results[pdf_file.name] = result
         
-        # Store processed files list in Redis
-        self.redis_client.setex("processed_files", 86400, json.dumps(list(results.keys())))
+        # Publish every successfully processed document as one new index version
+        documents = [doc_data for doc_data in results.values() if "error" not in doc_data]
+        if self.shard_client:
+            snapshot = self.publish_shards(new_index_version(), documents)
+        else:
+            snapshot = IndexSnapshot.from_documents(new_index_version(), documents, self.quantization,
+                                                    self.dedup_threshold)
+            self.check_binary_recall(snapshot)
+        snapshot.stats.update(
+            ingestion_started_at=started_at,
+            ingestion_seconds=round(time.time() - started_at, 3),
+            failed_documents=len(results) - len(documents)
+        )
+        self.snapshot_store.publish(snapshot)
+        if self.redis_enabled:
+            self.binary_client.delete(self.LEGACY_FINGERPRINTS_KEY)
+        # Quantized search serves the stored copy, which leaves the float rows on disk or in Redis
+        if self.quantization in ("int8", "binary"):
+            snapshot = self.snapshot_store.load(snapshot.version) or snapshot
+        self._snapshot = snapshot
         
         return results
     
-    def find_similar_chunks(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
-        """Find the most similar text chunks to a query using vector similarity."""
-        # Generate query embedding
-        query_embedding = self.embedding_model.encode([query])
+    def publish_shards(self, version: str, documents: List[Dict[str, Any]]) -> IndexSnapshot:
+        """Publish one snapshot per index shard and return the catalog that lists them.
+        
+        The shards are published first, so the API switches to the new version
+        only after every shard service can load it.
+        """
+        shard_snapshots = []
+        for shard, shard_documents in enumerate(partition_documents(documents, len(self.shard_client.urls))):
+            shard_snapshot = IndexSnapshot.from_documents(version, shard_documents, self.quantization,
+                                                          self.dedup_threshold)
+            self.check_binary_recall(shard_snapshot)
+            SnapshotStore(shard=shard).publish(shard_snapshot)
+            shard_snapshots.append(shard_snapshot)
+        return catalog_snapshot(version, shard_snapshots)
+    
+    def check_binary_recall(self, snapshot: IndexSnapshot, top_k: int = 10, samples: int = 100):
+        """Size the binary shortlist so binary search finds binary_min_recall of exact search's top-k.
+        
+        The probe queries are the golden-set questions plus short questions made
+        of words from the indexed chunks, so the check grows with the library
+        instead of passing on a handful of questions. Starting from rescore_fraction, the
+        share of rows rescored doubles until recall is reached; the share is
+        recorded for searches of this snapshot. If reaching it takes more than
+        MAX_BINARY_RESCORE_FRACTION of the rows, binary saves nothing over int8
+        and the snapshot gets int8 codes instead.
+        """
+        if self.quantization != "binary" or not snapshot.chunks:
+            return
         
-        # Get all processed files
-        processed_files = self.redis_client.get("processed_files")
-        if not processed_files:
+        try:
+            with open(self.golden_set_path) as f:
+                questions = [entry["question"] for entry in json.load(f)["questions"]]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Cannot read golden set {self.golden_set_path}: {e}")
+            questions = []
+        # Probe questions mix words from several sampled chunks, like a question that
+        # no single chunk answers verbatim; the seed keeps them the same on every publish
+        rng = np.random.default_rng(0)
+        for _ in range(samples):
+            rows = rng.integers(len(snapshot.chunks), size=self.RECALL_PROBE_WORDS)
+            words = [snapshot.chunks[row].split() or [""] for row in rows]
+            questions.append(" ".join(chunk_words[rng.integers(len(chunk_words))] for chunk_words in words))
+        probes = self.generate_embeddings(questions)
+        exact = [{(r["file_name"], r["chunk_index"]) for r in snapshot.search(probe, top_k)} for probe in probes]
+        expected = max(sum(len(results) for results in exact), 1)
+        
+        fraction = max(self.rescore_fraction, self.rescore_candidates / len(snapshot.embeddings),
+                       1 / len(snapshot.embeddings))
+        while True:
+            found = 0
+            for probe, results in zip(probes, exact):
+                binary = snapshot.search(probe, top_k, quantization="binary",
+                                         rescore_candidates=self.rescore_candidates, rescore_fraction=fraction)
+                found += len(results & {(r["file_name"], r["chunk_index"]) for r in binary})
+            recall = round(found / expected, 4)
+            if recall >= self.binary_min_recall or fraction >= self.MAX_BINARY_RESCORE_FRACTION:
+                break
+            fraction = min(fraction * 2, self.MAX_BINARY_RESCORE_FRACTION)
+        
+        snapshot.stats.update(binary_recall=recall, binary_rescore_fraction=round(fraction, 4))
+        if recall < self.binary_min_recall:
+            print(f"Binary search recall {recall} is below BINARY_MIN_RECALL={self.binary_min_recall} even "
+                  f"rescoring {fraction:.0%} of the chunks, serving int8 codes instead")
+            snapshot.stats["binary_fallback"] = "int8"
+            snapshot.int8_index()
+    
+    def _load_snapshot(self, version: Optional[str] = None):
+        """Load a snapshot version and swap it in once it is fully read."""
+        with self._snapshot_lock:
+            if self._snapshot and self._snapshot.version == version:
+                return
+            snapshot = self.snapshot_store.load(version)
+            if snapshot:
+                self._snapshot = snapshot
+    
+    def use_snapshot(self, snapshot: IndexSnapshot):
+        """Serve queries from the given snapshot instead of following published versions."""
+        self._listener_started = True
+        self._snapshot = snapshot
+    
+    def get_snapshot(self) -> Optional[IndexSnapshot]:
+        """Return the in-memory index, reloading it in the background when a new version is published."""
+        if not self._listener_started:
+            self._listener_started = True
+            self.snapshot_store.start_listener(self._load_snapshot)
+        
+        if self._snapshot is None:
+            self._load_snapshot()
+        return self._snapshot
+    
+    def index_version(self) -> Optional[str]:
+        """Version of the index queries are currently answered from."""
+        snapshot = self.get_snapshot()
+        return snapshot.version if snapshot else None
+    
+    def find_similar_chunks(self, query: str, top_k: int = 5,
+                            filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Find the most similar text chunks to a query, optionally within matching manuals only."""
+        snapshot = self.get_snapshot()
+        if not snapshot:
             return []
         
-        processed_files = json.loads(processed_files)
-        all_similarities = []
-        
-        for file_name in processed_files:
-            # Find the document by file name
-            for key in self.redis_client.scan_iter(match="doc:*"):
-                doc_data = json.loads(self.redis_client.get(key))
-                if doc_data.get("file_name") == file_name:
-                    embeddings = np.array(doc_data["embeddings"])
-                    chunks = doc_data["chunks"]
-                    
-                    # Calculate cosine similarity
-                    similarities = np.dot(query_embedding, embeddings.T).flatten()
-                    
-                    for i, similarity in enumerate(similarities):
-                        all_similarities.append({
-                            "file_name": file_name,
-                            "chunk_index": i,
-                            "chunk_text": chunks[i],
-                            "similarity": float(similarity),
-                            "file_path": doc_data.get("file_path", "")
-                        })
-                    break
-        
-        # Sort by similarity and return top_k
-        all_similarities.sort(key=lambda x: x["similarity"], reverse=True)
-        return all_similarities[:top_k]
\ No newline at end of file
+        # Generate query embedding
+        query_embedding = self.embed_query(query)
+        
+        if self.shard_client:
+            return self.search_shards(snapshot, query, query_embedding, top_k, filters)
+        if self.retrieval_mode == "hybrid":
+            return snapshot.hybrid_search(query, query_embedding, top_k,
+                                          candidates=max(self.hybrid_candidates, top_k), rrf_k=self.rrf_k,
+                                          filters=filters, quantization=self.quantization,
+                                          rescore_candidates=self.rescore_candidates,
+                                          rescore_fraction=self.rescore_fraction,
+                                          max_postings=self.hybrid_max_postings)
+        return snapshot.search(query_embedding, top_k, filters, quantization=self.quantization,
+                               rescore_candidates=self.rescore_candidates, rescore_fraction=self.rescore_fraction)
+    
+    def search_shards(self, catalog: IndexSnapshot, query: str, query_embedding: np.ndarray, top_k: int,
+                      filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Search the shards holding matching manuals in parallel and merge their results.
+
+        Dense results are merged by similarity. Hybrid results are fused once
+        over the merged dense and BM25 rankings of every shard's candidates.
+        """
+        payload = {
+            # Shards answering from another version than the catalog's are left out
+            "version": catalog.version,
+            "query": query,
+            "embedding": np.asarray(query_embedding, dtype=np.float32).tolist(),
+            "top_k": top_k,
+            "filters": filters,
+            "retrieval_mode": self.retrieval_mode,
+            "quantization": self.quantization,
+            "rescore_candidates": self.rescore_candidates,
+            "rescore_fraction": self.rescore_fraction,
+            "hybrid_candidates": self.hybrid_candidates,
+            "hybrid_max_postings": self.hybrid_max_postings
+        }
+        shards = route_shards(catalog, len(self.shard_client.urls), filters)
+        if self.retrieval_mode == "hybrid":
+            # Shards return raw dense and BM25 candidates; RRF ranks are only meaningful over the merged lists
+            results, _ = self.shard_client.gather(payload, shards)
+            return fuse_shard_candidates(results, max(self.hybrid_candidates, top_k), top_k, self.rrf_k)
+        results, _ = self.shard_client.search(payload, shards)
+        return results
@@ -0,0 +1,88 @@
+"""
+Query embedding micro-batching for ManualMind.
+Concurrent queries each need one short text encoded; a single background thread
+collects the pending texts and runs them through the model as one batch, then
+hands every caller its own vector.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Tuple
+import numpy as np
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent single-text encode calls into batched model calls.
+
+    While the model is busy, new requests queue up and form the next batch, so
+    batches grow with load. After the first request of a batch, the batcher
+    also waits up to max_wait_ms for more, unless max_batch_size is reached.
+    """
+
+    def __init__(self, model, max_batch_size: int = 32, max_wait_ms: float = 2.0):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        # Counters for the mean batch size reported by stats()
+        self.batches = 0
+        self.texts = 0
+
+    def encode(self, text: str) -> np.ndarray:
+        """Embed one text; blocks until the batch it joined has been encoded."""
+        self._ensure_started()
+        future: Future = Future()
+        self._pending.put((text, future))
+        return future.result()
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                    self._thread.start()
+
+    def _collect(self) -> List[Tuple[str, Future]]:
+        batch = [self._pending.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                # Whatever queued up while the previous batch ran is taken without waiting
+                batch.append(self._pending.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                vectors = self.model.encode([text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.texts += len(batch)
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "mean_batch_size": round(self.texts / self.batches, 2) if self.batches else 0.0
+        }
@@ -0,0 +1,830 @@
+"""
+Versioned index snapshots for ManualMind.
+Holds the searchable corpus as one immutable object per published version and
+handles atomic publishing and background reloading through Redis.
+"""
+
+import os
+import json
+import mmap
+import time
+import uuid
+import zlib
+import shutil
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable, Sequence, Tuple
+import numpy as np
+import redis
+from redis.backoff import NoBackoff
+from redis.retry import Retry
+from dotenv import load_dotenv
+from .lexical_index import MAX_POSTINGS_PER_TERM, BM25Index, reciprocal_rank_fusion, top_k_rows
+from .manual_metadata import parse_manual_name, matches_filters
+from .quantization import quantize_int8, int8_scores, binary_thresholds, quantize_binary, hamming_scores
+from .near_duplicates import NearDuplicateIndex
+from .cache_codec import CacheCodec
+
+load_dotenv()
+
+
+def new_index_version() -> str:
+    """Create a sortable, unique index version identifier."""
+    return f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+def redis_reachable(**redis_config) -> bool:
+    """Ping Redis once, without the client's retries, for components that can run without it."""
+    client = redis.Redis(socket_connect_timeout=2, retry=Retry(NoBackoff(), 0), **redis_config)
+    try:
+        return bool(client.ping())
+    except redis.RedisError:
+        return False
+    finally:
+        client.close()
+
+
+def merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Sort row ranges and join the ones that overlap or touch."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def load_mapped(path: Path) -> np.ndarray:
+    """Memory-map a .npy file, reading it normally when it is too small to map."""
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError:
+        # Zero-length arrays cannot be mapped
+        return np.load(path)
+
+
+class MappedTexts(Sequence):
+    """Chunk texts read lazily from a memory-mapped UTF-8 blob and an offsets array."""
+
+    def __init__(self, texts_path: Path, offsets: np.ndarray):
+        self.offsets = offsets
+        self._file = open(texts_path, "rb")
+        # mmap refuses empty files, and an empty corpus has nothing to read anyway
+        self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if offsets[-1] else b""
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("chunk index out of range")
+        return self._buffer[self.offsets[index]:self.offsets[index + 1]].decode("utf-8")
+
+
+class RedisRows:
+    """Embedding matrix left in Redis, fetching only the rows a search rescores.
+
+    Quantized search scans the codes and only needs a shortlist of float rows,
+    so the full-precision matrix is not loaded into every API process.
+    """
+
+    def __init__(self, client: redis.Redis, key: str, dtype: str, shape: Sequence[int]):
+        self.client = client
+        self.key = key
+        self.dtype = np.dtype(dtype)
+        self.shape = tuple(shape)
+        self.size = int(np.prod(self.shape))
+        self.row_bytes = self.shape[1] * self.dtype.itemsize
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def _rows(self, data: bytes, count: int) -> np.ndarray:
+        if len(data) != count * self.row_bytes:
+            raise KeyError(f"{self.key} was pruned or is incomplete")
+        return np.frombuffer(data, dtype=self.dtype).reshape(count, self.shape[1])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("only contiguous row slices are supported")
+            if stop <= start:
+                return np.zeros((0, self.shape[1]), dtype=self.dtype)
+            # GETRANGE end offsets are inclusive
+            data = self.client.getrange(self.key, start * self.row_bytes, stop * self.row_bytes - 1)
+            return self._rows(data, stop - start)
+        if np.ndim(index) == 0:
+            return self[[index]][0]
+
+        rows = np.asarray(index, dtype=np.int64)
+        pipe = self.client.pipeline(transaction=False)
+        for row in rows % len(self) if len(self) else rows:
+            pipe.getrange(self.key, int(row) * self.row_bytes, (int(row) + 1) * self.row_bytes - 1)
+        return self._rows(b"".join(pipe.execute()), len(rows))
+
+
+class IndexSnapshot:
+    """Immutable, fully loaded view of one published index version."""
+
+    def __init__(self, version: str, files: List[Dict[str, Any]], chunks: List[str],
+                 embeddings: np.ndarray, created_at: Optional[float] = None,
+                 sections: Optional[List[str]] = None, section_ids: Optional[np.ndarray] = None,
+                 pages: Optional[np.ndarray] = None, lexical: Optional[BM25Index] = None,
+                 int8_codes: Optional[np.ndarray] = None, int8_scales: Optional[np.ndarray] = None,
+                 binary_codes: Optional[np.ndarray] = None, binary_thresholds: Optional[np.ndarray] = None,
+                 stats: Optional[Dict[str, Any]] = None, chunk_positions: Optional[np.ndarray] = None,
+                 duplicates: Optional[np.ndarray] = None):
+        self.version = version
+        # Each file entry covers the embedding rows [start, end)
+        self.files = files
+        self.chunks = chunks
+        self.embeddings = embeddings
+        self.created_at = created_at or time.time()
+
+        # Chunk metadata is kept columnar: a section title table plus one id and
+        # one (first, last) page pair per row, with -1 / 0 meaning unknown
+        self.sections = sections or []
+        self.section_ids = section_ids if section_ids is not None else np.full(len(chunks), -1, dtype=np.int32)
+        self.pages = pages if pages is not None else np.zeros((len(chunks), 2), dtype=np.int32)
+        self.lexical = lexical
+        # With deduplication a file's rows skip the chunks stored elsewhere, so each
+        # row keeps its chunk number within its own file. Every skipped copy is one
+        # duplicates row: (stored row, file index, chunk number, first page, last page)
+        self.chunk_positions = chunk_positions
+        self.duplicates = duplicates if duplicates is not None else np.zeros((0, 5), dtype=np.int32)
+        # Optional compact copies of the embeddings used to shortlist candidates
+        self.int8_codes = int8_codes
+        self.int8_scales = int8_scales
+        self.binary_codes = binary_codes
+        self.binary_thresholds = binary_thresholds
+        # Ingestion and size figures recorded when the snapshot was published, served by /status
+        self.stats = stats or {}
+
+        self.row_files = np.zeros(len(chunks), dtype=np.int32)
+        for file_index, file_info in enumerate(files):
+            self.row_files[file_info["start"]:file_info["end"]] = file_index
+            # Older manifests predate filter metadata
+            if "instrument" not in file_info:
+                file_info.update(parse_manual_name(file_info["file_name"]))
+
+    @classmethod
+    def from_documents(cls, version: str, documents: List[Dict[str, Any]],
+                       quantization: Optional[str] = None,
+                       dedup_threshold: Optional[float] = None) -> "IndexSnapshot":
+        """Build a snapshot from processed document data, with codes for the given quantization ("int8" or "binary").
+
+        With a dedup_threshold, a chunk whose estimated shingle Jaccard similarity
+        to an earlier chunk reaches the threshold is stored once, under the
+        earlier chunk, and recorded as a reference back to its own file and pages.
+        """
+        files = []
+        chunks = []
+        embeddings = []
+        sections = {}
+        section_ids = []
+        pages = []
+        chunk_positions = []
+        duplicates = []
+        seen = NearDuplicateIndex(dedup_threshold) if dedup_threshold else None
+
+        for file_index, doc_data in enumerate(documents):
+            start = len(chunks)
+            doc_embeddings = np.asarray(doc_data["embeddings"], dtype=np.float32)
+            kept = []
+
+            chunk_metadata = doc_data.get("chunk_metadata") or [{}] * len(doc_data["chunks"])
+            for position, (text, metadata) in enumerate(zip(doc_data["chunks"], chunk_metadata)):
+                page_span = (metadata.get("page_start", 0), metadata.get("page_end", 0))
+                if seen is not None:
+                    signature = seen.signature(text)
+                    row = seen.find(signature)
+                    if row is not None:
+                        duplicates.append((row, file_index, position, *page_span))
+                        continue
+                    seen.add(signature, len(chunks))
+
+                kept.append(position)
+                chunks.append(text)
+                chunk_positions.append(position)
+                section = metadata.get("section")
+                section_ids.append(sections.setdefault(section, len(sections)) if section else -1)
+                pages.append(page_span)
+            embeddings.append(doc_embeddings[kept] if seen is not None else doc_embeddings)
+            files.append({
+                "file_name": doc_data["file_name"],
+                "file_path": doc_data.get("file_path", ""),
+                "file_hash": doc_data.get("file_hash", ""),
+                # Path, size and mtime the file had when it was hashed
+                "fingerprint": doc_data.get("fingerprint"),
+                "start": start,
+                "end": len(chunks),
+                **parse_manual_name(doc_data["file_name"])
+            })
+
+        matrix = np.vstack(embeddings) if embeddings else np.zeros((0, 0), dtype=np.float32)
+        snapshot = cls(version, files, chunks, matrix,
+                       sections=list(sections),
+                       section_ids=np.asarray(section_ids, dtype=np.int32),
+                       pages=np.asarray(pages, dtype=np.int32).reshape(-1, 2),
+                       lexical=BM25Index.build(chunks),
+                       chunk_positions=np.asarray(chunk_positions, dtype=np.int32) if seen is not None else None,
+                       duplicates=np.asarray(duplicates, dtype=np.int32).reshape(-1, 5))
+        if seen is not None:
+            snapshot.stats["duplicate_chunks"] = len(duplicates)
+        if quantization == "int8":
+            snapshot.int8_index()
+        elif quantization == "binary":
+            snapshot.binary_index()
+        return snapshot
+
+    @classmethod
+    def from_stored(cls, manifest: Dict[str, Any], chunks: Sequence[str],
+                    arrays: Dict[str, np.ndarray]) -> "IndexSnapshot":
+        """Rebuild a snapshot from its stored manifest, chunk texts and named arrays."""
+        lexical = BM25Index.from_arrays(manifest.get("lexicon", []), arrays, len(chunks))
+        return cls(
+            manifest["version"], manifest["files"], chunks, arrays["embeddings"], manifest["created_at"],
+            sections=manifest.get("sections"),
+            section_ids=arrays.get("section_ids"),
+            pages=arrays.get("pages"),
+            lexical=lexical,
+            int8_codes=arrays.get("int8_codes"),
+            int8_scales=arrays.get("int8_scales"),
+            binary_codes=arrays.get("binary_codes"),
+            binary_thresholds=arrays.get("binary_thresholds"),
+            stats=manifest.get("stats"),
+            chunk_positions=arrays.get("chunk_positions"),
+            duplicates=arrays.get("duplicates")
+        )
+
+    @property
+    def file_names(self) -> List[str]:
+        return [file_info["file_name"] for file_info in self.files]
+
+    def manifest(self) -> Dict[str, Any]:
+        """Describe the snapshot without its chunk texts or vectors."""
+        return {
+            "version": self.version,
+            "created_at": self.created_at,
+            "files": self.files,
+            "total_chunks": len(self.chunks),
+            "dimensions": int(self.embeddings.shape[1]) if self.embeddings.size else 0,
+            "sections": self.sections,
+            "lexicon": self.lexical.terms if self.lexical else [],
+            "stats": self.stats
+        }
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Every per-row or postings array that makes up the snapshot, by storage name."""
+        arrays = {
+            "embeddings": self.embeddings,
+            "section_ids": self.section_ids,
+            "pages": self.pages
+        }
+        if self.lexical:
+            arrays.update(self.lexical.arrays())
+        if self.int8_codes is not None:
+            arrays["int8_codes"] = self.int8_codes
+            arrays["int8_scales"] = self.int8_scales
+        if self.binary_codes is not None:
+            arrays["binary_codes"] = self.binary_codes
+            arrays["binary_thresholds"] = self.binary_thresholds
+        if self.chunk_positions is not None:
+            arrays["chunk_positions"] = self.chunk_positions
+        if len(self.duplicates):
+            arrays["duplicates"] = self.duplicates
+        return arrays
+
+    def int8_index(self) -> Tuple[np.ndarray, np.ndarray]:
+        """int8 codes and per-dimension scales, quantized on first use if the snapshot was stored without them."""
+        if self.int8_codes is None:
+            self.int8_codes, self.int8_scales = quantize_int8(self.embeddings)
+        return self.int8_codes, self.int8_scales
+
+    def binary_index(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Bits packed into uint64 words and their per-dimension thresholds, computed on first use if needed."""
+        if self.binary_codes is None:
+            self.binary_thresholds = binary_thresholds(self.embeddings)
+            self.binary_codes = quantize_binary(self.embeddings, self.binary_thresholds)
+        return self.binary_codes, self.binary_thresholds
+
+    def row_ranges(self, filters: Optional[Dict[str, Any]] = None) -> Optional[List[Tuple[int, int]]]:
+        """Embedding row ranges of the files matching the filters, or None when unfiltered.
+
+        Rows stored under another file are included when a matching file has a
+        duplicate of them.
+        """
+        if not filters or not any(filters.values()):
+            return None
+        matching = [index for index, file_info in enumerate(self.files) if matches_filters(file_info, filters)]
+        ranges = [
+            (self.files[index]["start"], self.files[index]["end"])
+            for index in matching
+            if self.files[index]["end"] > self.files[index]["start"]
+        ]
+        if len(self.duplicates):
+            shared = np.unique(self.duplicates[np.isin(self.duplicates[:, 1], matching), 0])
+            ranges = merge_ranges(ranges + [(int(row), int(row) + 1) for row in shared])
+        return ranges
+
+    def dense_scores(self, query_embedding: np.ndarray, ranges: Optional[List[Tuple[int, int]]] = None,
+                     block_rows: int = 4096) -> np.ndarray:
+        """Dot product of the query with every chunk embedding, or only with the given row ranges."""
+        query = np.asarray(query_embedding, dtype=np.float32).ravel()
+        if ranges is None:
+            ranges = [(0, len(self.embeddings))]
+
+        # Only the slices of the matrix that belong to the selected files are touched.
+        # Half-precision matrices are upcast block by block so scoring never
+        # materialises a float32 copy of the whole (memory-mapped) matrix; small
+        # blocks keep each upcast copy in cache, which makes the cast much cheaper.
+        parts = []
+        for range_start, range_end in ranges:
+            for start in range(range_start, range_end, block_rows):
+                block = self.embeddings[start:min(start + block_rows, range_end)]
+                if block.dtype != np.float32:
+                    block = block.astype(np.float32)
+                parts.append(block @ query)
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+
+    def range_rows(self, ranges: Optional[List[Tuple[int, int]]]) -> np.ndarray:
+        """Absolute row numbers covered by the ranges, in the order dense_scores returns them."""
+        if ranges is None:
+            return np.arange(len(self.chunks))
+        if not ranges:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate([np.arange(start, end) for start, end in ranges])
+
+    def chunk_result(self, row: int, similarity: float,
+                     filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Describe a single chunk the way find_similar_chunks reports it.
+
+        A deduplicated chunk lists its other files under also_in. With filters,
+        the chunk is reported from a file that matches them.
+        """
+        file_index = int(self.row_files[row])
+        position = (int(self.chunk_positions[row]) if self.chunk_positions is not None
+                    else int(row - self.files[file_index]["start"]))
+        sources = [(file_index, position, int(self.pages[row][0]), int(self.pages[row][1]))]
+        if len(self.duplicates):
+            sources.extend(tuple(int(value) for value in reference[1:])
+                           for reference in self.duplicates[self.duplicates[:, 0] == row])
+            if len(sources) > 1 and filters and any(filters.values()):
+                sources.sort(key=lambda source: not matches_filters(self.files[source[0]], filters))
+
+        (file_index, position, page_start, page_end), others = sources[0], sources[1:]
+        file_info = self.files[file_index]
+        result = {
+            "file_name": file_info["file_name"],
+            "chunk_index": position,
+            "chunk_text": self.chunks[row],
+            "similarity": float(similarity),
+            "file_path": file_info["file_path"]
+        }
+        if self.section_ids[row] >= 0:
+            result["section"] = self.sections[self.section_ids[row]]
+        if page_start:
+            result["page_start"] = page_start
+            result["page_end"] = page_end
+        if others:
+            result["also_in"] = []
+            for other_index, _, other_start, other_end in others:
+                source = {"file_name": self.files[other_index]["file_name"]}
+                if other_start:
+                    source["page_start"] = other_start
+                    source["page_end"] = other_end
+                result["also_in"].append(source)
+        return result
+
+    def exact_scores(self, rows: np.ndarray, query_embedding: np.ndarray) -> np.ndarray:
+        """Full-precision scores of a few rows, e.g. a shortlist taken from quantized scores."""
+        query = np.asarray(query_embedding, dtype=np.float32).ravel()
+        return np.asarray(self.embeddings[rows], dtype=np.float32) @ query
+
+    def dense_ranking(self, query_embedding: np.ndarray, ranges: Optional[List[Tuple[int, int]]],
+                      rows: np.ndarray, count: int, quantization: Optional[str] = None,
+                      rescore_candidates: int = 100,
+                      rescore_fraction: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+        """Positions (into rows) of the best count chunks by embedding score, with their exact scores.
+
+        With int8 or binary quantization the codes pick a shortlist of
+        rescore_candidates rows, or rescore_fraction of the searched rows if
+        that is more, which is then re-ranked against the full-precision
+        vectors. Binary codes rank by Hamming distance, whose recall falls as
+        the library grows, so their shortlist has to grow with it; publishing
+        records the share that reaches BINARY_MIN_RECALL, used when it is more.
+        """
+        if quantization == "binary" and self.stats.get("binary_fallback"):
+            # Publishing measured binary recall below BINARY_MIN_RECALL at any shortlist size
+            quantization = self.stats["binary_fallback"]
+            rescore_fraction = 0.0
+        elif quantization == "binary":
+            # The shortlist share publishing found to reach BINARY_MIN_RECALL
+            rescore_fraction = max(rescore_fraction, self.stats.get("binary_rescore_fraction", 0.0))
+        if quantization == "int8" and self.stats.get("int8_fallback"):
+            # Published below INT8_MIN_CHUNKS, where the float matrix scores faster
+            quantization = None
+        if quantization in ("int8", "binary"):
+            if quantization == "int8":
+                codes, scales = self.int8_index()
+                approximate = int8_scores(codes, scales, query_embedding, ranges)
+            else:
+                codes, thresholds = self.binary_index()
+                approximate = hamming_scores(codes, thresholds, query_embedding, ranges)
+            shortlist = top_k_rows(approximate, max(count, rescore_candidates,
+                                                    int(np.ceil(rescore_fraction * len(approximate)))))
+            exact = self.exact_scores(rows[shortlist], query_embedding)
+            order = np.argsort(-exact, kind="stable")[:count]
+            return shortlist[order], exact[order]
+
+        scores = self.dense_scores(query_embedding, ranges)
+        picks = top_k_rows(scores, count)
+        return picks, scores[picks]
+
+    def search(self, query_embedding: np.ndarray, top_k: int = 5,
+               filters: Optional[Dict[str, Any]] = None, quantization: Optional[str] = None,
+               rescore_candidates: int = 100, rescore_fraction: float = 0.0) -> List[Dict[str, Any]]:
+        """Score chunks against the query embedding and return the best matches."""
+        ranges = self.row_ranges(filters)
+        if not self.chunks or ranges == []:
+            return []
+
+        rows = self.range_rows(ranges)
+        picks, scores = self.dense_ranking(query_embedding, ranges, rows, top_k, quantization, rescore_candidates,
+                                           rescore_fraction)
+        return [self.chunk_result(rows[pick], score, filters) for pick, score in zip(picks, scores)]
+
+    def hybrid_rankings(self, query: str, query_embedding: np.ndarray, ranges: Optional[List[Tuple[int, int]]],
+                        rows: np.ndarray, candidates: int, quantization: Optional[str] = None,
+                        rescore_candidates: int = 100, rescore_fraction: float = 0.0,
+                        max_postings: int = MAX_POSTINGS_PER_TERM
+                        ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Dense and BM25 positions (into rows) of the best candidates, best first, with their raw scores."""
+        dense_picks, dense_scores = self.dense_ranking(query_embedding, ranges, rows, candidates, quantization,
+                                                       rescore_candidates, rescore_fraction)
+        if ranges is None:
+            lexical_picks, lexical_scores = self.lexical.top_docs(query, candidates, max_postings)
+        else:
+            # Filtered searches score only the matching manuals' rows, so every posting is read
+            lexical = self.lexical.scores(query)[rows]
+            # Rows without a single matching term carry no lexical evidence
+            matched = np.flatnonzero(lexical)
+            lexical_picks = matched[top_k_rows(lexical[matched], candidates)]
+            lexical_scores = lexical[lexical_picks]
+        return dense_picks, dense_scores, lexical_picks, lexical_scores
+
+    def hybrid_candidates(self, query: str, query_embedding: np.ndarray, candidates: int = 100,
+                          filters: Optional[Dict[str, Any]] = None, quantization: Optional[str] = None,
+                          rescore_candidates: int = 100, rescore_fraction: float = 0.0,
+                          max_postings: int = MAX_POSTINGS_PER_TERM) -> List[Dict[str, Any]]:
+        """Chunks in the dense or BM25 top candidates, unfused, for merging with other shards.
+
+        Each chunk carries its cosine similarity, plus dense_score if it made
+        the dense ranking and bm25_score if it made the BM25 ranking.
+        """
+        ranges = self.row_ranges(filters)
+        if not self.chunks or ranges == []:
+            return []
+
+        rows = self.range_rows(ranges)
+        if not self.lexical:
+            dense_picks, dense_scores = self.dense_ranking(query_embedding, ranges, rows, candidates, quantization,
+                                                           rescore_candidates, rescore_fraction)
+            lexical_picks, lexical_scores = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        else:
+            dense_picks, dense_scores, lexical_picks, lexical_scores = self.hybrid_rankings(
+                query, query_embedding, ranges, rows, candidates, quantization,
+                rescore_candidates, rescore_fraction, max_postings)
+
+        scores = {int(pick): {"dense_score": float(score)} for pick, score in zip(dense_picks, dense_scores)}
+        for pick, score in zip(lexical_picks, lexical_scores):
+            scores.setdefault(int(pick), {})["bm25_score"] = float(score)
+        if not scores:
+            return []
+        picks = np.array(list(scores))
+        similarities = self.exact_scores(rows[picks], query_embedding)
+        return [{**self.chunk_result(rows[pick], similarity, filters), **scores[int(pick)]}
+                for pick, similarity in zip(picks, similarities)]
+
+    def hybrid_search(self, query: str, query_embedding: np.ndarray, top_k: int = 5,
+                      candidates: int = 100, rrf_k: int = 60,
+                      filters: Optional[Dict[str, Any]] = None, quantization: Optional[str] = None,
+                      rescore_candidates: int = 100, rescore_fraction: float = 0.0,
+                      max_postings: int = MAX_POSTINGS_PER_TERM) -> List[Dict[str, Any]]:
+        """Fuse dense and BM25 rankings with reciprocal rank fusion.
+
+        Unfiltered, BM25 first tries candidates from the best max_postings
+        postings of each very common query term (0 reads them all); see
+        BM25Index.top_docs.
+        """
+        ranges = self.row_ranges(filters)
+        if not self.chunks or ranges == []:
+            return []
+        if not self.lexical:
+            return self.search(query_embedding, top_k, filters, quantization, rescore_candidates, rescore_fraction)
+
+        rows = self.range_rows(ranges)
+        dense_picks, _, lexical_picks, _ = self.hybrid_rankings(query, query_embedding, ranges, rows, candidates,
+                                                                quantization, rescore_candidates, rescore_fraction,
+                                                                max_postings)
+        fused = reciprocal_rank_fusion([dense_picks, lexical_picks], k=rrf_k)[:top_k]
+        if not fused:
+            return []
+        # similarity stays the cosine score so confidence levels keep their meaning
+        picks = np.array([pick for pick, _ in fused])
+        similarities = self.exact_scores(rows[picks], query_embedding)
+        results = []
+        for (pick, fused_score), similarity in zip(fused, similarities):
+            result = self.chunk_result(rows[pick], similarity, filters)
+            result["fused_score"] = fused_score
+            results.append(result)
+        return results
+
+
+class SnapshotStore:
+    """Publishes and loads index snapshots stored in Redis or as memory-mapped files.
+
+    With a shard number, the store handles that shard of a sharded index. The
+    shard gets its own pointer, version list, update channel and directory.
+    """
+
+    def __init__(self, shard: Optional[int] = None):
+        redis_config = {
+            "host": os.getenv("REDIS_HOST", "localhost"),
+            "port": int(os.getenv("REDIS_PORT", 6379)),
+            "db": int(os.getenv("REDIS_DB", 0))
+        }
+        self.redis_client = redis.Redis(decode_responses=True, **redis_config)
+        # Embedding matrices are stored as raw bytes
+        self.binary_client = redis.Redis(decode_responses=False, **redis_config)
+        # Chunk texts in Redis are compressed like cache payloads (CACHE_COMPRESSION)
+        self.codec = CacheCodec()
+        # Older versions are kept so readers mid-reload can still finish
+        self.keep_versions = max(2, int(os.getenv("INDEX_KEEP_VERSIONS", 2)))
+        self.poll_interval = int(os.getenv("INDEX_POLL_INTERVAL", 30))
+
+        # "disk" writes an mmap-able snapshot that every worker shares through the page cache
+        self.storage = os.getenv("INDEX_STORAGE", "redis").lower()
+        self.index_dir = Path(os.getenv("INDEX_DIR", "index"))
+        self.dtype = np.float16 if os.getenv("INDEX_DTYPE", "float32").lower() == "float16" else np.float32
+        # With quantized search the codes are scanned and only shortlisted float rows are read
+        self.quantization = os.getenv("INDEX_QUANTIZATION", "none").lower()
+        # Below this many chunks the float matrix stays in cache and scores faster than int8 codes
+        self.int8_min_chunks = int(os.getenv("INT8_MIN_CHUNKS", 80000))
+
+        self.shard = shard
+        self.namespace = "index" if shard is None else f"index:shard:{shard}"
+        if shard is not None:
+            self.index_dir = self.index_dir / f"shard-{shard}"
+        self.current_key = f"{self.namespace}:current"
+        self.versions_key = f"{self.namespace}:versions"
+        self.updates_channel = f"{self.namespace}:updates"
+        # A disk index needs no Redis: CURRENT is the pointer readers poll, and the
+        # version list, update channel and processed_files are skipped without it
+        self.redis_enabled = self.storage != "disk" or redis_reachable(**redis_config)
+        if not self.redis_enabled:
+            print(f"Redis unavailable, index versions are read from {self.index_dir / 'CURRENT'} only")
+
+    def _key(self, version: str, part: str) -> str:
+        return f"{self.namespace}:{version}:{part}"
+
+    def current_version(self) -> Optional[str]:
+        """Return the version the pointer currently names."""
+        if self.storage == "disk":
+            current_file = self.index_dir / "CURRENT"
+            return current_file.read_text().strip() if current_file.exists() else None
+        return self.redis_client.get(self.current_key)
+
+    def publish(self, snapshot: IndexSnapshot):
+        """Write a snapshot under its own version and atomically make it current."""
+        # Readers rescore from the stored codes instead of loading the float rows
+        serves_int8 = self.quantization == "int8" or snapshot.stats.get("binary_fallback") == "int8"
+        if serves_int8 and len(snapshot.embeddings) < self.int8_min_chunks:
+            snapshot.stats["int8_fallback"] = "none"
+            snapshot.int8_codes = snapshot.int8_scales = None
+        elif self.quantization == "int8":
+            snapshot.int8_index()
+        elif self.quantization == "binary":
+            snapshot.binary_index()
+
+        # Figures already set are kept, e.g. the shard totals of a sharded index's catalog
+        snapshot.stats = {
+            "documents": len(snapshot.files),
+            "chunks": len(snapshot.chunks),
+            "index_bytes": self._index_bytes(snapshot),
+            "published_at": time.time(),
+            **snapshot.stats
+        }
+
+        # The new version is invisible to readers until the pointer swap below
+        if self.storage == "disk":
+            self._write_disk(snapshot)
+        else:
+            self._write_redis(snapshot)
+
+        if self.redis_enabled:
+            pipe = self.redis_client.pipeline(transaction=True)
+            pipe.set(self.current_key, snapshot.version)
+            if self.shard is None:
+                pipe.set("processed_files", json.dumps(snapshot.file_names))
+            pipe.lpush(self.versions_key, snapshot.version)
+            pipe.publish(self.updates_channel, snapshot.version)
+            pipe.execute()
+
+        self._prune_versions()
+
+    def _index_bytes(self, snapshot: IndexSnapshot) -> int:
+        """Stored size of the snapshot's arrays and chunk texts."""
+        total = sum(len(chunk.encode("utf-8")) for chunk in snapshot.chunks)
+        for name, array in snapshot.arrays().items():
+            itemsize = np.dtype(self.dtype).itemsize if name == "embeddings" else array.itemsize
+            total += array.size * itemsize
+        return int(total)
+
+    def _storage_arrays(self, snapshot: IndexSnapshot) -> Dict[str, np.ndarray]:
+        arrays = dict(snapshot.arrays())
+        arrays["embeddings"] = np.ascontiguousarray(arrays["embeddings"], dtype=self.dtype)
+        return arrays
+
+    def _write_redis(self, snapshot: IndexSnapshot):
+        arrays = self._storage_arrays(snapshot)
+        chunks = self.codec.encode(list(snapshot.chunks))
+        snapshot.stats["stored_chunk_bytes"] = len(chunks)
+        manifest = snapshot.manifest()
+        manifest["arrays"] = {
+            name: {"dtype": str(array.dtype), "shape": list(array.shape)}
+            for name, array in arrays.items()
+        }
+
+        # The embedding matrix gets a key of its own so rows can be read with GETRANGE
+        embeddings = arrays.pop("embeddings")
+        pipe = self.binary_client.pipeline(transaction=False)
+        pipe.set(self._key(snapshot.version, "manifest"), json.dumps(manifest))
+        pipe.set(self._key(snapshot.version, "chunks"), chunks)
+        pipe.set(self._key(snapshot.version, "embeddings"), embeddings.tobytes())
+        pipe.hset(self._key(snapshot.version, "arrays"), mapping={
+            name: np.ascontiguousarray(array).tobytes() for name, array in arrays.items()
+        })
+        pipe.execute()
+
+    def _write_disk(self, snapshot: IndexSnapshot):
+        """Write the snapshot directory, then point CURRENT at it with an atomic rename."""
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        staging_dir = self.index_dir / f".{snapshot.version}.tmp"
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        staging_dir.mkdir()
+
+        encoded = [chunk.encode("utf-8") for chunk in snapshot.chunks]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(chunk) for chunk in encoded])
+
+        with open(staging_dir / "texts.bin", "wb") as f:
+            f.write(b"".join(encoded))
+        np.save(staging_dir / "offsets.npy", offsets)
+        arrays = self._storage_arrays(snapshot)
+        for name, array in arrays.items():
+            np.save(staging_dir / f"{name}.npy", array)
+
+        manifest = snapshot.manifest()
+        manifest["arrays"] = list(arrays)
+        (staging_dir / "manifest.json").write_text(json.dumps(manifest))
+
+        os.replace(staging_dir, self.index_dir / snapshot.version)
+
+        current_tmp = self.index_dir / ".CURRENT.tmp"
+        current_tmp.write_text(snapshot.version)
+        os.replace(current_tmp, self.index_dir / "CURRENT")
+
+    def _prune_versions(self):
+        """Delete snapshot versions beyond the retention window."""
+        if not self.redis_enabled:
+            for version in self._disk_versions()[self.keep_versions:]:
+                shutil.rmtree(self.index_dir / version, ignore_errors=True)
+            return
+
+        stale = self.redis_client.lrange(self.versions_key, self.keep_versions, -1)
+        if not stale:
+            return
+
+        pipe = self.redis_client.pipeline()
+        for version in stale:
+            pipe.delete(*[self._key(version, part) for part in ("manifest", "chunks", "arrays", "embeddings")])
+            # Unlinking is safe while other workers still have the files mapped
+            shutil.rmtree(self.index_dir / version, ignore_errors=True)
+        pipe.ltrim(self.versions_key, 0, self.keep_versions - 1)
+        pipe.execute()
+
+    def _disk_versions(self) -> List[str]:
+        """Published versions in the index directory, newest first."""
+        manifests = [path for path in self.index_dir.glob("*/manifest.json") if not path.parent.name.startswith(".")]
+        manifests.sort(key=lambda path: json.loads(path.read_text())["created_at"], reverse=True)
+        return [path.parent.name for path in manifests]
+
+    def load(self, version: Optional[str] = None) -> Optional[IndexSnapshot]:
+        """Load a snapshot version, defaulting to the current one."""
+        version = version or self.current_version()
+        if not version:
+            return None
+        if self.storage == "disk":
+            return self._load_disk(version)
+        return self._load_redis(version)
+
+    def _load_redis(self, version: str) -> Optional[IndexSnapshot]:
+        manifest, chunks = self.binary_client.mget([
+            self._key(version, "manifest"),
+            self._key(version, "chunks")
+        ])
+        stored_arrays = self.binary_client.hgetall(self._key(version, "arrays"))
+        if manifest is None or chunks is None or not stored_arrays:
+            return None
+
+        try:
+            # Versions published before compression hold plain JSON, which decodes as is
+            chunks = self.codec.decode(chunks)
+        except (ValueError, zlib.error) as e:
+            print(f"Cannot read the chunk texts of index version {version}: {e}")
+            return None
+
+        manifest = json.loads(manifest)
+        arrays = {}
+        for name, spec in manifest["arrays"].items():
+            # Versions published before embeddings had a key of their own keep them in the hash
+            raw = stored_arrays.get(name.encode())
+            if raw is not None:
+                arrays[name] = np.frombuffer(raw, dtype=spec["dtype"]).reshape(spec["shape"])
+
+        if "embeddings" not in arrays:
+            spec = manifest["arrays"]["embeddings"]
+            key = self._key(version, "embeddings")
+            codes = {"int8": "int8_codes", "binary": "binary_codes"}.get(self.quantization)
+            # A snapshot too small for int8 codes is searched on the float matrix, so all of it is read
+            if codes in arrays and not (manifest.get("stats") or {}).get("int8_fallback"):
+                arrays["embeddings"] = RedisRows(self.binary_client, key, spec["dtype"], spec["shape"])
+            else:
+                raw = self.binary_client.get(key)
+                if raw is None:
+                    return None
+                arrays["embeddings"] = np.frombuffer(raw, dtype=spec["dtype"]).reshape(spec["shape"])
+
+        return IndexSnapshot.from_stored(manifest, chunks, arrays)
+
+    def _load_disk(self, version: str) -> Optional[IndexSnapshot]:
+        snapshot_dir = self.index_dir / version
+        if not (snapshot_dir / "manifest.json").exists():
+            return None
+
+        manifest = json.loads((snapshot_dir / "manifest.json").read_text())
+        offsets = load_mapped(snapshot_dir / "offsets.npy")
+        chunks = MappedTexts(snapshot_dir / "texts.bin", offsets)
+        # Every worker maps the same files, so the arrays live once in the page cache.
+        # Quantized search only touches the pages of the float rows it rescores
+        arrays = {name: load_mapped(snapshot_dir / f"{name}.npy") for name in manifest["arrays"]}
+
+        return IndexSnapshot.from_stored(manifest, chunks, arrays)
+
+    def start_listener(self, on_version: Callable[[str], None]) -> threading.Thread:
+        """Call on_version from a background thread whenever a new version is published."""
+        thread = threading.Thread(target=self._listen, args=(on_version,), daemon=True,
+                                  name="index-snapshot-listener")
+        thread.start()
+        return thread
+
+    def _listen(self, on_version: Callable[[str], None]):
+        if not self.redis_enabled:
+            # Nothing is published on the update channel, so only the pointer is polled
+            while True:
+                time.sleep(self.poll_interval)
+                try:
+                    version = self.current_version()
+                    if version:
+                        on_version(version)
+                except Exception as e:
+                    print(f"Index listener error: {e}")
+
+        while True:
+            try:
+                pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.updates_channel)
+                last_poll = 0.0
+
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message["type"] == "message":
+                        on_version(message["data"])
+
+                    # Pub/sub is fire-and-forget, so also check the pointer in
+                    # case a notification was missed during a reconnect
+                    if time.time() - last_poll >= self.poll_interval:
+                        last_poll = time.time()
+                        version = self.current_version()
+                        if version:
+                            on_version(version)
+            except Exception as e:
+                print(f"Index listener error: {e}")
+                time.sleep(5)
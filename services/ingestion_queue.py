@@ -0,0 +1,124 @@
+"""
+Ingestion job queue for ManualMind.
+Hands document processing off from the API to the dedicated ingestion worker.
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+from typing import Dict, Any, Optional
+import redis
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# KEYS: pending marker, queue, new job record; ARGV: job id, job JSON, TTL, job key prefix.
+# Returns the job that is waiting, which is the new one unless another trigger got there first.
+ENQUEUE_SCRIPT = """
+local pending = redis.call('GET', KEYS[1])
+if pending then
+    local job = redis.call('GET', ARGV[4] .. pending)
+    if job then
+        return job
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[3])
+redis.call('SET', KEYS[3], ARGV[2], 'EX', ARGV[3])
+redis.call('LPUSH', KEYS[2], ARGV[1])
+return ARGV[2]
+"""
+
+# KEYS: pending marker; ARGV: job id. Clears the marker only if it still names this job.
+CLEAR_PENDING_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class IngestionQueue:
+    """Redis-backed queue of document ingestion jobs."""
+
+    QUEUE_KEY = "ingestion:queue"
+    PENDING_KEY = "ingestion:pending"
+    JOB_KEY_PREFIX = "ingestion:job:"
+    PROCESSING_KEY_PREFIX = "ingestion:processing:"
+
+    def __init__(self, worker_id: Optional[str] = None):
+        self.redis_client = redis.Redis(
+            host=os.getenv("REDIS_HOST", "localhost"),
+            port=int(os.getenv("REDIS_PORT", 6379)),
+            db=int(os.getenv("REDIS_DB", 0)),
+            decode_responses=True
+        )
+        # How long job records stay around for status lookups
+        self.job_ttl = int(os.getenv("INGESTION_JOB_TTL", 86400))
+        # Jobs a worker has taken stay in its own processing list until they finish,
+        # so a restarted worker (same id, e.g. the container hostname) can re-queue them
+        self.worker_id = worker_id or os.getenv("INGESTION_WORKER_ID") or socket.gethostname()
+        self.processing_key = f"{self.PROCESSING_KEY_PREFIX}{self.worker_id}"
+        self._enqueue = self.redis_client.register_script(ENQUEUE_SCRIPT)
+        self._clear_pending = self.redis_client.register_script(CLEAR_PENDING_SCRIPT)
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{self.JOB_KEY_PREFIX}{job_id}"
+
+    def enqueue(self, media_path: str = "media") -> Dict[str, Any]:
+        """Queue an ingestion of the media folder, folding repeated triggers into the pending job."""
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "media_path": media_path,
+            "queued_at": time.time()
+        }
+
+        # Only one job may wait in the queue; concurrent triggers from several
+        # API workers reuse it instead of re-indexing the same files twice.
+        # The marker, job record and queue entry are written in one script, so
+        # no trigger can see a marker without its job.
+        waiting = self._enqueue(
+            keys=[self.PENDING_KEY, self.QUEUE_KEY, self._job_key(job_id)],
+            args=[job_id, json.dumps(job), self.job_ttl, self.JOB_KEY_PREFIX]
+        )
+        return json.loads(waiting)
+
+    def dequeue(self, timeout: int = 5) -> Optional[Dict[str, Any]]:
+        """Block until a job is available and claim it for this worker.
+
+        The job moves to this worker's processing list; call complete() once it is done.
+        """
+        job_id = self.redis_client.blmove(self.QUEUE_KEY, self.processing_key, timeout, "RIGHT", "LEFT")
+        if not job_id:
+            return None
+
+        # The job is no longer waiting, so a new trigger should queue a fresh run
+        self._clear_pending(keys=[self.PENDING_KEY], args=[job_id])
+
+        job = self.get_job(job_id) or {"job_id": job_id, "media_path": "media"}
+        return self.update_job(job_id, job, status="running", started_at=time.time())
+
+    def complete(self, job_id: str):
+        """Drop a finished job from this worker's processing list."""
+        self.redis_client.lrem(self.processing_key, 1, job_id)
+
+    def requeue_unfinished(self) -> int:
+        """Put jobs this worker took but never finished, e.g. before a crash, back in the queue."""
+        requeued = 0
+        while self.redis_client.lmove(self.processing_key, self.QUEUE_KEY, "RIGHT", "RIGHT"):
+            requeued += 1
+        return requeued
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the stored record for a job, if it still exists."""
+        job = self.redis_client.get(self._job_key(job_id))
+        return json.loads(job) if job else None
+
+    def update_job(self, job_id: str, job: Dict[str, Any], **fields) -> Dict[str, Any]:
+        """Merge fields into a job record and store it."""
+        job = {**job, **fields}
+        self.redis_client.setex(self._job_key(job_id), self.job_ttl, json.dumps(job))
+        return job
@@ -0,0 +1,238 @@
+"""
+Lexical (BM25) index for ManualMind.
+Keeps compact postings arrays so exact tokens such as parameter names, MIDI CC
+numbers and model names can be matched alongside the embedding search.
+"""
+
+import re
+from collections import Counter
+from typing import List, Dict, Optional, Sequence, Tuple
+import numpy as np
+
+# "SYSTEM-8", "CC#74", "1.02", "LFO" -> "system-8", "cc", "74", "1.02", "lfo"
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-./][a-z0-9]+)*")
+
+# Words that appear in nearly every chunk: near-zero BM25 weight but the longest postings
+STOP_WORDS = frozenset("""
+a an and are as at be by can do does for from how i if in into is it its my of on or
+that the then this to use what when which with you your
+""".split())
+
+# Terms with more postings than this also store their IMPACT_POSTINGS highest-weighted
+# postings separately. Below it, reading a term whole is as fast as looking up candidates
+LONG_TERM_POSTINGS = 16384
+IMPACT_POSTINGS = 4096
+# Candidates a query first takes from the top of each of those very common terms;
+# 0 reads every posting straight away
+MAX_POSTINGS_PER_TERM = 0
+
+
+def top_k_rows(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Return row indices of the top_k scores, best first."""
+    if top_k <= 0 or len(scores) == 0:
+        return np.empty(0, dtype=np.int64)
+    if top_k < len(scores):
+        rows = np.argpartition(-scores, top_k - 1)[:top_k]
+    else:
+        rows = np.arange(len(scores))
+    return rows[np.argsort(-scores[rows], kind="stable")]
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stop words, keeping compound tokens and also their parts."""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOP_WORDS:
+            continue
+        tokens.append(token)
+        if not token.isalnum():
+            tokens.extend(re.split(r"[-./]", token))
+    return tokens
+
+
+class BM25Index:
+    """Inverted index with precomputed BM25 weights stored as CSR postings arrays.
+
+    Terms with more than LONG_TERM_POSTINGS postings also keep the doc ids
+    of their highest-weighted postings, best first, so a query can take its
+    candidates from the top of a very common term instead of reading it all.
+    """
+
+    def __init__(self, terms: List[str], indptr: np.ndarray, doc_ids: np.ndarray,
+                 weights: np.ndarray, num_docs: int, impact_indptr: Optional[np.ndarray] = None,
+                 impact_doc_ids: Optional[np.ndarray] = None):
+        self.terms = terms
+        self.term_ids = {term: term_id for term_id, term in enumerate(terms)}
+        # Postings of term t are doc_ids/weights[indptr[t]:indptr[t + 1]]
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.num_docs = num_docs
+        # Best postings of term t are impact_doc_ids[impact_indptr[t]:impact_indptr[t + 1]];
+        # empty for short terms and in snapshots built before they existed
+        self.impact_indptr = impact_indptr
+        self.impact_doc_ids = impact_doc_ids
+
+    @classmethod
+    def build(cls, texts: Sequence[str], k1: float = 1.2, b: float = 0.75) -> "BM25Index":
+        """Tokenize texts and compute per-posting BM25 weights."""
+        vocabulary: Dict[str, int] = {}
+        posting_terms = []
+        posting_docs = []
+        posting_freqs = []
+        doc_lengths = np.zeros(len(texts), dtype=np.float32)
+
+        for doc_id, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lengths[doc_id] = len(tokens)
+            for term, freq in Counter(tokens).items():
+                posting_terms.append(vocabulary.setdefault(term, len(vocabulary)))
+                posting_docs.append(doc_id)
+                posting_freqs.append(freq)
+
+        posting_terms = np.asarray(posting_terms, dtype=np.int32)
+        posting_docs = np.asarray(posting_docs, dtype=np.int32)
+        posting_freqs = np.asarray(posting_freqs, dtype=np.float32)
+
+        # Group postings by term; a stable sort keeps doc ids ascending within a term
+        order = np.argsort(posting_terms, kind="stable")
+        posting_terms = posting_terms[order]
+        posting_docs = posting_docs[order]
+        posting_freqs = posting_freqs[order]
+
+        doc_freqs = np.bincount(posting_terms, minlength=len(vocabulary))
+        indptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(doc_freqs)
+
+        num_docs = len(texts)
+        idf = np.log(1 + (num_docs - doc_freqs + 0.5) / (doc_freqs + 0.5)).astype(np.float32)
+        average_length = doc_lengths.mean() if num_docs else 1.0
+        length_norm = k1 * (1 - b + b * doc_lengths[posting_docs] / max(average_length, 1.0))
+        weights = idf[posting_terms] * posting_freqs * (k1 + 1) / (posting_freqs + length_norm)
+
+        # Rank postings within each term by weight and keep the best of the long terms
+        impact_order = np.lexsort((-weights, posting_terms))
+        ranks = np.arange(len(impact_order)) - indptr[posting_terms]
+        keep = (ranks < IMPACT_POSTINGS) & (doc_freqs[posting_terms] > LONG_TERM_POSTINGS)
+        impact_indptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        impact_indptr[1:] = np.cumsum(np.bincount(posting_terms[keep], minlength=len(vocabulary)))
+        impact_doc_ids = posting_docs[impact_order][keep]
+
+        terms = [None] * len(vocabulary)
+        for term, term_id in vocabulary.items():
+            terms[term_id] = term
+
+        return cls(terms, indptr, posting_docs, weights.astype(np.float32), num_docs,
+                   impact_indptr=impact_indptr, impact_doc_ids=impact_doc_ids)
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document for the query."""
+        term_ids = [self.term_ids[term] for term in set(tokenize(query)) if term in self.term_ids]
+        if not term_ids:
+            return np.zeros(self.num_docs, dtype=np.float32)
+        # One bincount over every matching posting is cheaper than a fancy-index add per term
+        doc_ids = np.concatenate([self.doc_ids[self.indptr[term_id]:self.indptr[term_id + 1]] for term_id in term_ids])
+        weights = np.concatenate([self.weights[self.indptr[term_id]:self.indptr[term_id + 1]] for term_id in term_ids])
+        return np.bincount(doc_ids, weights=weights, minlength=self.num_docs).astype(np.float32)
+
+    def top_docs(self, query: str, count: int,
+                 max_postings: int = MAX_POSTINGS_PER_TERM) -> Tuple[np.ndarray, np.ndarray]:
+        """Best count documents by BM25 score, best first, with their scores; only documents matching a term.
+
+        With max_postings, a term with more than LONG_TERM_POSTINGS postings
+        first only nominates its max_postings highest-weighted documents, at
+        most IMPACT_POSTINGS, and every nominated document is scored exactly.
+        A document that was not nominated matches no shorter term, so its
+        score is at most the sum of the long terms' last nominated weights. If
+        that bound does not beat the count-th score, those are the results;
+        otherwise every posting is read. Either way the result is the same as
+        full scoring.
+        """
+        term_ids = {self.term_ids[term] for term in tokenize(query) if term in self.term_ids}
+        if not term_ids or count <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        capped = []
+        if max_postings and self.impact_indptr is not None:
+            capped = [term_id for term_id in term_ids
+                      if self.impact_indptr[term_id + 1] > self.impact_indptr[term_id]]
+        if capped:
+            short = [term_id for term_id in term_ids if term_id not in capped]
+            docs, scores, bound = self._score_nominated(short, capped, max_postings)
+            best = top_k_rows(scores, count)
+            # No document left out can beat the count-th nominated one, so the result is exact
+            if len(best) == count and bound <= scores[best[-1]]:
+                return docs[best].astype(np.int64), scores[best]
+
+        scores = self.scores(query)
+        best = top_k_rows(scores, count)
+        best = best[scores[best] > 0]
+        return best, scores[best]
+
+    def _score_nominated(self, short: List[int], capped: List[int],
+                         depth: int) -> Tuple[np.ndarray, np.ndarray, float]:
+        """Exact scores of every document of the short terms and the best depth documents of the long ones.
+
+        Also returns the highest score a document left out can have.
+        """
+        # Short terms are read whole and scored exactly; long terms only nominate candidates here
+        doc_parts = []
+        weight_parts = []
+        for term_id in short:
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            doc_parts.append(self.doc_ids[start:end])
+            weight_parts.append(self.weights[start:end])
+        ends = []
+        for term_id in capped:
+            start = self.impact_indptr[term_id]
+            end = min(start + depth, self.impact_indptr[term_id + 1])
+            doc_parts.append(self.impact_doc_ids[start:end])
+            weight_parts.append(np.zeros(end - start, dtype=np.float32))
+            ends.append(end)
+        docs, positions = np.unique(np.concatenate(doc_parts), return_inverse=True)
+        scores = np.bincount(positions, weights=np.concatenate(weight_parts), minlength=len(docs))
+
+        # Long terms' postings are sorted by doc id, so each candidate's weight is found by bisection
+        bound = 0.0
+        for term_id, end in zip(capped, ends):
+            start = self.indptr[term_id]
+            term_docs = self.doc_ids[start:self.indptr[term_id + 1]]
+            found = np.minimum(np.searchsorted(term_docs, docs), len(term_docs) - 1)
+            matched = term_docs[found] == docs
+            scores[matched] += self.weights[start:][found[matched]]
+            # Best postings are in weight order, so the last one read bounds every unread one
+            bound += float(self.weights[start + np.searchsorted(term_docs, self.impact_doc_ids[end - 1])])
+        return docs, scores.astype(np.float32), bound
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Postings arrays for snapshot storage."""
+        arrays = {"bm25_indptr": self.indptr, "bm25_doc_ids": self.doc_ids, "bm25_weights": self.weights}
+        if self.impact_indptr is not None:
+            arrays["bm25_impact_indptr"] = self.impact_indptr
+            arrays["bm25_impact_doc_ids"] = self.impact_doc_ids
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, terms: List[str], arrays: Dict[str, np.ndarray], num_docs: int) -> Optional["BM25Index"]:
+        """Rebuild the index from stored postings arrays, if the snapshot has them."""
+        if "bm25_indptr" not in arrays:
+            return None
+        return cls(terms, arrays["bm25_indptr"], arrays["bm25_doc_ids"], arrays["bm25_weights"], num_docs,
+                   impact_indptr=arrays.get("bm25_impact_indptr"),
+                   impact_doc_ids=arrays.get("bm25_impact_doc_ids"))
+
+
+def reciprocal_rank_fusion(rankings: List[np.ndarray], k: int = 60) -> List[Tuple[int, float]]:
+    """Fuse several best-first row rankings into one, scoring each row by sum(1 / (k + rank)).
+
+    Rows with equal fused scores keep the order in which they were first ranked.
+    """
+    rankings = [np.asarray(ranking, dtype=np.int64) for ranking in rankings]
+    if not any(len(ranking) for ranking in rankings):
+        return []
+    rows = np.concatenate(rankings)
+    weights = np.concatenate([1.0 / (k + np.arange(1, len(ranking) + 1)) for ranking in rankings])
+    unique, first, positions = np.unique(rows, return_index=True, return_inverse=True)
+    fused = np.bincount(positions, weights=weights)
+    order = np.lexsort((first, -fused))
+    return list(zip(unique[order].tolist(), fused[order].tolist()))
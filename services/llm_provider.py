@@ -0,0 +1,178 @@
+"""
+Language model providers for ManualMind.
+Turns the answer prompt into text through OpenAI, an OpenAI-compatible local
+server (llama.cpp, vLLM, Ollama), an in-process llama.cpp model, or a
+deterministic stub that mimics model latency for load testing.
+"""
+
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Iterator, Optional
+import openai
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class LLMProvider(ABC):
+    """Interface QueryService uses to answer a prompt."""
+
+    name = "base"
+
+    @abstractmethod
+    def stream(self, system_prompt: str, user_prompt: str) -> Iterator[str]:
+        """Yield the answer piece by piece as the model produces it."""
+
+    def complete(self, system_prompt: str, user_prompt: str) -> str:
+        """Return the whole answer."""
+        return "".join(self.stream(system_prompt, user_prompt)).strip()
+
+
+class OpenAIProvider(LLMProvider):
+    """Chat completions through the OpenAI API or any server that speaks it."""
+
+    name = "openai"
+
+    def __init__(self, model: str = "gpt-3.5-turbo", max_tokens: int = 500, temperature: float = 0.7,
+                 base_url: Optional[str] = None, api_key: Optional[str] = None, timeout: float = 60.0):
+        self.client = openai.OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"), base_url=base_url,
+                                    timeout=timeout)
+        self.model = model
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+
+    def _messages(self, system_prompt: str, user_prompt: str):
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+
+    def stream(self, system_prompt: str, user_prompt: str) -> Iterator[str]:
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(system_prompt, user_prompt),
+            max_tokens=self.max_tokens,
+            temperature=self.temperature,
+            stream=True
+        )
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    def complete(self, system_prompt: str, user_prompt: str) -> str:
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(system_prompt, user_prompt),
+            max_tokens=self.max_tokens,
+            temperature=self.temperature
+        )
+        return response.choices[0].message.content.strip()
+
+
+class LlamaCppProvider(LLMProvider):
+    """Small GGUF model run in-process on the CPU through llama-cpp-python (optional dependency)."""
+
+    name = "llama_cpp"
+
+    def __init__(self, model_path: str, max_tokens: int = 500, temperature: float = 0.7,
+                 context_size: int = 4096, threads: Optional[int] = None):
+        try:
+            from llama_cpp import Llama
+        except ImportError as e:
+            raise RuntimeError("LLM_PROVIDER=llama_cpp needs the llama-cpp-python package") from e
+        self.model = Llama(model_path=model_path, n_ctx=context_size, n_threads=threads, verbose=False)
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+
+    def _create(self, system_prompt: str, user_prompt: str, stream: bool):
+        return self.model.create_chat_completion(
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            max_tokens=self.max_tokens,
+            temperature=self.temperature,
+            stream=stream
+        )
+
+    def stream(self, system_prompt: str, user_prompt: str) -> Iterator[str]:
+        for chunk in self._create(system_prompt, user_prompt, stream=True):
+            content = chunk["choices"][0]["delta"].get("content")
+            if content:
+                yield content
+
+    def complete(self, system_prompt: str, user_prompt: str) -> str:
+        response = self._create(system_prompt, user_prompt, stream=False)
+        return response["choices"][0]["message"]["content"].strip()
+
+
+class StubProvider(LLMProvider):
+    """Deterministic offline stand-in that answers with a fixed latency and token rate.
+
+    The answer echoes the first response_tokens words of the prompt, so identical
+    prompts always produce identical answers.
+    """
+
+    name = "stub"
+
+    def __init__(self, latency_ms: int = 500, tokens_per_second: float = 50.0, response_tokens: int = 120):
+        self.latency = latency_ms / 1000.0
+        self.token_interval = 1.0 / tokens_per_second if tokens_per_second > 0 else 0.0
+        self.response_tokens = response_tokens
+
+    def stream(self, system_prompt: str, user_prompt: str) -> Iterator[str]:
+        # Time to first token
+        time.sleep(self.latency)
+        words = user_prompt.split()[:self.response_tokens]
+        yield "[stub answer] "
+        for word in words:
+            if self.token_interval:
+                time.sleep(self.token_interval)
+            yield word + " "
+
+
+def create_provider() -> LLMProvider:
+    """Build the provider selected by LLM_PROVIDER (openai, local, llama_cpp or stub)."""
+    provider = os.getenv("LLM_PROVIDER", "openai").lower()
+    max_tokens = int(os.getenv("LLM_MAX_TOKENS", 500))
+    temperature = float(os.getenv("LLM_TEMPERATURE", 0.7))
+    timeout = float(os.getenv("LLM_TIMEOUT", 60))
+
+    if provider == "stub":
+        return StubProvider(
+            latency_ms=int(os.getenv("STUB_LLM_LATENCY_MS", 500)),
+            tokens_per_second=float(os.getenv("STUB_LLM_TOKENS_PER_SEC", 50)),
+            response_tokens=int(os.getenv("STUB_LLM_RESPONSE_TOKENS", 120))
+        )
+    if provider == "openai":
+        return OpenAIProvider(
+            model=os.getenv("LLM_MODEL", "gpt-3.5-turbo"),
+            max_tokens=max_tokens,
+            temperature=temperature,
+            base_url=os.getenv("LLM_BASE_URL") or None,
+            timeout=timeout
+        )
+    if provider == "local":
+        # OpenAI-compatible server on the local network; most ignore the API key
+        return OpenAIProvider(
+            model=os.getenv("LLM_MODEL", "local-model"),
+            max_tokens=max_tokens,
+            temperature=temperature,
+            base_url=os.getenv("LLM_BASE_URL", "http://localhost:8080/v1"),
+            api_key=os.getenv("LLM_API_KEY", "not-needed"),
+            timeout=timeout
+        )
+    if provider == "llama_cpp":
+        model_path = os.getenv("LLM_MODEL")
+        if not model_path:
+            raise ValueError("LLM_PROVIDER=llama_cpp needs LLM_MODEL set to a GGUF model file")
+        threads = os.getenv("LLM_THREADS")
+        return LlamaCppProvider(
+            model_path=model_path,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            context_size=int(os.getenv("LLM_CONTEXT_SIZE", 4096)),
+            threads=int(threads) if threads else None
+        )
+    raise ValueError(f"Unknown LLM_PROVIDER '{provider}': expected openai, local, llama_cpp or stub")
@@ -0,0 +1,51 @@
+"""
+Manual metadata for ManualMind.
+Derives instrument model and document type from manufacturer file names such
+as JUNO-X_MIDI_imple_eng01_W.pdf, and matches search filters against them.
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+LANGUAGE_PART = re.compile(r"^([a-z]{2,3})(\d+)$", re.IGNORECASE)
+
+# Abbreviations used in manufacturer file names
+DOC_TYPE_ALIASES = {
+    "midi_imple": "midi_implementation",
+    "": "owners_manual",
+}
+
+
+def parse_manual_name(file_name: str) -> Dict[str, str]:
+    """Split a manual file name into instrument, document type and language."""
+    parts = Path(file_name).stem.split("_")
+    instrument = parts[0]
+
+    language = ""
+    doc_parts = parts[1:]
+    for index, part in enumerate(parts[1:], start=1):
+        match = LANGUAGE_PART.match(part)
+        if match:
+            language = match.group(1).lower()
+            doc_parts = parts[1:index]
+            break
+
+    doc_type = "_".join(doc_parts).lower()
+    return {
+        "instrument": instrument.upper(),
+        "doc_type": DOC_TYPE_ALIASES.get(doc_type, doc_type),
+        "language": language
+    }
+
+
+def matches_filters(file_info: Dict[str, Any], filters: Optional[Dict[str, Any]]) -> bool:
+    """Check a file entry against file_name / instrument / doc_type filters (case-insensitive)."""
+    if not filters:
+        return True
+
+    for field in ("file_name", "instrument", "doc_type"):
+        wanted = filters.get(field)
+        if wanted and str(file_info.get(field, "")).lower() != str(wanted).lower():
+            return False
+    return True
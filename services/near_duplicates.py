@@ -0,0 +1,81 @@
+"""
+Near-duplicate chunk detection for ManualMind.
+Manuals repeat boilerplate such as safety precautions, licence text and MIDI
+implementation tables across models and revisions. MinHash signatures of word
+shingles, bucketed with locality-sensitive hashing, find chunks that are nearly
+identical to one seen before without comparing every pair.
+"""
+
+import re
+import zlib
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+WORD = re.compile(r"\w+")
+# Hashes are permuted modulo a Mersenne prime larger than any 32-bit shingle hash
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+
+
+class NearDuplicateIndex:
+    """MinHash LSH index that maps a chunk text to the value stored for its first near-duplicate.
+
+    A signature holds num_perm minimum hashes of the text's word shingles. It is
+    split into bands, and chunks that share a whole band become candidates. A
+    candidate counts as a duplicate when the share of equal minimum hashes, an
+    estimate of the Jaccard similarity of the two shingle sets, reaches the
+    threshold.
+    """
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 128, bands: int = 16,
+                 shingle_size: int = 5, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        # a * hash + b stays below 2**64 because every factor is below 2**32
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 32, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, num_perm, dtype=np.uint64)
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self._signatures: List[np.ndarray] = []
+        self._values: List[Any] = []
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of the text's lower-cased word shingles."""
+        words = WORD.findall(text.lower())
+        size = min(self.shingle_size, len(words))
+        if size:
+            shingles = {zlib.crc32(" ".join(words[i:i + size]).encode()) for i in range(len(words) - size + 1)}
+        else:
+            shingles = {zlib.crc32(text.strip().encode())}
+        hashes = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+        return ((hashes[:, None] * self._a + self._b) % MERSENNE_PRIME).min(axis=0)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def find(self, signature: np.ndarray) -> Optional[Any]:
+        """Value of the most similar indexed chunk at or above the threshold, or None."""
+        candidates = set()
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(bucket.get(key, ()))
+
+        best, best_similarity = None, self.threshold
+        for candidate in candidates:
+            similarity = float(np.mean(self._signatures[candidate] == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = candidate, similarity
+        return self._values[best] if best is not None else None
+
+    def add(self, signature: np.ndarray, value: Any):
+        """Index a chunk's signature; later near-duplicates of it resolve to value."""
+        entry = len(self._values)
+        self._signatures.append(signature)
+        self._values.append(value)
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            bucket.setdefault(key, []).append(entry)
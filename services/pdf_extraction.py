@@ -0,0 +1,98 @@
+"""
+PDF text extraction backends for ManualMind.
+Extracts the text of each page with PyPDF2 (default), or with the optional
+pypdfium2 (much faster) or pdfminer.six (layout-aware) packages, selected by
+PDF_EXTRACTOR.
+"""
+
+import os
+from abc import ABC, abstractmethod
+from typing import List, Optional
+import PyPDF2
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class PDFExtractor(ABC):
+    """Interface DocumentProcessor uses to read the text of a PDF, one string per page."""
+
+    name = "base"
+
+    @abstractmethod
+    def extract_pages(self, pdf_path: str) -> List[str]:
+        """Return the text of each page; raises when the file cannot be read."""
+
+
+class PyPDF2Extractor(PDFExtractor):
+    """Pure-Python extraction with PyPDF2; slowest, but needs no extra packages."""
+
+    name = "pypdf2"
+
+    def extract_pages(self, pdf_path: str) -> List[str]:
+        with open(pdf_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            return [page.extract_text() or "" for page in pdf_reader.pages]
+
+
+class PdfiumExtractor(PDFExtractor):
+    """Extraction with PDFium, the C++ engine behind Chrome's PDF viewer (pypdfium2, optional)."""
+
+    name = "pdfium"
+
+    def __init__(self):
+        try:
+            import pypdfium2
+        except ImportError as e:
+            raise RuntimeError("PDF_EXTRACTOR=pdfium needs the pypdfium2 package") from e
+        self.pdfium = pypdfium2
+
+    def extract_pages(self, pdf_path: str) -> List[str]:
+        pages = []
+        document = self.pdfium.PdfDocument(pdf_path)
+        try:
+            for page in document:
+                text_page = page.get_textpage()
+                # PDFium separates lines with \r\n
+                pages.append(text_page.get_text_range().replace("\r\n", "\n"))
+                text_page.close()
+                page.close()
+        finally:
+            document.close()
+        return pages
+
+
+class PdfminerExtractor(PDFExtractor):
+    """Layout-aware extraction with pdfminer.six (optional); keeps reading order in multi-column pages."""
+
+    name = "pdfminer"
+
+    def __init__(self):
+        try:
+            from pdfminer.high_level import extract_pages
+            from pdfminer.layout import LTTextContainer
+        except ImportError as e:
+            raise RuntimeError("PDF_EXTRACTOR=pdfminer needs the pdfminer.six package") from e
+        self._extract_pages = extract_pages
+        self._text_container = LTTextContainer
+
+    def extract_pages(self, pdf_path: str) -> List[str]:
+        return [
+            "".join(element.get_text() for element in layout if isinstance(element, self._text_container))
+            for layout in self._extract_pages(pdf_path)
+        ]
+
+
+EXTRACTORS = {
+    PyPDF2Extractor.name: PyPDF2Extractor,
+    PdfiumExtractor.name: PdfiumExtractor,
+    PdfminerExtractor.name: PdfminerExtractor,
+}
+
+
+def create_extractor(name: Optional[str] = None) -> PDFExtractor:
+    """Build the extractor selected by name or PDF_EXTRACTOR (pypdf2, pdfium or pdfminer)."""
+    name = (name or os.getenv("PDF_EXTRACTOR", "pypdf2")).lower()
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown PDF_EXTRACTOR '{name}': expected {', '.join(EXTRACTORS)}")
+    return EXTRACTORS[name]()
@@ -0,0 +1,103 @@
+"""
+Embedding quantization for ManualMind.
+Compresses the chunk embedding matrix to int8 codes with one scale per
+dimension, or to one bit per dimension packed into uint64 words, so candidates can be
+scored on a fraction of the memory before the shortlist is rescored against
+the full-precision vectors.
+"""
+
+from typing import List, Optional, Tuple
+import numpy as np
+
+
+def quantize_int8(embeddings: np.ndarray, block_rows: int = 65536) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-dimension int8 quantization: embeddings ≈ codes * scales."""
+    if embeddings.size == 0:
+        return np.zeros(embeddings.shape, dtype=np.int8), np.ones(embeddings.shape[1:], dtype=np.float32)
+
+    scales = np.zeros(embeddings.shape[1], dtype=np.float32)
+    for start in range(0, len(embeddings), block_rows):
+        block = np.abs(np.asarray(embeddings[start:start + block_rows], dtype=np.float32))
+        np.maximum(scales, block.max(axis=0), out=scales)
+    scales /= 127.0
+    scales[scales == 0] = 1.0
+
+    codes = np.empty(embeddings.shape, dtype=np.int8)
+    for start in range(0, len(embeddings), block_rows):
+        block = np.asarray(embeddings[start:start + block_rows], dtype=np.float32) / scales
+        codes[start:start + len(block)] = np.clip(np.rint(block), -127, 127)
+    return codes, scales
+
+
+def int8_scores(codes: np.ndarray, scales: np.ndarray, query_embedding: np.ndarray,
+                ranges: Optional[List[Tuple[int, int]]] = None, block_rows: int = 512) -> np.ndarray:
+    """Approximate dot products of the query with the quantized rows in the given ranges."""
+    # Folding the scales into the query leaves one int8 -> float32 cast per block
+    query = np.asarray(query_embedding, dtype=np.float32).ravel() * scales
+    if ranges is None:
+        ranges = [(0, len(codes))]
+
+    # numpy has no fast int8 x int8 -> int32 product, so each block is cast into
+    # one reused buffer small enough to stay in L2 and multiplied straight into
+    # the output. Only the int8 codes are streamed from memory, a quarter of
+    # what a float32 scan reads, with no per-block allocation or final concatenate.
+    scores = np.empty(sum(end - start for start, end in ranges), dtype=np.float32)
+    buffer = np.empty((min(block_rows, len(scores)), len(query)), dtype=np.float32)
+    position = 0
+    for range_start, range_end in ranges:
+        for start in range(range_start, range_end, block_rows):
+            rows = min(block_rows, range_end - start)
+            np.copyto(buffer[:rows], codes[start:start + rows], casting="unsafe")
+            np.matmul(buffer[:rows], query, out=scores[position:position + rows])
+            position += rows
+    return scores
+
+
+# Set bits per byte value, for numpy versions without bitwise_count
+_BYTE_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def binary_thresholds(embeddings: np.ndarray, block_rows: int = 65536) -> np.ndarray:
+    """Per-dimension means; sentence embeddings are not centred, so raw signs waste bits."""
+    if embeddings.size == 0:
+        return np.zeros(embeddings.shape[1:], dtype=np.float32)
+    totals = np.zeros(embeddings.shape[1], dtype=np.float64)
+    for start in range(0, len(embeddings), block_rows):
+        totals += np.asarray(embeddings[start:start + block_rows], dtype=np.float32).sum(axis=0)
+    return (totals / len(embeddings)).astype(np.float32)
+
+
+def quantize_binary(embeddings: np.ndarray, thresholds: np.ndarray,
+                    block_rows: int = 65536) -> np.ndarray:
+    """Pack one bit per dimension (above its threshold or not) into uint64 words per embedding."""
+    words = (embeddings.shape[1] + 63) // 64
+    codes = np.zeros((len(embeddings), words), dtype=np.uint64)
+    for start in range(0, len(embeddings), block_rows):
+        bits = np.asarray(embeddings[start:start + block_rows], dtype=np.float32) > thresholds
+        packed = np.packbits(bits, axis=1, bitorder="little")
+        # Pad each row to a whole number of words before viewing it as uint64
+        padded = np.zeros((len(bits), words * 8), dtype=np.uint8)
+        padded[:, :packed.shape[1]] = packed
+        codes[start:start + len(bits)] = padded.view(np.uint64)
+    return codes
+
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """Number of set bits in each row of uint64 words."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int32)
+    return _BYTE_POPCOUNT[words.view(np.uint8)].sum(axis=1, dtype=np.int32)
+
+
+def hamming_scores(codes: np.ndarray, thresholds: np.ndarray, query_embedding: np.ndarray,
+                   ranges: Optional[List[Tuple[int, int]]] = None, block_rows: int = 16384) -> np.ndarray:
+    """Negated Hamming distances between the query's bits and the coded rows (higher is closer)."""
+    query = quantize_binary(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1), thresholds)[0]
+    if ranges is None:
+        ranges = [(0, len(codes))]
+
+    parts = []
+    for range_start, range_end in ranges:
+        for start in range(range_start, range_end, block_rows):
+            parts.append(-popcount(codes[start:min(start + block_rows, range_end)] ^ query))
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int32)
@@ -1,16 +1,22 @@
 """
 Query service for ManualMind.
-Handles natural language query processing and OpenAI integration.
+Handles natural language query processing and language model integration.
 """
 
 import os
+import time
+import uuid
 import hashlib
 import json
-from typing import List, Dict, Any
-import openai
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
 import redis
 from dotenv import load_dotenv
 from .document_processor import DocumentProcessor
+from .context_builder import ContextBuilder, load_tokenizer
+from .reranker import CrossEncoderReranker
+from .llm_provider import create_provider
 
 load_dotenv()
 
@@ -18,9 +24,18 @@ load_dotenv()
 class QueryService:
     """Handles query processing and natural language response generation."""
     
+    # Daily sorted sets of normalized query frequencies, used to warm the cache
+    POPULAR_KEY_PREFIX = "query_stats:popular:"
+    
     def __init__(self):
-        self.openai_client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        # Answer generation goes through the provider chosen by LLM_PROVIDER
+        self.llm = create_provider()
         self.document_processor = DocumentProcessor()
+        # Cached answers go through the processor's codec and byte-level client (compressed payloads)
+        self.cache_codec = self.document_processor.cache_codec
+        self.binary_client = self.document_processor.binary_client
+        # Without Redis (possible with a disk index) answers are neither cached nor counted
+        self.redis_enabled = self.document_processor.redis_enabled
         self.redis_client = redis.Redis(
             host=os.getenv("REDIS_HOST", "localhost"),
             port=int(os.getenv("REDIS_PORT", 6379)),
@@ -29,6 +44,36 @@ class QueryService:
         )
         # Cache TTL in seconds (24 hours for robust caching)
         self.query_cache_ttl = int(os.getenv("QUERY_CACHE_TTL", 86400))
+        # Optional stale-while-revalidate: answers older than the soft TTL are served
+        # and refreshed in the background until the hard TTL above removes them
+        self.cache_soft_ttl = int(os.getenv("QUERY_CACHE_SOFT_TTL", 0))
+        self.refresh_lock_ttl = int(os.getenv("QUERY_REFRESH_LOCK_TTL", 120))
+        self.refresh_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("QUERY_REFRESH_WORKERS", 2)),
+            thread_name_prefix="query-refresh"
+        )
+        # Prompt context is capped by tokens rather than by chunk count
+        self.context_builder = ContextBuilder(
+            token_budget=int(os.getenv("CONTEXT_TOKEN_BUDGET", 2000)),
+            max_overlap_chars=self.document_processor.chunk_overlap * 2,
+            count_tokens=load_tokenizer() or self.document_processor.count_tokens
+        )
+        # Optional cross-encoder stage: retrieve more candidates, keep only the best few
+        self.reranker = None
+        if os.getenv("RERANK_ENABLED", "false").lower() == "true":
+            self.reranker = CrossEncoderReranker(
+                model_name=os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"),
+                batch_size=int(os.getenv("RERANK_BATCH_SIZE", 8)),
+                time_budget_ms=int(os.getenv("RERANK_BUDGET_MS", 200))
+            )
+        self.rerank_candidates = int(os.getenv("RERANK_CANDIDATES", 30))
+        self.rerank_top_n = int(os.getenv("RERANK_TOP_N", 3))
+        # Popular questions are re-answered after each new index so early users hit the cache
+        self.popular_query_days = int(os.getenv("POPULAR_QUERY_DAYS", 7))
+        self.popular_query_max_members = int(os.getenv("POPULAR_QUERY_MAX_MEMBERS", 10000))
+        self.warmup_top_n = int(os.getenv("QUERY_WARMUP_TOP_N", 50))
+        self.warmup_rate = float(os.getenv("QUERY_WARMUP_RATE", 0.5))
+        self.warmup_max_seconds = float(os.getenv("QUERY_WARMUP_MAX_SECONDS", 300))
     
     def _normalize_query(self, query: str) -> str:
         """Normalize query for consistent cache keys."""
@@ -36,22 +81,136 @@ class QueryService:
         normalized = ' '.join(query.lower().strip().split())
         return normalized
     
-    def _get_query_cache_key(self, query: str, top_k: int = 5) -> str:
+    def _normalize_filters(self, filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, str]]:
+        """Drop empty filters and lower-case the rest; matching is case-insensitive."""
+        if not filters:
+            return None
+        normalized = {key: str(value).lower() for key, value in filters.items() if value}
+        return normalized or None
+    
+    def _get_query_cache_key(self, query: str, top_k: int = 5,
+                             filters: Optional[Dict[str, Any]] = None) -> str:
         """Generate a hashed cache key for the query."""
         normalized_query = self._normalize_query(query)
-        # Include top_k in the key since it affects results
-        cache_input = f"{normalized_query}:top_k_{top_k}"
+        # Include top_k, filters and the index version in the key since all affect results
+        index_version = self.document_processor.index_version() or "none"
+        cache_input = f"{normalized_query}:top_k_{top_k}:index_{index_version}"
+        normalized_filters = self._normalize_filters(filters)
+        if normalized_filters:
+            cache_input += f":filters_{json.dumps(normalized_filters, sort_keys=True)}"
         # Hash to create a reasonable length key
         query_hash = hashlib.md5(cache_input.encode('utf-8')).hexdigest()
         return f"query_cache:{query_hash}"
     
+    def _record_query(self, query: str, top_k: int, filters: Optional[Dict[str, Any]], pipe=None):
+        """Count a normalized query in today's popularity set.
+        
+        Given a pipeline, the commands are only queued and go out with the
+        caller's; otherwise they are sent right away.
+        """
+        if not self.redis_enabled:
+            return
+        member = json.dumps({
+            "query": self._normalize_query(query),
+            "top_k": top_k,
+            "filters": self._normalize_filters(filters)
+        }, sort_keys=True)
+        key = f"{self.POPULAR_KEY_PREFIX}{time.strftime('%Y%m%d')}"
+        queued = pipe is not None
+        pipe = pipe if queued else self.redis_client.pipeline(transaction=False)
+        pipe.zincrby(key, 1, member)
+        pipe.expire(key, self.popular_query_days * 86400)
+        # Only the most frequent questions are ever warmed, so the long tail of one-off questions is dropped
+        pipe.zremrangebyrank(key, 0, -self.popular_query_max_members - 1)
+        if queued:
+            return
+        try:
+            pipe.execute()
+        except Exception as e:
+            print(f"Query stats error: {e}")
+    
+    def popular_queries(self, limit: int) -> List[Dict[str, Any]]:
+        """Most frequent normalized queries over the last POPULAR_QUERY_DAYS days."""
+        if not self.redis_enabled:
+            return []
+        now = time.time()
+        keys = [f"{self.POPULAR_KEY_PREFIX}{time.strftime('%Y%m%d', time.localtime(now - day * 86400))}"
+                for day in range(self.popular_query_days)]
+        # A key per call keeps concurrent warm-ups apart; the expiry cleans up after a crash
+        combined_key = f"{self.POPULAR_KEY_PREFIX}combined:{uuid.uuid4().hex}"
+        
+        pipe = self.redis_client.pipeline()
+        pipe.zunionstore(combined_key, keys)
+        pipe.expire(combined_key, 60)
+        pipe.zrevrange(combined_key, 0, limit - 1, withscores=True)
+        pipe.delete(combined_key)
+        ranked = pipe.execute()[2]
+        
+        return [{**json.loads(member), "count": int(count)} for member, count in ranked]
+    
+    def warm_cache(self, limit: Optional[int] = None,
+                   stop: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """Answer the most popular queries that are not cached for the current index.
+        
+        Language model calls are spaced to QUERY_WARMUP_RATE per second and the run
+        stops after QUERY_WARMUP_MAX_SECONDS, so warm-up never competes with users
+        for the provider's rate limit for long. Setting stop ends the run early,
+        e.g. when a newer index makes its answers outdated.
+        """
+        start = time.monotonic()
+        summary = {"candidates": 0, "warmed": 0, "already_cached": 0, "errors": 0}
+        interval = 1.0 / self.warmup_rate if self.warmup_rate > 0 else 0.0
+        next_call = start
+        stop = stop or threading.Event()
+        
+        for entry in self.popular_queries(limit if limit is not None else self.warmup_top_n):
+            summary["candidates"] += 1
+            if stop.is_set():
+                summary["stopped"] = "cancelled"
+                break
+            if time.monotonic() - start > self.warmup_max_seconds:
+                summary["stopped"] = "time budget"
+                break
+            
+            cache_key = self._get_query_cache_key(entry["query"], entry["top_k"], entry["filters"])
+            if self.redis_client.exists(cache_key):
+                summary["already_cached"] += 1
+                continue
+            
+            delay = next_call - time.monotonic()
+            if delay > 0 and stop.wait(delay):
+                summary["stopped"] = "cancelled"
+                break
+            next_call = time.monotonic() + interval
+            try:
+                self.process_query(entry["query"], entry["top_k"], entry["filters"], record=False)
+                summary["warmed"] += 1
+            except Exception as e:
+                print(f"Cache warm-up error for '{entry['query']}': {e}")
+                summary["errors"] += 1
+        
+        summary["seconds"] = round(time.monotonic() - start, 3)
+        return summary
+    
+    def _describe_location(self, chunk: Dict[str, Any]) -> str:
+        """Describe the section and pages a chunk came from, when known."""
+        parts = []
+        if chunk.get("section"):
+            parts.append(f"section \"{chunk['section']}\"")
+        if chunk.get("page_start"):
+            if chunk["page_start"] == chunk.get("page_end", chunk["page_start"]):
+                parts.append(f"page {chunk['page_start']}")
+            else:
+                parts.append(f"pages {chunk['page_start']}-{chunk['page_end']}")
+        return f" ({', '.join(parts)})" if parts else ""
+    
     def generate_response(self, query: str, context_chunks: List[Dict[str, Any]]) -> str:
-        """Generate a natural language response using OpenAI based on query and context."""
+        """Generate a natural language response with the language model based on query and context."""
         
-        # Prepare context from relevant chunks
+        # Prepare context from relevant chunks, merged and trimmed to the token budget
         context_text = "\n\n".join([
-            f"From {chunk['file_name']}:\n{chunk['chunk_text']}"
-            for chunk in context_chunks
+            f"From {block['file_name']}{self._describe_location(block)}:\n{block['chunk_text']}"
+            for block in self.context_builder.build(context_chunks)
         ])
         
         # Create system prompt based on the README requirements
@@ -68,37 +227,72 @@ class QueryService:
         Give a clear, accurate answer. Include steps if useful. If the manuals don’t fully answer, state what’s missing."""
 
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=500,
-                temperature=0.7
-            )
-            
-            return response.choices[0].message.content.strip()
+            return self.llm.complete(system_prompt, user_prompt)
             
         except Exception as e:
             return f"I apologize, but I encountered an error while processing your question: {str(e)}. Please try again or rephrase your question."
     
-    def process_query(self, query: str, top_k: int = 5) -> Dict[str, Any]:
-        """Process a user query and return a structured response."""
+    def process_query(self, query: str, top_k: int = 5,
+                      filters: Optional[Dict[str, Any]] = None, record: bool = True) -> Dict[str, Any]:
+        """Process a user query and return a structured response.
         
+        record=False keeps internal callers such as the cache warm-up out of the popularity counts.
+        """
         # Check Redis cache first
-        cache_key = self._get_query_cache_key(query, top_k)
+        cache_key = self._get_query_cache_key(query, top_k, filters)
         try:
-            cached_response = self.redis_client.get(cache_key)
-            if cached_response:
-                # Return cached response, bypassing OpenAI call completely
-                return json.loads(cached_response)
+            result = None
+            if self.redis_enabled:
+                # The popularity count goes out with the cache lookup, in one round trip
+                pipe = self.binary_client.pipeline(transaction=False)
+                pipe.get(cache_key)
+                if record:
+                    self._record_query(query, top_k, filters, pipe)
+                replies = pipe.execute(raise_on_error=False)
+                for reply in replies[1:]:
+                    if isinstance(reply, Exception):
+                        print(f"Query stats error: {reply}")
+                if isinstance(replies[0], Exception):
+                    raise replies[0]
+                result = self.cache_codec.read(cache_key, replies[0])
+            if result:
+                cached_at = result.pop("cached_at", None)
+                # Past the soft TTL the stale answer is still served; regeneration happens off the request path
+                if self.cache_soft_ttl and cached_at and time.time() - cached_at > self.cache_soft_ttl:
+                    self._schedule_refresh(cache_key, query, top_k, filters)
+                # Return cached response, bypassing the language model completely
+                return {**result, "cached": True}
         except Exception as e:
             # Log cache error but continue with normal processing
             print(f"Cache lookup error: {e}")
         
+        return self._answer_query(query, top_k, filters, cache_key)
+    
+    def _schedule_refresh(self, cache_key: str, query: str, top_k: int, filters: Optional[Dict[str, Any]]):
+        """Regenerate a stale answer in the background, once across all workers."""
+        # The lock is left to expire rather than released: a successful refresh makes the
+        # entry fresh again, and a failed one is retried no sooner than the lock TTL.
+        lock_key = f"query_refresh:{cache_key.split(':', 1)[1]}"
+        if self.redis_client.set(lock_key, "1", nx=True, ex=self.refresh_lock_ttl):
+            self.refresh_executor.submit(self._refresh_answer, cache_key, query, top_k, filters)
+    
+    def _refresh_answer(self, cache_key: str, query: str, top_k: int, filters: Optional[Dict[str, Any]]):
+        try:
+            self._answer_query(query, top_k, filters, cache_key)
+        except Exception as e:
+            print(f"Background refresh error: {e}")
+    
+    def _answer_query(self, query: str, top_k: int, filters: Optional[Dict[str, Any]],
+                      cache_key: str) -> Dict[str, Any]:
+        """Retrieve, generate and cache a fresh answer."""
         # Find relevant document chunks
-        similar_chunks = self.document_processor.find_similar_chunks(query, top_k)
+        if self.reranker:
+            candidates = self.document_processor.find_similar_chunks(
+                query, max(top_k, self.rerank_candidates), filters
+            )
+            similar_chunks = self.reranker.rerank(query, candidates, min(top_k, self.rerank_top_n))
+        else:
+            similar_chunks = self.document_processor.find_similar_chunks(query, top_k, filters)
         
         if not similar_chunks:
             result = {
@@ -110,7 +304,9 @@ class QueryService:
             }
             # Cache the no-results response too (shorter TTL)
             try:
-                self.redis_client.setex(cache_key, 3600, json.dumps(result))  # 1 hour for no-results
+                if self.redis_enabled:
+                    self.cache_codec.setex(self.binary_client, cache_key, 3600,  # 1 hour for no-results
+                                           {**result, "cached_at": time.time()}, "query_cache")
             except Exception as e:
                 print(f"Cache store error: {e}")
             return result
@@ -121,11 +317,15 @@ class QueryService:
         # Prepare source information
         sources = []
         for chunk in similar_chunks:
-            sources.append({
+            source = {
                 "file_name": chunk["file_name"],
                 "similarity_score": round(chunk["similarity"], 3),
                 "preview": chunk["chunk_text"][:200] + "..." if len(chunk["chunk_text"]) > 200 else chunk["chunk_text"]
-            })
+            }
+            for key in ("section", "page_start", "page_end", "also_in"):
+                if key in chunk:
+                    source[key] = chunk[key]
+            sources.append(source)
         
         # Determine confidence based on similarity scores
         max_similarity = max(chunk["similarity"] for chunk in similar_chunks)
@@ -146,7 +346,9 @@ class QueryService:
         
         # Store the result in Redis cache
         try:
-            self.redis_client.setex(cache_key, self.query_cache_ttl, json.dumps(result))
+            if self.redis_enabled:
+                self.cache_codec.setex(self.binary_client, cache_key, self.query_cache_ttl,
+                                       {**result, "cached_at": time.time()}, "query_cache")
         except Exception as e:
             print(f"Cache store error: {e}")
         
@@ -0,0 +1,53 @@
+"""
+Re-ranking service for ManualMind.
+Re-scores a retrieved candidate set with a small CPU cross-encoder, within a
+time budget, so only the best few chunks are sent to the language model.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import List, Dict, Any
+from sentence_transformers import CrossEncoder
+
+
+class CrossEncoderReranker:
+    """Re-orders candidate chunks by cross-encoder relevance under a latency budget."""
+
+    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+                 batch_size: int = 8, time_budget_ms: int = 200, workers: int = 4):
+        self.model = CrossEncoder(model_name)
+        self.batch_size = batch_size
+        self.time_budget = time_budget_ms / 1000.0
+        # Batches are scored off the request thread so a slow one can be abandoned at the deadline
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rerank")
+
+    def rerank(self, query: str, chunks: List[Dict[str, Any]], top_n: int) -> List[Dict[str, Any]]:
+        """Return the top_n chunks after cross-encoder scoring.
+
+        Candidates are scored in retrieval order, batch by batch, until the time
+        budget runs out; anything left unscored keeps its retrieval rank behind
+        the re-scored chunks. A batch still running at the deadline is abandoned,
+        so a model too slow for the budget leaves the retrieval order unchanged.
+        """
+        deadline = time.perf_counter() + self.time_budget
+        scored = []
+        position = 0
+
+        while position < len(chunks):
+            batch = chunks[position:position + self.batch_size]
+            future = self.executor.submit(
+                self.model.predict,
+                [(query, chunk["chunk_text"]) for chunk in batch],
+                batch_size=self.batch_size,
+                show_progress_bar=False
+            )
+            try:
+                scores = future.result(timeout=max(deadline - time.perf_counter(), 0))
+            except TimeoutError:
+                future.cancel()
+                break
+            scored.extend({**chunk, "rerank_score": float(score)} for chunk, score in zip(batch, scores))
+            position += len(batch)
+
+        scored.sort(key=lambda chunk: chunk["rerank_score"], reverse=True)
+        return (scored + chunks[position:])[:top_n]
@@ -0,0 +1,160 @@
+"""
+Sharded index support for ManualMind.
+Documents are partitioned across index shards by file name. Each shard is
+published as an ordinary snapshot under its own namespace and served from
+memory by shard_server.py. Queries are sent to every shard in parallel, and
+the per-shard top-k lists are merged, dropping shards that miss the deadline.
+In hybrid mode the shards return their dense and BM25 candidates unfused, and
+the merged rankings are fused once here.
+"""
+
+import json
+import time
+import zlib
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from .index_snapshot import IndexSnapshot
+from .lexical_index import reciprocal_rank_fusion
+from .manual_metadata import matches_filters
+
+
+def shard_for(file_name: str, shard_count: int) -> int:
+    """Shard a manual belongs to; stable across runs and processes."""
+    return zlib.crc32(file_name.encode("utf-8")) % shard_count
+
+
+def partition_documents(documents: List[Dict[str, Any]], shard_count: int) -> List[List[Dict[str, Any]]]:
+    """Split processed documents into one list per shard, keeping their order."""
+    shards = [[] for _ in range(shard_count)]
+    for doc_data in documents:
+        shards[shard_for(doc_data["file_name"], shard_count)].append(doc_data)
+    return shards
+
+
+def catalog_snapshot(version: str, shard_snapshots: List[IndexSnapshot]) -> IndexSnapshot:
+    """Snapshot without chunks or vectors that lists every shard's files and totals.
+
+    The API loads it in place of a full index, so /status, the processed file
+    list and index-versioned cache keys work unchanged in sharded mode.
+    """
+    files = []
+    for shard, snapshot in enumerate(shard_snapshots):
+        files.extend({**file_info, "start": 0, "end": 0, "shard": shard} for file_info in snapshot.files)
+
+    dimensions = next((snapshot.embeddings.shape[1] for snapshot in shard_snapshots if snapshot.embeddings.size), 0)
+    stats = {
+        "shards": len(shard_snapshots),
+        "chunks": sum(snapshot.stats.get("chunks", len(snapshot.chunks)) for snapshot in shard_snapshots),
+        "index_bytes": sum(snapshot.stats.get("index_bytes", 0) for snapshot in shard_snapshots)
+    }
+    if any("duplicate_chunks" in snapshot.stats for snapshot in shard_snapshots):
+        stats["duplicate_chunks"] = sum(snapshot.stats.get("duplicate_chunks", 0) for snapshot in shard_snapshots)
+    return IndexSnapshot(version, files, [], np.zeros((0, dimensions), dtype=np.float32), stats=stats)
+
+
+def route_shards(catalog: IndexSnapshot, shard_count: int, filters: Optional[Dict[str, Any]] = None) -> List[int]:
+    """Shards holding at least one manual that matches the filters; every shard when unfiltered."""
+    if not filters or not any(filters.values()):
+        return list(range(shard_count))
+    return sorted({
+        file_info["shard"] for file_info in catalog.files
+        if "shard" in file_info and matches_filters(file_info, filters)
+    })
+
+
+def fuse_shard_candidates(results: List[Dict[str, Any]], candidates: int, top_k: int,
+                          rrf_k: int = 60) -> List[Dict[str, Any]]:
+    """Fuse the shards' hybrid candidates with reciprocal rank fusion over the merged rankings.
+
+    The dense ranking is every shard's dense candidates by cosine score, the
+    BM25 ranking every shard's BM25 candidates by BM25 score, each cut to the
+    best candidates across all shards. BM25 scores use each shard's own term
+    statistics; with manuals spread by hash these stay close to global ones.
+    """
+    rankings = []
+    for score_key in ("dense_score", "bm25_score"):
+        ranked = [position for position, result in enumerate(results) if score_key in result]
+        ranked.sort(key=lambda position: results[position][score_key], reverse=True)
+        rankings.append(ranked[:candidates])
+
+    fused = []
+    for position, fused_score in reciprocal_rank_fusion(rankings, k=rrf_k)[:top_k]:
+        result = {key: value for key, value in results[position].items() if key not in ("dense_score", "bm25_score")}
+        result["fused_score"] = fused_score
+        fused.append(result)
+    return fused
+
+
+class ShardClient:
+    """Sends a search to shard services in parallel and merges their top-k lists.
+
+    Shards that fail, have not answered when deadline_ms runs out, or answer
+    from another index version than the payload's are left out of the merged
+    results.
+    """
+
+    def __init__(self, urls: List[str], deadline_ms: float = 500, max_workers: Optional[int] = None,
+                 api_key: Optional[str] = None):
+        self.urls = [url.rstrip("/") for url in urls]
+        self.deadline = deadline_ms / 1000.0
+        self.api_key = api_key
+        # Concurrent API queries share the pool, so it allows several in-flight searches per shard
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or 8 * len(self.urls),
+                                           thread_name_prefix="shard-search")
+        # Searches that came back without every shard, for monitoring
+        self.partial_searches = 0
+
+    def _post(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        request = urllib.request.Request(
+            f"{url}/search",
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json", **({"X-API-Key": self.api_key} if self.api_key else {})}
+        )
+        with urllib.request.urlopen(request, timeout=self.deadline) as response:
+            return json.load(response)
+
+    def gather(self, payload: Dict[str, Any],
+               shards: Optional[List[int]] = None) -> Tuple[List[Dict[str, Any]], List[int]]:
+        """All results of the answering shards, unmerged, and the shards that did not answer in time.
+
+        With a version in the payload, a shard still serving (or already
+        serving) another version is counted missing, so one search never mixes
+        two versions of the index.
+        """
+        shards = list(range(len(self.urls))) if shards is None else shards
+        if not shards:
+            return [], []
+
+        started = time.monotonic()
+        futures = {self.executor.submit(self._post, self.urls[shard], payload): shard for shard in shards}
+        done, _ = wait(futures, timeout=self.deadline)
+
+        results = []
+        missing = []
+        for future, shard in futures.items():
+            if future in done and future.exception() is None:
+                response = future.result()
+                if payload.get("version") is None or response.get("version") == payload["version"]:
+                    results.extend(response["results"])
+                    continue
+                reason = f"serves index version {response.get('version')}, expected {payload['version']}"
+            else:
+                reason = future.exception() if future in done else "deadline exceeded"
+                future.cancel()
+            missing.append(shard)
+            print(f"Shard {shard} ({self.urls[shard]}) left out of search: {reason}")
+
+        if missing:
+            self.partial_searches += 1
+            print(f"Search answered by {len(shards) - len(missing)} of {len(shards)} shards "
+                  f"in {(time.monotonic() - started) * 1000:.0f} ms")
+        return results, missing
+
+    def search(self, payload: Dict[str, Any],
+               shards: Optional[List[int]] = None) -> Tuple[List[Dict[str, Any]], List[int]]:
+        """Merged top_k results of the answering shards, and the shards that did not answer in time."""
+        results, missing = self.gather(payload, shards)
+        results.sort(key=lambda result: result["similarity"], reverse=True)
+        return results[:payload["top_k"]], missing
@@ -0,0 +1,141 @@
+"""
+ManualMind index shard service.
+Serves one shard of a sharded index from memory. The API embeds each question
+once and sends the vector to every shard. This process scores it against its
+own snapshot and returns the shard's top-k chunks, or in hybrid mode its dense
+and BM25 candidates for the API to fuse. It loads no embedding model.
+
+With MANUALMIND_API_KEY set, searches must carry it in X-API-Key, as the API
+sends them. Without it the service only listens on the loopback interface.
+
+Usage:
+    SHARD_ID=0 uvicorn shard_server:app --port 8101
+    python shard_server.py --shard 0 --port 8101
+"""
+
+import os
+import argparse
+import secrets
+import threading
+from contextlib import asynccontextmanager
+from typing import Annotated, Any, Dict, List, Optional
+from fastapi import Depends, FastAPI, Header, HTTPException
+from pydantic import BaseModel, Field
+from dotenv import load_dotenv
+
+from services.index_snapshot import IndexSnapshot, SnapshotStore
+from services.lexical_index import MAX_POSTINGS_PER_TERM
+
+load_dotenv()
+
+API_KEY = os.getenv("MANUALMIND_API_KEY")
+# Requests asking for more are clamped, so one search cannot make a shard return its whole index
+MAX_TOP_K = int(os.getenv("SHARD_MAX_TOP_K", 100))
+MAX_CANDIDATES = int(os.getenv("SHARD_MAX_CANDIDATES", 1000))
+
+
+class ShardSearchRequest(BaseModel):
+    version: Optional[str] = None
+    query: str
+    embedding: List[float]
+    top_k: int = Field(default=5, ge=1)
+    filters: Optional[Dict[str, Any]] = None
+    retrieval_mode: str = "dense"
+    quantization: str = "none"
+    rescore_candidates: int = Field(default=100, ge=1)
+    rescore_fraction: float = Field(default=0.0, ge=0.0, le=1.0)
+    hybrid_candidates: int = Field(default=100, ge=1)
+    hybrid_max_postings: int = MAX_POSTINGS_PER_TERM
+
+
+class ShardIndex:
+    """The current snapshot of one shard, reloaded in the background when a new version is published."""
+
+    def __init__(self, shard: int):
+        self.shard = shard
+        self.store = SnapshotStore(shard=shard)
+        self.snapshot: Optional[IndexSnapshot] = None
+        self._lock = threading.Lock()
+        self.store.start_listener(self.load)
+        self.load()
+
+    def load(self, version: Optional[str] = None):
+        with self._lock:
+            if self.snapshot and self.snapshot.version == version:
+                return
+            snapshot = self.store.load(version)
+            if snapshot:
+                self.snapshot = snapshot
+
+
+shard_index: Optional[ShardIndex] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global shard_index
+    shard_index = ShardIndex(int(os.getenv("SHARD_ID", 0)))
+    yield
+
+
+app = FastAPI(title="ManualMind index shard", version="1.0.0", lifespan=lifespan)
+
+
+def verify_api_key(x_api_key: Annotated[str | None, Header()] = None) -> bool:
+    """Require the shared API key when one is configured."""
+    if API_KEY and not (x_api_key and secrets.compare_digest(x_api_key, API_KEY)):
+        raise HTTPException(status_code=401, detail="Invalid or missing API key")
+    return True
+
+
+@app.post("/search")
+def search(request: ShardSearchRequest, authenticated: bool = Depends(verify_api_key)):
+    """Top-k chunks of this shard for an embedded question, or its hybrid candidates."""
+    snapshot = shard_index.snapshot
+    if not snapshot:
+        return {"shard": shard_index.shard, "version": None, "results": []}
+
+    top_k = min(request.top_k, MAX_TOP_K)
+    rescore_candidates = min(request.rescore_candidates, MAX_CANDIDATES)
+    if request.retrieval_mode == "hybrid":
+        # Unfused: rank fusion needs the rankings merged across shards, so the API does it
+        results = snapshot.hybrid_candidates(request.query, request.embedding,
+                                             candidates=min(max(request.hybrid_candidates, top_k), MAX_CANDIDATES),
+                                             filters=request.filters, quantization=request.quantization,
+                                             rescore_candidates=rescore_candidates,
+                                             rescore_fraction=request.rescore_fraction,
+                                             max_postings=request.hybrid_max_postings)
+    else:
+        results = snapshot.search(request.embedding, top_k, request.filters,
+                                  quantization=request.quantization,
+                                  rescore_candidates=rescore_candidates,
+                                  rescore_fraction=request.rescore_fraction)
+    return {"shard": shard_index.shard, "version": snapshot.version, "results": results}
+
+
+@app.get("/health")
+async def health_check():
+    snapshot = shard_index.snapshot
+    return {
+        "status": "healthy",
+        "shard": shard_index.shard,
+        "version": snapshot.version if snapshot else None,
+        "chunks": len(snapshot.chunks) if snapshot else 0
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve one ManualMind index shard")
+    parser.add_argument("--shard", type=int, default=int(os.getenv("SHARD_ID", 0)),
+                        help="Shard number: the position of its URL in INDEX_SHARD_URLS")
+    parser.add_argument("--host", default=os.getenv("SHARD_HOST", "127.0.0.1"),
+                        help="Interface to listen on; other than loopback only with MANUALMIND_API_KEY set")
+    parser.add_argument("--port", type=int, default=8101)
+    args = parser.parse_args()
+    if not API_KEY and args.host not in ("127.0.0.1", "::1", "localhost"):
+        parser.error(f"--host {args.host} exposes the shard without authentication; set MANUALMIND_API_KEY")
+
+    os.environ["SHARD_ID"] = str(args.shard)
+    uvicorn.run(app, host=args.host, port=args.port)
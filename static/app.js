@@ -160,7 +160,7 @@ class ManualMindApp {
             }
 
             const data = await response.json();
-            this.showSuccess('Document processing started. Check the status indicator for progress.');
+            this.showSuccess('Document processing queued. Check the status indicator for progress.');
             
             // Refresh status after a short delay
             setTimeout(() => this.checkSystemStatus(), 2000);
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test script for cache payload compression.
+Checks zlib and zstd round trips, that entries written before compression
+are still readable, and the per-namespace byte counters (the counters need a
+Redis server at REDIS_HOST / REDIS_PORT).
+"""
+
+import sys
+import os
+import json
+import uuid
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import redis
+
+from services.cache_codec import ZLIB_HEADER, ZSTD_HEADER, CacheCodec
+from tests_support import delete_keys, redis_available, settings
+
+ANSWER = {
+    "query": "How do I save a patch on the SYSTEM-8?",
+    "response": "Press [WRITE], select the destination with the value dial and press [WRITE] again. " * 20,
+    "sources": [{"file_name": "SYSTEM-8_eng02_W.pdf", "similarity_score": 0.81, "page_start": 12}],
+    "confidence": "high",
+    "total_sources": 1
+}
+
+
+def make_codec(**values) -> CacheCodec:
+    """Codec built with the given CACHE_* settings, leaving the environment as it was."""
+    with settings(**values):
+        return CacheCodec()
+
+
+def test_zlib_round_trip():
+    """Large payloads are compressed with a header, small ones stay plain JSON."""
+    print("🔍 Testing zlib round trip...")
+
+    codec = make_codec(CACHE_COMPRESSION="zlib", CACHE_COMPRESSION_THRESHOLD="256")
+    data = codec.encode(ANSWER)
+    assert data.startswith(ZLIB_HEADER)
+    assert len(data) < len(json.dumps(ANSWER)) / 4
+    assert codec.decode(data) == ANSWER
+
+    small = {"query": "hi", "sources": []}
+    assert codec.encode(small) == json.dumps(small).encode("utf-8")
+    assert codec.decode(codec.encode(small)) == small
+
+    plain = make_codec(CACHE_COMPRESSION="none")
+    assert plain.encode(ANSWER) == json.dumps(ANSWER).encode("utf-8")
+    # Entries stay readable after compression is switched off
+    assert plain.decode(data) == ANSWER
+    print(f"✅ zlib: {len(json.dumps(ANSWER))} -> {len(data)} bytes")
+
+
+def test_zstd_round_trip():
+    """zstd payloads round-trip, and readers without zstd treat them as misses."""
+    print("\n🔍 Testing zstd round trip...")
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        print("⚠️ zstandard not installed, skipping")
+        return
+
+    codec = make_codec(CACHE_COMPRESSION="zstd", CACHE_COMPRESSION_THRESHOLD="256")
+    data = codec.encode(ANSWER)
+    assert data.startswith(ZSTD_HEADER)
+    assert codec.decode(data) == ANSWER
+
+    zlib_codec = make_codec(CACHE_COMPRESSION="zlib")
+    try:
+        zlib_codec.decode(data)
+        assert False, "zstd payload decoded without zstd"
+    except ValueError:
+        pass
+    # A zstd reader still reads zlib entries written before the switch
+    assert codec.decode(zlib_codec.encode(ANSWER)) == ANSWER
+    print(f"✅ zstd: {len(json.dumps(ANSWER))} -> {len(data)} bytes")
+
+
+def test_legacy_entries_without_header():
+    """Plain JSON written before compression existed decodes unchanged."""
+    print("\n🔍 Testing legacy entries...")
+
+    legacy = json.dumps(ANSWER).encode("utf-8")
+    for algorithm in ("zlib", "zstd", "none"):
+        assert make_codec(CACHE_COMPRESSION=algorithm).decode(legacy) == ANSWER
+    print("✅ Legacy JSON entries readable with every setting")
+
+
+def test_stats_counters():
+    """setex counts writes, raw and stored bytes and compressed entries per namespace."""
+    print("\n🔍 Testing compression stats...")
+
+    client = redis.Redis(
+        host=os.getenv("REDIS_HOST", "localhost"),
+        port=int(os.getenv("REDIS_PORT", 6379)),
+        db=int(os.getenv("REDIS_DB", 0))
+    )
+    if not redis_available(client):
+        return
+
+    codec = make_codec(CACHE_COMPRESSION="zlib", CACHE_COMPRESSION_THRESHOLD="256")
+    prefix = f"test:{uuid.uuid4().hex[:8]}"
+    codec.STATS_KEY = f"{prefix}:compression_stats"
+    small = {"query": "hi", "sources": []}
+    try:
+        stored = codec.setex(client, f"{prefix}:a", 60, ANSWER, "query_cache")
+        stored += codec.setex(client, f"{prefix}:b", 60, small, "query_cache")
+        codec.setex(client, f"{prefix}:c", 60, small, "doc")
+
+        assert codec.get(client, f"{prefix}:a") == ANSWER
+        assert codec.get(client, f"{prefix}:b") == small
+        assert codec.get(client, f"{prefix}:missing") is None
+        client.set(f"{prefix}:broken", ZLIB_HEADER + b"not zlib")
+        assert codec.get(client, f"{prefix}:broken") is None
+
+        stats = codec.stats(client)
+        assert stats["algorithm"] == "zlib" and stats["threshold"] == 256
+        answers = stats["namespaces"]["query_cache"]
+        raw = len(json.dumps(ANSWER)) + len(json.dumps(small))
+        assert answers["writes"] == 2 and answers["compressed"] == 1
+        assert answers["raw_bytes"] == raw and answers["stored_bytes"] == stored
+        assert answers["ratio"] == round(raw / stored, 2)
+        assert stats["namespaces"]["doc"] == {
+            "writes": 1, "raw_bytes": len(json.dumps(small)), "stored_bytes": len(json.dumps(small)), "ratio": 1.0
+        }
+        print(f"✅ Stats counted: {answers}")
+    finally:
+        delete_keys(client, f"{prefix}:*")
+
+
+if __name__ == "__main__":
+    test_zlib_round_trip()
+    test_zstd_round_trip()
+    test_legacy_entries_without_header()
+    test_stats_counters()
+    print("\n🎉 Cache codec tests passed!")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test script for the structure-aware chunker.
+Checks that tables and numbered procedures are never split mid-row and that
+chunks carry their section title and page range.
+"""
+
+import sys
+import os
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.chunking import StructuredChunker
+
+
+MANUAL_PAGES = [
+    """3 OSCILLATOR
+The oscillator section generates the basic waveform. Choose the wave with the knob.
+
+Parameter    Value    Explanation
+OSC1 WAVE    SAW, SQR    Selects the waveform
+OSC1 PITCH   -24..+24    Pitch in semitones
+OSC1 DETUNE   -50..+50    Fine tuning in cents
+""",
+    """4 LFO
+1. Press the [LFO] button.
+2. Turn the [RATE] knob to set
+   the modulation speed.
+3. Press [EXIT] to return.
+"""
+]
+
+
+def test_sections_and_pages():
+    """Chunks record the section they belong to and the pages they span."""
+    print("🔍 Testing section and page metadata...")
+
+    chunks = StructuredChunker(max_tokens=256).chunk_pages(MANUAL_PAGES)
+
+    assert [chunk["section"] for chunk in chunks] == ["3 OSCILLATOR", "4 LFO"]
+    assert (chunks[0]["page_start"], chunks[0]["page_end"]) == (1, 1)
+    assert (chunks[1]["page_start"], chunks[1]["page_end"]) == (2, 2)
+    assert chunks[1]["text"].startswith("4 LFO")
+    print("✅ Sections and page ranges recorded")
+
+
+def test_rows_never_split():
+    """Even with a tiny token limit every table row and procedure step stays whole."""
+    print("\n🔍 Testing table rows and procedure steps stay intact...")
+
+    chunks = StructuredChunker(max_tokens=24).chunk_pages(MANUAL_PAGES)
+    lines = [line.strip() for chunk in chunks for line in chunk["text"].splitlines()]
+
+    assert "OSC1 PITCH   -24..+24    Pitch in semitones" in lines
+    assert "2. Turn the [RATE] knob to set the modulation speed." in lines
+    print(f"✅ {len(chunks)} chunks, no row or step split across chunks")
+
+
+if __name__ == "__main__":
+    test_sections_and_pages()
+    test_rows_never_split()
+    print("\n🎉 Chunking tests passed!")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test script for token-budgeted prompt context assembly.
+Checks overlap de-duplication, neighbour merging and the token budget.
+"""
+
+import sys
+import os
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.context_builder import ContextBuilder
+
+
+def count_words(text):
+    return len(text.split())
+
+
+def make_chunk(file_name, index, text, similarity):
+    return {"file_name": file_name, "chunk_index": index, "chunk_text": text, "similarity": similarity}
+
+
+def test_overlap_is_merged_once():
+    """Adjacent chunks from one file become one block without the repeated overlap."""
+    print("🔍 Testing overlap de-duplication...")
+
+    overlap = "the vocoder uses the microphone input on the rear panel."
+    chunks = [
+        make_chunk("JUNO-X.pdf", 4, "Connect a microphone. " + overlap, 0.9),
+        make_chunk("JUNO-X.pdf", 5, overlap + " Press MODEL BANK.", 0.8),
+    ]
+
+    blocks = ContextBuilder(token_budget=500, count_tokens=count_words).build(chunks)
+
+    assert len(blocks) == 1
+    assert blocks[0]["chunk_text"].count(overlap) == 1
+    assert blocks[0]["chunk_indices"] == [4, 5]
+    print("✅ Overlap sent once in a single merged block")
+
+
+def test_budget_filled_in_score_order():
+    """Chunks that do not fit are skipped and the best chunk always comes first."""
+    print("\n🔍 Testing token budget...")
+
+    chunks = [
+        make_chunk("a.pdf", 0, "word " * 40, 0.9),
+        make_chunk("b.pdf", 7, "word " * 80, 0.8),
+        make_chunk("c.pdf", 3, "word " * 20, 0.7),
+    ]
+
+    blocks = ContextBuilder(token_budget=70, count_tokens=count_words).build(chunks)
+
+    assert [block["file_name"] for block in blocks] == ["a.pdf", "c.pdf"]
+    assert sum(count_words(block["chunk_text"]) for block in blocks) <= 70
+    print("✅ Budget respected, oversized chunk skipped")
+
+
+if __name__ == "__main__":
+    test_overlap_is_merged_once()
+    test_budget_filled_in_score_order()
+    print("\n🎉 Context builder tests passed!")
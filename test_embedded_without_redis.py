@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test script for the embedded MCP backend without Redis.
+Points REDIS_PORT at a closed port and stores the index on disk, then indexes
+a manual and answers questions with the stub language model. Nothing may wait
+on Redis: the index pointer is the CURRENT file and answers are not cached.
+"""
+
+import sys
+import os
+import asyncio
+import shutil
+import tempfile
+import time
+
+# Add the project root and the MCP server to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "mcp_server"))
+
+from embedded_backend import EmbeddedBackend
+from tests_support import settings
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+MANUAL = "SYSTEM-8_eng02_W.pdf"
+
+
+def make_backend(work_dir: str) -> EmbeddedBackend:
+    """Embedded backend with a disk index in work_dir and no Redis, leaving the environment as it was."""
+    values = {
+        # Nothing listens on port 1
+        "REDIS_HOST": "localhost",
+        "REDIS_PORT": "1",
+        "INDEX_STORAGE": "disk",
+        "INDEX_DIR": os.path.join(work_dir, "index"),
+        "MANUALMIND_MEDIA": os.path.join(work_dir, "media"),
+        "LLM_PROVIDER": "stub",
+        "STUB_LLM_LATENCY_MS": "0",
+        "STUB_LLM_TOKENS_PER_SEC": "0",
+        "INDEX_POLL_INTERVAL": "1"
+    }
+    with settings(**values):
+        return EmbeddedBackend(ROOT)
+
+
+def test_embedded_backend_without_redis():
+    """Indexing, status and queries work with a disk index and Redis unreachable."""
+    print("🔍 Testing embedded backend without Redis...")
+    if not os.path.exists(os.path.join(ROOT, "media", MANUAL)):
+        print(f"⚠️ media/{MANUAL} not found, skipping")
+        return
+
+    work_dir = tempfile.mkdtemp(prefix="manualmind-embedded-")
+    try:
+        os.makedirs(os.path.join(work_dir, "media"))
+        shutil.copy(os.path.join(ROOT, "media", MANUAL), os.path.join(work_dir, "media"))
+        backend = make_backend(work_dir)
+        assert not backend.query_service.redis_enabled
+
+        processed = asyncio.run(backend.process_documents())
+        assert processed["status"] == "completed", processed
+        assert (backend.document_processor.snapshot_store.index_dir / "CURRENT").exists()
+
+        status = asyncio.run(backend.status())
+        assert status["redis_status"] == "not used"
+        assert status["available_files"] == [MANUAL] and status["index_version"]
+
+        question = "How do I turn the arpeggiator on?"
+        started = time.monotonic()
+        first = asyncio.run(backend.query(question))
+        second = asyncio.run(backend.query(question))
+        assert first["sources"] and first["sources"][0]["file_name"] == MANUAL
+        assert "cached" not in first and "cached" not in second
+        # A Redis client retrying a closed port takes seconds per call
+        elapsed = time.monotonic() - started
+        assert elapsed < 2, f"queries took {elapsed:.1f}s"
+        print(f"✅ Indexed, then answered twice without Redis in {elapsed:.2f}s")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_embedded_backend_without_redis()
+    print("\n🎉 Embedded backend tests passed!")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script for query embedding micro-batching.
+Checks that concurrent queries share model calls and that every caller gets
+its own vector back, or the model's error.
+"""
+
+import sys
+import os
+import threading
+import time
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from services.embedding_batcher import EmbeddingBatcher
+
+
+class RecordingModel:
+    """Embeds "n" as [n, n] and records the size of every batch."""
+
+    def __init__(self, delay: float = 0.005):
+        self.delay = delay
+        self.batch_sizes = []
+
+    def encode(self, texts):
+        time.sleep(self.delay)
+        self.batch_sizes.append(len(texts))
+        return np.array([[float(text)] * 2 for text in texts], dtype=np.float32)
+
+
+def test_concurrent_queries_are_batched():
+    """Concurrent callers share batches and each receives its own embedding."""
+    print("🔍 Testing concurrent query batching...")
+
+    model = RecordingModel()
+    batcher = EmbeddingBatcher(model, max_batch_size=8, max_wait_ms=5)
+    results = {}
+
+    def query(n):
+        results[n] = batcher.encode(str(n))
+
+    threads = [threading.Thread(target=query, args=(n,)) for n in range(40)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(np.array_equal(results[n], [n, n]) for n in range(40))
+    assert sum(model.batch_sizes) == 40
+    assert max(model.batch_sizes) <= 8
+    assert len(model.batch_sizes) < 40
+    print(f"✅ 40 queries embedded in {len(model.batch_sizes)} batches")
+
+
+def test_model_errors_reach_every_caller():
+    """A failing batch raises in each waiting caller and the batcher keeps working."""
+    print("🔍 Testing error propagation...")
+
+    class FlakyModel(RecordingModel):
+        def encode(self, texts):
+            if "fail" in texts:
+                raise ValueError("model failed")
+            return super().encode(texts)
+
+    batcher = EmbeddingBatcher(FlakyModel(delay=0), max_batch_size=4, max_wait_ms=0)
+    try:
+        batcher.encode("fail")
+        assert False, "expected the model error"
+    except ValueError as e:
+        assert str(e) == "model failed"
+
+    assert np.array_equal(batcher.encode("3"), [3, 3])
+    print("✅ Errors propagate without stopping the batcher")
+
+
+if __name__ == "__main__":
+    test_concurrent_queries_are_batched()
+    test_model_errors_reach_every_caller()
+    print("\n🎉 Embedding batcher tests passed!")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test script for file fingerprints kept in the index manifest.
+Checks that unchanged files reuse the fingerprint of the current index
+without being read, that changed files are hashed again, and that only the
+files of the current index are remembered.
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+
+# Add the project root and the benchmarks to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+import numpy as np
+
+from common import HashEmbedder
+from services.document_processor import DocumentProcessor
+from services.index_snapshot import IndexSnapshot
+
+
+def test_fingerprints_come_from_the_manifest():
+    """Known, unchanged files are not hashed again; changed and removed files are not remembered."""
+    print("🔍 Testing manifest fingerprints...")
+
+    work_dir = tempfile.mkdtemp(prefix="manualmind-fingerprints-")
+    try:
+        processor = DocumentProcessor(HashEmbedder(16))
+        paths = []
+        for name in ("SYSTEM-8_eng01_W.pdf", "JUNO-X_eng01_W.pdf"):
+            path = os.path.join(work_dir, name)
+            with open(path, "wb") as f:
+                f.write(name.encode() * 100)
+            paths.append(path)
+
+        fingerprints = [processor.fingerprint_file(path) for path in paths]
+        assert fingerprints[0]["path"] == os.path.abspath(paths[0]) and len(fingerprints[0]["hash"]) == 32
+        assert fingerprints[0]["hash"] != fingerprints[1]["hash"]
+
+        # Only the first manual is in the index
+        processor.use_snapshot(IndexSnapshot.from_documents("v1", [{
+            "file_name": "SYSTEM-8_eng01_W.pdf", "file_path": paths[0], "file_hash": fingerprints[0]["hash"],
+            "chunks": ["s8 oscillators"], "embeddings": np.ones((1, 16), dtype=np.float32),
+            "fingerprint": fingerprints[0]
+        }]))
+        known = processor.indexed_fingerprints()
+        assert known == {fingerprints[0]["path"]: fingerprints[0]}
+
+        # A stored hash is trusted while size and mtime match, so the file is not read
+        known[fingerprints[0]["path"]] = {**fingerprints[0], "hash": "from-manifest"}
+        assert processor.fingerprint_file(paths[0], known)["hash"] == "from-manifest"
+
+        stat = os.stat(paths[0])
+        os.utime(paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert processor.fingerprint_file(paths[0], known)["hash"] == fingerprints[0]["hash"]
+        assert processor.fingerprint_file(paths[1], known) == fingerprints[1]
+        print("✅ Unchanged files reuse the manifest fingerprint, changed files are hashed")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_fingerprints_come_from_the_manifest()
+    print("\n🎉 File fingerprint tests passed!")
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Test script for index snapshot storage.
+Needs a Redis server (REDIS_HOST / REDIS_PORT). Publishes snapshots to Redis
+and to disk, loads them back, and checks that versions beyond
+INDEX_KEEP_VERSIONS are deleted.
+"""
+
+import sys
+import os
+import json
+import random
+import shutil
+import tempfile
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from services.index_snapshot import IndexSnapshot, RedisRows, SnapshotStore, new_index_version
+from tests_support import delete_keys, embed, redis_available, settings
+
+
+def make_snapshot(version: str) -> IndexSnapshot:
+    documents = []
+    for file_name, chunks in [
+        ("SYSTEM-8_eng01_W.pdf", ["The SYSTEM-8 has three oscillators.", "Press WRITE to store the patch."]),
+        ("JUPITER-X_eng01_W.pdf", ["The JUPITER-X has five parts.", "Hold SHIFT and turn the dial.", "Ünïcödé text."]),
+    ]:
+        documents.append({
+            "file_name": file_name,
+            "chunks": chunks,
+            "chunk_metadata": [{"page_start": page, "page_end": page} for page in range(1, len(chunks) + 1)],
+            "embeddings": embed(chunks)
+        })
+    return IndexSnapshot.from_documents(version, documents)
+
+
+def make_store(storage: str, index_dir: str, **extra_settings):
+    """Store in a namespace of its own, or None when Redis is not reachable."""
+    with settings(INDEX_STORAGE=storage, INDEX_DIR=index_dir, INDEX_KEEP_VERSIONS="2", **extra_settings):
+        # A shard namespace keeps the test clear of the real index pointer and processed_files
+        store = SnapshotStore(shard=random.randint(10_000, 99_999))
+    return store if redis_available(store.redis_client) else None
+
+
+def cleanup(store: SnapshotStore):
+    delete_keys(store.redis_client, f"{store.namespace}:*")
+
+
+def check_round_trip(storage: str):
+    print(f"🔍 Testing {storage} snapshot round trip...")
+    index_dir = tempfile.mkdtemp(prefix="manualmind-index-")
+    store = make_store(storage, index_dir)
+    if not store:
+        return
+
+    try:
+        snapshot = make_snapshot(new_index_version())
+        store.publish(snapshot)
+        assert store.current_version() == snapshot.version
+
+        loaded = store.load()
+        assert loaded.version == snapshot.version
+        assert list(loaded.chunks) == list(snapshot.chunks)
+        assert loaded.file_names == snapshot.file_names
+        assert loaded.stats["chunks"] == 5 and loaded.stats["documents"] == 2
+        for name, array in snapshot.arrays().items():
+            assert np.array_equal(loaded.arrays()[name], array), name
+
+        query = embed(["Hold SHIFT and turn the dial."])[0]
+        assert loaded.search(query, top_k=2) == snapshot.search(query, top_k=2)
+        filters = {"file_name": "SYSTEM-8_eng01_W.pdf"}
+        assert loaded.search(query, top_k=2, filters=filters) == snapshot.search(query, top_k=2, filters=filters)
+        print(f"✅ {storage} snapshot loads back identical")
+    finally:
+        cleanup(store)
+        shutil.rmtree(index_dir, ignore_errors=True)
+
+
+def check_pruning(storage: str):
+    print(f"🔍 Testing {storage} version pruning...")
+    index_dir = tempfile.mkdtemp(prefix="manualmind-index-")
+    store = make_store(storage, index_dir)
+    if not store:
+        return
+
+    try:
+        versions = [f"v{number}" for number in range(1, 5)]
+        for version in versions:
+            store.publish(make_snapshot(version))
+
+        # The newest two versions stay loadable, older ones are gone everywhere
+        assert store.redis_client.lrange(store.versions_key, 0, -1) == ["v4", "v3"]
+        assert store.load("v4").version == "v4" and store.load("v3").version == "v3"
+        assert store.load("v2") is None and store.load("v1") is None
+        if storage == "disk":
+            assert sorted(path.name for path in store.index_dir.iterdir()) == ["CURRENT", "v3", "v4"]
+        else:
+            assert not store.redis_client.exists(store._key("v1", "manifest"), store._key("v2", "arrays"))
+        print(f"✅ {storage} keeps {store.keep_versions} versions")
+    finally:
+        cleanup(store)
+        shutil.rmtree(index_dir, ignore_errors=True)
+
+
+def test_quantized_redis_rows():
+    """With int8 search, a Redis snapshot loads its codes and fetches float rows on demand."""
+    print("🔍 Testing quantized Redis snapshot...")
+    store = make_store("redis", tempfile.gettempdir(), INDEX_QUANTIZATION="int8", INT8_MIN_CHUNKS="0")
+    if not store:
+        return
+
+    try:
+        snapshot = make_snapshot(new_index_version())
+        store.publish(snapshot)
+        loaded = store.load()
+        assert isinstance(loaded.embeddings, RedisRows) and loaded.int8_codes is not None
+        assert np.array_equal(loaded.embeddings[[4, 0]], snapshot.embeddings[[4, 0]])
+        assert np.array_equal(loaded.embeddings[1:3], snapshot.embeddings[1:3])
+        assert np.array_equal(loaded.embeddings[-1], snapshot.embeddings[-1])
+
+        query = embed(["Hold SHIFT and turn the dial."])[0]
+        assert loaded.search(query, top_k=2, quantization="int8") == snapshot.search(query, top_k=2)
+        print("✅ Codes loaded, float rows fetched only for rescoring")
+    finally:
+        cleanup(store)
+
+
+def test_small_index_skips_int8():
+    """Below INT8_MIN_CHUNKS no codes are stored and int8 searches score the float matrix."""
+    print("🔍 Testing int8 below the size threshold...")
+    store = make_store("redis", tempfile.gettempdir(), INDEX_QUANTIZATION="int8", INT8_MIN_CHUNKS="6")
+    if not store:
+        return
+
+    try:
+        snapshot = make_snapshot(new_index_version())
+        # Codes built during ingestion are dropped when the snapshot is published
+        snapshot.int8_index()
+        store.publish(snapshot)
+        loaded = store.load()
+        assert loaded.stats["int8_fallback"] == "none"
+        assert isinstance(loaded.embeddings, np.ndarray) and loaded.int8_codes is None
+
+        query = embed(["Hold SHIFT and turn the dial."])[0]
+        assert loaded.search(query, top_k=2, quantization="int8") == snapshot.search(query, top_k=2)
+        assert loaded.int8_codes is None
+        print("✅ Float matrix loaded and searched, no int8 codes stored")
+    finally:
+        cleanup(store)
+
+
+def test_redis_chunk_texts_compressed():
+    """Chunk texts are stored compressed in Redis, and versions stored as plain JSON still load."""
+    print("🔍 Testing compressed chunk texts...")
+    store = make_store("redis", tempfile.gettempdir(), CACHE_COMPRESSION="zlib")
+    if not store:
+        return
+
+    try:
+        chunks = [f"Step {step}: press WRITE, select the patch number and press ENTER." for step in range(200)]
+        snapshot = IndexSnapshot.from_documents(new_index_version(), [
+            {"file_name": "SYSTEM-8_eng01_W.pdf", "chunks": chunks, "embeddings": embed(chunks)}
+        ])
+        store.publish(snapshot)
+        stored = store.binary_client.get(store._key(snapshot.version, "chunks"))
+        raw_bytes = len(json.dumps(chunks).encode())
+        assert stored.startswith(b"\x00Z") and len(stored) * 5 < raw_bytes
+        assert store.load().stats["stored_chunk_bytes"] == len(stored)
+        assert list(store.load().chunks) == chunks
+
+        store.binary_client.set(store._key(snapshot.version, "chunks"), json.dumps(chunks))
+        assert list(store.load().chunks) == chunks
+        print(f"✅ {raw_bytes} bytes of chunk text stored in {len(stored)}")
+    finally:
+        cleanup(store)
+
+
+def test_round_trip():
+    """A published snapshot loads back with the same chunks, arrays and search results."""
+    for storage in ("redis", "disk"):
+        check_round_trip(storage)
+
+
+def test_pruning():
+    """Only the newest INDEX_KEEP_VERSIONS versions are kept."""
+    for storage in ("redis", "disk"):
+        check_pruning(storage)
+
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_pruning()
+    test_quantized_redis_rows()
+    test_small_index_skips_int8()
+    test_redis_chunk_texts_compressed()
+    print("\n🎉 Index snapshot tests passed!")
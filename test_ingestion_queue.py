@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script for the ingestion job queue.
+Needs a Redis server (REDIS_HOST / REDIS_PORT). Checks that concurrent
+triggers share one waiting job and that jobs of a worker that died mid-run
+are queued again when it restarts.
+"""
+
+import sys
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.ingestion_queue import IngestionQueue
+
+
+def make_queue(worker_id: str):
+    """Queue on its own keys, or None when Redis is not reachable."""
+    queue = IngestionQueue(worker_id=worker_id)
+    try:
+        queue.redis_client.ping()
+    except Exception as e:
+        print(f"⚠️ Redis not available, skipping: {e}")
+        return None
+
+    prefix = f"test:{uuid.uuid4().hex[:8]}:"
+    queue.QUEUE_KEY = prefix + "queue"
+    queue.PENDING_KEY = prefix + "pending"
+    queue.JOB_KEY_PREFIX = prefix + "job:"
+    queue.processing_key = prefix + "processing:" + worker_id
+    return queue
+
+
+def cleanup(queue: IngestionQueue):
+    keys = list(queue.redis_client.scan_iter(match=queue.QUEUE_KEY.rsplit(":", 1)[0] + ":*"))
+    if keys:
+        queue.redis_client.delete(*keys)
+
+
+def test_concurrent_triggers_share_one_job():
+    """Many simultaneous enqueues queue exactly one job and all get its record."""
+    print("🔍 Testing concurrent ingestion triggers...")
+    queue = make_queue("worker-a")
+    if not queue:
+        return
+
+    try:
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            jobs = list(executor.map(lambda _: queue.enqueue("media"), range(64)))
+        assert len({job["job_id"] for job in jobs}) == 1
+        assert queue.redis_client.llen(queue.QUEUE_KEY) == 1
+        assert queue.get_job(jobs[0]["job_id"])["status"] == "queued"
+
+        # Once the job is taken, a new trigger queues a fresh run
+        taken = queue.dequeue(timeout=1)
+        assert taken["job_id"] == jobs[0]["job_id"] and taken["status"] == "running"
+        assert queue.enqueue("media")["job_id"] != taken["job_id"]
+        print("✅ One job queued for 64 concurrent triggers")
+    finally:
+        cleanup(queue)
+
+
+def test_unfinished_jobs_are_requeued():
+    """A job taken by a worker that never completed it is queued again on restart."""
+    print("🔍 Testing recovery of unfinished jobs...")
+    queue = make_queue("worker-b")
+    if not queue:
+        return
+
+    try:
+        job = queue.enqueue("media")
+        assert queue.dequeue(timeout=1)["job_id"] == job["job_id"]
+        assert queue.redis_client.llen(queue.QUEUE_KEY) == 0
+
+        # The worker dies here; its replacement starts with the same id
+        assert queue.requeue_unfinished() == 1
+        retried = queue.dequeue(timeout=1)
+        assert retried["job_id"] == job["job_id"]
+
+        queue.complete(retried["job_id"])
+        assert queue.requeue_unfinished() == 0
+        assert queue.dequeue(timeout=1) is None
+        print("✅ Unfinished job re-queued once, finished job dropped")
+    finally:
+        cleanup(queue)
+
+
+if __name__ == "__main__":
+    test_concurrent_triggers_share_one_job()
+    test_unfinished_jobs_are_requeued()
+    print("\n🎉 Ingestion queue tests passed!")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test script for the BM25 lexical index and reciprocal rank fusion.
+Checks that exact manual tokens (model names, parameter names) are matched.
+"""
+
+import sys
+import os
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from services.lexical_index import LONG_TERM_POSTINGS, BM25Index, reciprocal_rank_fusion, tokenize
+
+
+CHUNKS = [
+    "The SYSTEM-8 has three oscillators per voice.",
+    "LFO RATE sets the speed of the LFO. Use CC#16 to control it.",
+    "Connect headphones to the PHONES jack on the front panel.",
+]
+
+
+def test_tokenize_keeps_compound_tokens():
+    """Model names are indexed whole and by their parts."""
+    print("🔍 Testing tokenizer...")
+
+    tokens = tokenize("SYSTEM-8 CC#16")
+    assert "system-8" in tokens and "system" in tokens and "8" in tokens
+    assert "16" in tokens
+    print("✅ Compound tokens kept")
+
+
+def test_exact_terms_rank_first():
+    """BM25 ranks the chunk with the exact parameter name above the others."""
+    print("\n🔍 Testing BM25 scoring...")
+
+    index = BM25Index.build(CHUNKS)
+
+    assert int(np.argmax(index.scores("lfo rate"))) == 1
+    assert int(np.argmax(index.scores("system-8 oscillators"))) == 0
+    assert index.scores("vocoder").max() == 0
+    print("✅ Exact tokens matched")
+
+
+def test_reciprocal_rank_fusion():
+    """Rows ranked well by both retrievers come out on top."""
+    print("\n🔍 Testing reciprocal rank fusion...")
+
+    fused = reciprocal_rank_fusion([np.array([2, 1, 0]), np.array([1, 0])])
+    assert fused[0][0] == 1
+    print("✅ Fusion favours agreement")
+
+
+def test_common_terms_exit_early_without_losing_results():
+    """The best postings of a common term answer the query only when nothing unread can beat them."""
+    print("\n🔍 Testing early exit on common terms...")
+
+    rng = np.random.default_rng(7)
+    count = LONG_TERM_POSTINGS + 4000
+    texts = [" ".join(["patch"] * int(rng.integers(1, 4)) + ["filler"] * int(rng.integers(0, 30)))
+             for _ in range(count)]
+    for doc_id in range(0, count, 500):
+        texts[doc_id] += " vocoder"
+    index = BM25Index.build(texts)
+    restored = BM25Index.from_arrays(index.terms, index.arrays(), count)
+    assert restored.impact_indptr is not None and len(restored.impact_doc_ids) > 0
+
+    # Reading every posting stays the default
+    full_docs, full_scores = index.top_docs("vocoder patch", 10, max_postings=0)
+    assert np.array_equal(restored.top_docs("vocoder patch", 10)[0], full_docs)
+
+    # A rare term is read whole, so its documents get their exact score including the common term
+    docs, scores = restored.top_docs("vocoder patch", 10, max_postings=200)
+    assert np.array_equal(docs, full_docs) and np.allclose(scores, full_scores)
+    assert all("vocoder" in texts[doc_id] for doc_id in docs)
+
+    # The top 50 come from the 200 nominated postings; the top 3000 need every posting read
+    full_scores = index.scores("patch")
+    for top in (50, 3000):
+        docs, scores = restored.top_docs("patch", top, max_postings=200)
+        assert len(docs) == top and np.allclose(scores, full_scores[docs])
+        assert scores[-1] >= np.sort(full_scores)[-top] - 1e-6
+    print("✅ Early exit returns the same top results as reading every posting")
+
+
+if __name__ == "__main__":
+    test_tokenize_keeps_compound_tokens()
+    test_exact_terms_rank_first()
+    test_reciprocal_rank_fusion()
+    test_common_terms_exit_early_without_losing_results()
+    print("\n🎉 Lexical index tests passed!")
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test script for the language model providers.
+Checks that LLM_PROVIDER picks the provider, that the stub answers
+deterministically, that the local provider talks to an OpenAI-compatible
+server (a stand-in started here), and that a provider without stream() is
+rejected when it is built.
+"""
+
+import sys
+import os
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.llm_provider import LLMProvider, OpenAIProvider, StubProvider, create_provider
+from tests_support import settings
+
+
+def start_compatible_server(answer: str) -> ThreadingHTTPServer:
+    """Local stand-in for llama.cpp's server answering chat completions, streamed or not."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            self.server.requests.append((self.path, request))
+            if request.get("stream"):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                for word in answer.split(" "):
+                    chunk = {"id": "1", "object": "chat.completion.chunk", "created": 0, "model": request["model"],
+                             "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.write(b"data: [DONE]\n\n")
+                return
+            body = json.dumps({
+                "id": "1", "object": "chat.completion", "created": 0, "model": request["model"],
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": f" {answer} "}}]
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.requests = []
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_provider_selected_from_config():
+    """LLM_PROVIDER and its settings decide which provider is built."""
+    print("🔍 Testing provider selection...")
+
+    with settings(LLM_PROVIDER="stub", STUB_LLM_LATENCY_MS="0", STUB_LLM_TOKENS_PER_SEC="0",
+                  STUB_LLM_RESPONSE_TOKENS="3"):
+        stub = create_provider()
+    assert isinstance(stub, StubProvider) and stub.latency == 0 and stub.response_tokens == 3
+    assert list(stub.stream("system", "save the patch now")) == ["[stub answer] ", "save ", "the ", "patch "]
+    assert stub.complete("system", "save the patch now") == stub.complete("system", "save the patch now") \
+        == "[stub answer] save the patch"
+
+    with settings(LLM_PROVIDER="local", LLM_MODEL="qwen2.5-3b", LLM_BASE_URL="http://localhost:8080/v1"):
+        local = create_provider()
+    assert isinstance(local, OpenAIProvider) and local.model == "qwen2.5-3b"
+    assert str(local.client.base_url).rstrip("/") == "http://localhost:8080/v1"
+
+    for values, error in [({"LLM_PROVIDER": "gpt-j"}, ValueError),
+                          ({"LLM_PROVIDER": "llama_cpp", "LLM_MODEL": ""}, ValueError)]:
+        with settings(**values):
+            try:
+                create_provider()
+                assert False, f"{values} built a provider"
+            except error:
+                pass
+    print("✅ stub, local and invalid settings handled")
+
+
+def test_local_provider_answers_through_compatible_server():
+    """The local provider sends the configured model and parameters and reads plain and streamed answers."""
+    print("\n🔍 Testing local OpenAI-compatible provider...")
+
+    server = start_compatible_server("Press WRITE twice.")
+    try:
+        with settings(LLM_PROVIDER="local", LLM_MODEL="local-model", LLM_MAX_TOKENS="64",
+                      LLM_BASE_URL=f"http://127.0.0.1:{server.server_port}/v1"):
+            provider = create_provider()
+
+        assert provider.complete("Answer from the manual.", "How do I save?") == "Press WRITE twice."
+        assert "".join(provider.stream("Answer from the manual.", "How do I save?")).strip() == "Press WRITE twice."
+
+        path, request = server.requests[0]
+        assert path == "/v1/chat/completions"
+        assert request["model"] == "local-model" and request["max_tokens"] == 64
+        assert [message["role"] for message in request["messages"]] == ["system", "user"]
+        assert server.requests[1][1]["stream"] is True
+        print("✅ Plain and streamed answers read from the local server")
+    finally:
+        server.shutdown()
+
+
+def test_provider_without_stream_is_rejected():
+    """A provider class that does not implement stream() cannot be built."""
+    print("\n🔍 Testing incomplete provider...")
+
+    class CompleteOnly(LLMProvider):
+        name = "incomplete"
+
+        def complete(self, system_prompt: str, user_prompt: str) -> str:
+            return "answer"
+
+    try:
+        CompleteOnly()
+        assert False, "provider without stream() was built"
+    except TypeError as e:
+        print(f"✅ Rejected when built: {e}")
+
+
+if __name__ == "__main__":
+    test_provider_selected_from_config()
+    test_local_provider_answers_through_compatible_server()
+    test_provider_without_stream_is_rejected()
+    print("\n🎉 LLM provider tests passed!")
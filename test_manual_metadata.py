@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test script for manual metadata filters.
+Checks that instrument, document type and language are read from manufacturer
+file names, and that filtered searches only touch the matching manuals' rows.
+"""
+
+import sys
+import os
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.index_snapshot import IndexSnapshot
+from services.manual_metadata import matches_filters, parse_manual_name
+from tests_support import embed
+
+
+def manual(file_name, chunks):
+    return {"file_name": file_name, "chunks": chunks, "embeddings": embed(chunks)}
+
+
+def test_parse_manual_name():
+    """Manufacturer file names split into instrument, document type and language."""
+    print("🔍 Testing manual file name parsing...")
+
+    assert parse_manual_name("JUNO-X_MIDI_imple_eng01_W.pdf") == {
+        "instrument": "JUNO-X", "doc_type": "midi_implementation", "language": "eng"
+    }
+    assert parse_manual_name("SYSTEM-8_eng02_W.pdf") == {
+        "instrument": "SYSTEM-8", "doc_type": "owners_manual", "language": "eng"
+    }
+    assert parse_manual_name("FANTOM_Reference_eng03_W.pdf")["doc_type"] == "reference"
+    assert parse_manual_name("media/jupiter-x_ger01.pdf") == {
+        "instrument": "JUPITER-X", "doc_type": "owners_manual", "language": "ger"
+    }
+    # Names without a language part are all instrument and document type
+    assert parse_manual_name("TR-8S.pdf") == {"instrument": "TR-8S", "doc_type": "owners_manual", "language": ""}
+    assert parse_manual_name("TR-8S_Sound_List.pdf")["doc_type"] == "sound_list"
+    print("✅ File names parsed")
+
+
+def test_matches_filters():
+    """Filters match case-insensitively and every given field must match."""
+    print("\n🔍 Testing filter matching...")
+
+    file_info = {"file_name": "JUNO-X_MIDI_imple_eng01_W.pdf", **parse_manual_name("JUNO-X_MIDI_imple_eng01_W.pdf")}
+    assert matches_filters(file_info, None)
+    assert matches_filters(file_info, {"instrument": "juno-x"})
+    assert matches_filters(file_info, {"instrument": "JUNO-X", "doc_type": "MIDI_Implementation"})
+    assert matches_filters(file_info, {"instrument": "JUNO-X", "doc_type": None})
+    assert not matches_filters(file_info, {"instrument": "JUNO-X", "doc_type": "owners_manual"})
+    assert not matches_filters(file_info, {"file_name": "SYSTEM-8_eng02_W.pdf"})
+    print("✅ Filters matched")
+
+
+def test_row_range_filters():
+    """Filters select the row ranges of the matching manuals, and search stays inside them."""
+    print("\n🔍 Testing row-range filters...")
+
+    snapshot = IndexSnapshot.from_documents("v1", [
+        manual("SYSTEM-8_eng01_W.pdf", ["s8 oscillators", "s8 filter", "s8 arpeggio"]),
+        manual("JUNO-X_MIDI_imple_eng01_W.pdf", ["juno cc list"]),
+        manual("JUNO-X_eng01_W.pdf", ["juno chorus", "juno vocoder"]),
+        manual("FANTOM_eng01_W.pdf", []),
+    ])
+
+    assert snapshot.row_ranges(None) is None
+    assert snapshot.row_ranges({"instrument": None}) is None
+    assert snapshot.row_ranges({"instrument": "SYSTEM-8"}) == [(0, 3)]
+    assert snapshot.row_ranges({"instrument": "juno-x"}) == [(3, 4), (4, 6)]
+    assert snapshot.row_ranges({"instrument": "JUNO-X", "doc_type": "owners_manual"}) == [(4, 6)]
+    # Manuals without chunks or without a match leave nothing to search
+    assert snapshot.row_ranges({"instrument": "FANTOM"}) == []
+    assert snapshot.row_ranges({"instrument": "TR-8S"}) == []
+
+    query = embed(["s8 filter"])[0]
+    assert snapshot.search(query, top_k=1)[0]["chunk_text"] == "s8 filter"
+    results = snapshot.search(query, top_k=5, filters={"instrument": "JUNO-X"})
+    assert len(results) == 3
+    assert {r["file_name"] for r in results} == {"JUNO-X_MIDI_imple_eng01_W.pdf", "JUNO-X_eng01_W.pdf"}
+    assert snapshot.search(query, top_k=5, filters={"instrument": "TR-8S"}) == []
+
+    hybrid = snapshot.hybrid_search("vocoder", query, top_k=2, filters={"doc_type": "owners_manual",
+                                                                        "instrument": "JUNO-X"})
+    assert hybrid[0]["chunk_text"] == "juno vocoder"
+    assert all(r["file_name"] == "JUNO-X_eng01_W.pdf" for r in hybrid)
+    print("✅ Filtered searches stay within the matching manuals")
+
+
+if __name__ == "__main__":
+    test_parse_manual_name()
+    test_matches_filters()
+    test_row_range_filters()
+    print("\n🎉 Manual metadata tests passed!")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Test script for near-duplicate chunk deduplication.
+Checks that MinHash finds repeated boilerplate, that a deduplicated index
+stores it once with references to every manual, that filtered search
+still finds the shared chunks, and that only a document's own embeddings are
+cached (that check needs a Redis server at REDIS_HOST / REDIS_PORT).
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from services.document_processor import DocumentProcessor
+from services.index_snapshot import IndexSnapshot
+from services.near_duplicates import NearDuplicateIndex
+from tests_support import embed, redis_available
+
+SAFETY = ("Do not open the cover of the unit or attempt to disassemble or modify it. "
+          "Do not place the unit near water, heaters or in direct sunlight, and always "
+          "use the supplied AC adaptor connected to a properly grounded outlet.")
+LICENSE = ("This product contains open source software. Redistribution and use in source "
+           "and binary forms, with or without modification, are permitted provided that the "
+           "above copyright notice and this list of conditions are retained.")
+
+
+class CountingEmbedder:
+    """embed() behind a SentenceTransformer-style encode that remembers what it was asked to embed."""
+
+    max_seq_length = 256
+
+    def __init__(self):
+        self.texts = []
+
+    def encode(self, texts):
+        self.texts.extend(texts)
+        return embed(texts)
+
+
+def manual(file_name, chunks):
+    return {
+        "file_name": file_name,
+        "chunks": chunks,
+        "chunk_metadata": [{"page_start": page, "page_end": page} for page in range(1, len(chunks) + 1)],
+        "embeddings": embed(chunks)
+    }
+
+
+def test_minhash_finds_near_duplicates():
+    """Identical and lightly edited texts match, unrelated texts don't."""
+    print("🔍 Testing MinHash near-duplicate detection...")
+
+    notices = f"{SAFETY} {LICENSE}"
+    index = NearDuplicateIndex(threshold=0.8)
+    index.add(index.signature(notices), "notices")
+    index.add(index.signature(LICENSE), "license")
+
+    assert index.find(index.signature(notices)) == "notices"
+    assert index.find(index.signature(notices.upper())) == "notices"
+    # One changed word in 75 alters 5 of the 71 five-word shingles
+    assert index.find(index.signature(notices.replace("sunlight", "light"))) == "notices"
+    assert index.find(index.signature(LICENSE)) == "license"
+    assert index.find(index.signature("Press the WRITE button to store the patch.")) is None
+    print("✅ Near-duplicates found, unrelated text ignored")
+
+
+def test_deduplicated_snapshot_stores_boilerplate_once():
+    """Shared chunks are stored once and reported with every manual they appear in."""
+    print("🔍 Testing deduplicated index build...")
+
+    documents = [
+        manual("SYSTEM-8_eng01_W.pdf", [SAFETY, "The SYSTEM-8 has three oscillators.", LICENSE]),
+        manual("SYSTEM-8_eng02_W.pdf", [SAFETY, "The SYSTEM-8 has a bass sequencer.", LICENSE]),
+        manual("JUPITER-X_eng01_W.pdf", ["The JUPITER-X has five parts.", SAFETY]),
+    ]
+    plain = IndexSnapshot.from_documents("plain", documents)
+    deduplicated = IndexSnapshot.from_documents("dedup", documents, dedup_threshold=0.9)
+
+    assert len(plain.chunks) == 8
+    assert len(deduplicated.chunks) == 5
+    assert deduplicated.stats["duplicate_chunks"] == 3
+
+    query = embed([SAFETY])[0]
+    results = deduplicated.search(query, top_k=3)
+    assert [r["chunk_text"] for r in results].count(SAFETY) == 1
+    safety = results[0]
+    assert safety["file_name"] == "SYSTEM-8_eng01_W.pdf" and safety["similarity"] > 0.99
+    assert {source["file_name"] for source in safety["also_in"]} == {"SYSTEM-8_eng02_W.pdf", "JUPITER-X_eng01_W.pdf"}
+    assert {"file_name": "JUPITER-X_eng01_W.pdf", "page_start": 2, "page_end": 2} in safety["also_in"]
+
+    # A manual whose copy was deduplicated still finds it, reported under its own name and pages
+    filtered = deduplicated.search(query, top_k=3, filters={"file_name": "JUPITER-X_eng01_W.pdf"})
+    assert len(filtered) == 2
+    assert filtered[0]["chunk_text"] == SAFETY
+    assert filtered[0]["file_name"] == "JUPITER-X_eng01_W.pdf" and filtered[0]["chunk_index"] == 1
+    assert filtered[0]["page_start"] == 2
+    assert all(r["file_name"] == "JUPITER-X_eng01_W.pdf" for r in filtered)
+
+    # Chunk numbers stay those of the original document for context merging
+    sequencer = deduplicated.search(embed(["The SYSTEM-8 has a bass sequencer."])[0], top_k=1)[0]
+    assert sequencer["file_name"] == "SYSTEM-8_eng02_W.pdf" and sequencer["chunk_index"] == 1
+
+    restored = IndexSnapshot.from_stored(deduplicated.manifest(), deduplicated.chunks, deduplicated.arrays())
+    assert restored.search(query, top_k=1, filters={"file_name": "JUPITER-X_eng01_W.pdf"})[0] == filtered[0]
+    print("✅ Boilerplate stored once with references to every manual")
+
+
+def test_copied_embeddings_are_not_cached():
+    """A cached document keeps None for embeddings it copied; they are copied or embedded again on reuse."""
+    print("\n🔍 Testing document cache with copied embeddings...")
+    embedder = CountingEmbedder()
+    processor = DocumentProcessor(embedder)
+    if not redis_available(processor.binary_client):
+        return
+
+    work_dir = tempfile.mkdtemp(prefix="manualmind-dedup-")
+    path = os.path.join(work_dir, "JUPITER-X_eng01_W.pdf")
+    with open(path, "wb") as f:
+        f.write(os.urandom(64))
+    fingerprint = processor.fingerprint_file(path)
+    cache_key = f"doc:{fingerprint['hash']}:{processor.chunking_signature()}"
+    chunks = ["The JUPITER-X has five parts.", SAFETY]
+    try:
+        # The safety text was copied from an earlier manual when this entry was cached
+        processor._cache_document(cache_key, {"file_name": "JUPITER-X_eng01_W.pdf", "chunks": chunks},
+                                  embed(chunks), [True, False])
+        assert processor.cache_codec.get(processor.binary_client, cache_key)["embeddings"][1] is None
+
+        # Deduplicating again, the copy comes from the run's earlier manual
+        duplicates = NearDuplicateIndex(0.9)
+        earlier = embed(["earlier copy"])[0]
+        duplicates.add(duplicates.signature(SAFETY + " "), earlier)
+        doc_data = processor.process_document(path, duplicates)
+        assert np.allclose(doc_data["embeddings"][1], earlier) and embedder.texts == []
+        assert duplicates.find(duplicates.signature(chunks[0])) is not None
+        assert processor.cache_codec.get(processor.binary_client, cache_key)["embeddings"][1] is None
+
+        # Without deduplication the chunk is embedded for this document, and that is cached
+        doc_data = processor.process_document(path)
+        assert embedder.texts == [SAFETY]
+        assert np.allclose(doc_data["embeddings"], embed(chunks))
+        assert np.allclose(processor.cache_codec.get(processor.binary_client, cache_key)["embeddings"], embed(chunks))
+        print("✅ Only the document's own embeddings are cached")
+    finally:
+        processor.binary_client.delete(cache_key)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_minhash_finds_near_duplicates()
+    test_deduplicated_snapshot_stores_boilerplate_once()
+    test_copied_embeddings_are_not_cached()
+    print("\n🎉 Near-duplicate tests passed!")
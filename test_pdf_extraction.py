@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test script for the PDF extraction backends.
+Checks that PDF_EXTRACTOR picks the backend, that every installed backend
+reads the same pages of a manual, that a missing optional package or an
+unreadable file raises a clear error, and that an extractor without
+extract_pages() is rejected when it is built.
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import PyPDF2
+
+from services.pdf_extraction import EXTRACTORS, PDFExtractor, PyPDF2Extractor, create_extractor
+from tests_support import settings
+
+MANUAL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "media", "SYSTEM-8_eng02_W.pdf")
+OPTIONAL_PACKAGES = {"pdfium": "pypdfium2", "pdfminer": "pdfminer.high_level"}
+
+
+def write_excerpt(path: str, pages: int = 3):
+    """First pages of the manual as a PDF of their own, so every backend reads it quickly."""
+    writer = PyPDF2.PdfWriter()
+    for page in PyPDF2.PdfReader(MANUAL).pages[:pages]:
+        writer.add_page(page)
+    with open(path, "wb") as file:
+        writer.write(file)
+
+
+def build(name: str):
+    """The backend, or None when its optional package is not installed."""
+    try:
+        return create_extractor(name)
+    except RuntimeError as e:
+        print(f"⚠️ {name} not installed, skipping: {e}")
+        return None
+
+
+def test_extractor_selected_from_config():
+    """PDF_EXTRACTOR decides the backend; unknown names are refused."""
+    print("🔍 Testing extractor selection...")
+
+    with settings(PDF_EXTRACTOR="pypdf2"):
+        assert isinstance(create_extractor(), PyPDF2Extractor)
+    for name in ("pdfium", "pdfminer"):
+        with settings(PDF_EXTRACTOR=name.upper()):
+            extractor = build(None)
+        assert extractor is None or extractor.name == name
+    try:
+        create_extractor("tesseract")
+        assert False, "unknown extractor was built"
+    except ValueError:
+        pass
+    print("✅ Backends picked by PDF_EXTRACTOR")
+
+
+def test_backends_read_the_same_pages():
+    """Every installed backend returns one text per page, with the manual's words on them."""
+    print("\n🔍 Testing extraction backends...")
+    if not os.path.exists(MANUAL):
+        print(f"⚠️ {MANUAL} not found, skipping")
+        return
+
+    work_dir = tempfile.mkdtemp(prefix="manualmind-pdf-")
+    try:
+        excerpt = os.path.join(work_dir, "excerpt.pdf")
+        write_excerpt(excerpt)
+        broken = os.path.join(work_dir, "broken.pdf")
+        with open(broken, "wb") as file:
+            file.write(b"%PDF-1.4\nnot really a PDF")
+
+        for name in EXTRACTORS:
+            extractor = build(name)
+            if not extractor:
+                continue
+            pages = extractor.extract_pages(excerpt)
+            assert len(pages) == 3, (name, len(pages))
+            assert "SYSTEM-8" in "".join(pages), name
+            try:
+                extractor.extract_pages(broken)
+                assert False, f"{name} read a broken file"
+            except Exception:
+                pass
+            print(f"✅ {name}: {sum(len(page) for page in pages)} characters on 3 pages")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def test_missing_optional_package_is_reported():
+    """Selecting pdfium or pdfminer without its package raises a RuntimeError naming the package."""
+    print("\n🔍 Testing missing optional packages...")
+
+    for name, module in OPTIONAL_PACKAGES.items():
+        saved = sys.modules.get(module)
+        # A None entry makes the import fail as if the package were not installed
+        sys.modules[module] = None
+        try:
+            create_extractor(name)
+            assert False, f"{name} built without {module}"
+        except RuntimeError as e:
+            assert f"PDF_EXTRACTOR={name}" in str(e)
+        finally:
+            if saved is None:
+                sys.modules.pop(module)
+            else:
+                sys.modules[module] = saved
+    print("✅ Missing packages reported when the extractor is built")
+
+
+def test_extractor_without_extract_pages_is_rejected():
+    """An extractor class that does not implement extract_pages() cannot be built."""
+    print("\n🔍 Testing incomplete extractor...")
+
+    class NameOnly(PDFExtractor):
+        name = "incomplete"
+
+    try:
+        NameOnly()
+        assert False, "extractor without extract_pages() was built"
+    except TypeError as e:
+        print(f"✅ Rejected when built: {e}")
+
+
+if __name__ == "__main__":
+    test_extractor_selected_from_config()
+    test_backends_read_the_same_pages()
+    test_missing_optional_package_is_reported()
+    test_extractor_without_extract_pages_is_rejected()
+    print("\n🎉 PDF extraction tests passed!")
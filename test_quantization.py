@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Test script for the int8 and binary quantized embedding indexes.
+Checks that quantized scoring tracks the float scores and that rescoring
+returns the same top chunks and similarities as full-precision search.
+"""
+
+import sys
+import os
+
+# Add the project root and the benchmarks to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+import numpy as np
+
+from common import HashEmbedder
+from services.document_processor import DocumentProcessor
+from services.index_snapshot import IndexSnapshot
+from services.quantization import (
+    binary_thresholds, hamming_scores, int8_scores, popcount, quantize_binary, quantize_int8
+)
+from tests_support import settings
+
+
+def unit_vectors(count: int, dimensions: int = 384, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((count, dimensions)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_int8_scores_track_float_scores():
+    """Quantized dot products stay close to the exact ones."""
+    print("🔍 Testing int8 scoring...")
+
+    embeddings = unit_vectors(2000)
+    codes, scales = quantize_int8(embeddings)
+    assert codes.dtype == np.int8 and scales.shape == (384,)
+
+    query = embeddings[7]
+    approximate = int8_scores(codes, scales, query, ranges=[(0, 1000), (1500, 2000)], block_rows=256)
+    exact = np.concatenate([embeddings[:1000] @ query, embeddings[1500:] @ query])
+    assert approximate.shape == exact.shape
+    assert np.abs(approximate - exact).max() < 0.02
+    print("✅ Quantized scores track float scores")
+
+
+def test_binary_codes_and_hamming_distance():
+    """Bits are packed per dimension into uint64 words and compared by popcount."""
+    print("\n🔍 Testing binary codes...")
+
+    embeddings = unit_vectors(100, dimensions=100)
+    thresholds = binary_thresholds(embeddings)
+    codes = quantize_binary(embeddings, thresholds)
+    assert codes.dtype == np.uint64 and codes.shape == (100, 2)
+
+    bits = embeddings > thresholds
+    assert np.array_equal(popcount(codes), bits.sum(axis=1))
+
+    scores = hamming_scores(codes, thresholds, embeddings[3])
+    assert scores[3] == 0 and scores.max() == 0
+    assert np.array_equal(-scores, (bits != bits[3]).sum(axis=1))
+    print("✅ Hamming distances match bit differences")
+
+
+def test_rescored_search_matches_float_search():
+    """int8 shortlisting with rescoring returns the full-precision top results."""
+    print("\n🔍 Testing rescored search...")
+
+    embeddings = unit_vectors(3000, seed=1)
+    documents = [
+        {"file_name": f"MODEL-{i}_eng01_W.pdf", "chunks": [f"chunk {i}-{row}" for row in range(1000)],
+         "embeddings": embeddings[i * 1000:(i + 1) * 1000]}
+        for i in range(3)
+    ]
+    snapshot = IndexSnapshot.from_documents("test", documents, quantization="int8")
+    assert snapshot.int8_codes is not None
+
+    query = embeddings[1234] + 0.1 * unit_vectors(1, seed=2)[0]
+    exact = snapshot.search(query, top_k=5)
+    quantized = snapshot.search(query, top_k=5, quantization="int8", rescore_candidates=50)
+    assert [r["chunk_text"] for r in quantized] == [r["chunk_text"] for r in exact]
+    assert np.allclose([r["similarity"] for r in quantized], [r["similarity"] for r in exact])
+
+    binary = snapshot.search(query, top_k=5, quantization="binary", rescore_candidates=400)
+    assert [r["chunk_text"] for r in binary] == [r["chunk_text"] for r in exact]
+
+    filtered = snapshot.search(query, top_k=3, filters={"file_name": "MODEL-2_eng01_W.pdf"}, quantization="int8")
+    assert all(r["file_name"] == "MODEL-2_eng01_W.pdf" for r in filtered)
+    print("✅ Rescored search matches float search")
+
+
+
+def test_binary_shortlist_scales_and_falls_back():
+    """Binary shortlists grow with the searched rows, and a recorded fallback serves int8 codes."""
+    print("\n🔍 Testing binary shortlist size and fallback...")
+
+    embeddings = unit_vectors(4000, seed=3)
+    documents = [{"file_name": "MODEL-1_eng01_W.pdf", "chunks": [f"chunk {row}" for row in range(4000)],
+                  "embeddings": embeddings}]
+    snapshot = IndexSnapshot.from_documents("test", documents)
+    rescored = []
+    exact_scores = snapshot.exact_scores
+    snapshot.exact_scores = lambda rows, query: rescored.append(len(rows)) or exact_scores(rows, query)
+
+    query = embeddings[42]
+    rows = snapshot.range_rows(None)
+    snapshot.dense_ranking(query, None, rows, 5, "binary", rescore_candidates=100, rescore_fraction=0.05)
+    snapshot.dense_ranking(query, None, rows, 5, "binary", rescore_candidates=100)
+    assert rescored == [200, 100]
+
+    # A snapshot that failed the golden-set recall check never builds binary codes
+    snapshot = IndexSnapshot.from_documents("test", documents, quantization="int8")
+    snapshot.stats["binary_fallback"] = "int8"
+    picks, scores = snapshot.dense_ranking(query, None, rows, 5, "binary", rescore_candidates=100,
+                                           rescore_fraction=0.05)
+    assert snapshot.binary_codes is None
+    assert picks[0] == 42 and np.isclose(scores[0], 1.0)
+    print("✅ Shortlist sized from the corpus, fallback uses int8 codes")
+
+
+def test_binary_shortlist_sized_by_measured_recall():
+    """Publishing doubles the binary shortlist until recall is met, or serves int8 when it never is."""
+    print("\n🔍 Testing binary recall check...")
+
+    rng = np.random.default_rng(7)
+    vocabulary = [f"term{row}" for row in range(300)]
+    texts = [" ".join(rng.choice(vocabulary, 12)) for _ in range(4000)]
+    embedder = HashEmbedder(64)
+    with settings(INDEX_QUANTIZATION="binary", GOLDEN_SET_PATH=os.devnull, QUANTIZED_RESCORE_CANDIDATES="20",
+                  QUANTIZED_RESCORE_FRACTION="0.01"):
+        processor = DocumentProcessor(embedder)
+
+    checked = {}
+    for min_recall in (0.5, 0.7, 0.95):
+        processor.binary_min_recall = min_recall
+        snapshot = IndexSnapshot.from_documents("test", [{"file_name": "MODEL-1_eng01_W.pdf", "chunks": texts,
+                                                          "embeddings": embedder.encode(texts)}])
+        processor.check_binary_recall(snapshot)
+        checked[min_recall] = snapshot
+        print(f"   BINARY_MIN_RECALL={min_recall}: {snapshot.stats}")
+
+    # Met with the configured 1% shortlist, met after doubling it, never met within the cap
+    assert checked[0.5].stats["binary_rescore_fraction"] == 0.01 and "binary_fallback" not in checked[0.5].stats
+    assert checked[0.7].stats["binary_rescore_fraction"] == 0.02 and checked[0.7].stats["binary_recall"] >= 0.7
+    assert checked[0.95].stats["binary_fallback"] == "int8" and checked[0.95].int8_codes is not None
+    assert checked[0.95].stats["binary_rescore_fraction"] == DocumentProcessor.MAX_BINARY_RESCORE_FRACTION
+
+    # Searches of the snapshot rescore the share the check settled on
+    snapshot = checked[0.7]
+    rescored = []
+    exact_scores = snapshot.exact_scores
+    snapshot.exact_scores = lambda rows, query: rescored.append(len(rows)) or exact_scores(rows, query)
+    snapshot.search(embedder.encode([texts[0]])[0], top_k=5, quantization="binary", rescore_candidates=20,
+                    rescore_fraction=0.01)
+    assert rescored == [80]
+    print("✅ Shortlist grown to the measured recall, int8 served when binary cannot reach it")
+
+
+if __name__ == "__main__":
+    test_int8_scores_track_float_scores()
+    test_binary_codes_and_hamming_distance()
+    test_rescored_search_matches_float_search()
+    test_binary_shortlist_scales_and_falls_back()
+    test_binary_shortlist_sized_by_measured_recall()
+    print("\n🎉 Quantization tests passed!")
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Test script for the cached flag in /query responses.
+Checks that a question is answered with cached false the first time and
+cached true when it is asked again, as the load test's hit ratio relies on.
+"""
+
+import sys
+import os
+import random
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+os.environ["LLM_PROVIDER"] = "stub"
+
+import main
+from tests_support import redis_available
+
+
+def test_repeated_query_is_reported_cached():
+    """The first answer is generated, the repeat is served from the query cache and says so."""
+    print("🔍 Testing cached flag in /query responses...")
+    if not main.query_service.redis_enabled or not redis_available(main.query_service.redis_client):
+        return
+
+    main.document_processor.find_similar_chunks = lambda query, top_k=5, filters=None: []
+    # A question and client address of their own, so earlier runs' cache entries and counters do not count
+    question = f"How do I save patch {random.getrandbits(32):x}?"
+    client = TestClient(main.app, client=(f"2001:db8::{random.getrandbits(32):x}", 50000))
+    try:
+        first = client.post("/query", json={"question": question})
+        assert first.status_code == 200 and first.json()["cached"] is False
+        again = client.post("/query", json={"question": question})
+        assert again.status_code == 200 and again.json()["cached"] is True
+        assert again.json()["response"] == first.json()["response"]
+        print("✅ cached false when generated, true when repeated")
+    finally:
+        main.document_processor.__dict__.pop("find_similar_chunks", None)
+        main.query_service.binary_client.delete(main.query_service._get_query_cache_key(question, 5, None))
+
+
+if __name__ == "__main__":
+    test_repeated_query_is_reported_cached()
+    print("\n🎉 Query cache flag tests passed!")
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test script for the query cache warm-up.
+Needs a Redis server (REDIS_HOST / REDIS_PORT) and answers with the stub
+language model. Checks that concurrent warm-ups rank popular questions
+independently, that a running warm-up stops promptly when cancelled, and
+that query counts go out with the cache lookup and are trimmed per day.
+"""
+
+import sys
+import os
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from tests_support import delete_keys, make_query_service
+
+
+def make_service():
+    """Query service counting popularity under its own keys, or None when Redis is not reachable."""
+    service = make_query_service()
+    if service:
+        service.POPULAR_KEY_PREFIX = f"test:{uuid.uuid4().hex[:8]}:popular:"
+    return service
+
+
+def cleanup(service):
+    delete_keys(service.redis_client, f"{service.POPULAR_KEY_PREFIX}*")
+
+
+def test_concurrent_popular_queries():
+    """Warm-ups running at the same time each get the full ranking and leave no keys behind."""
+    print("🔍 Testing concurrent popular query ranking...")
+    service = make_service()
+    if not service:
+        return
+
+    try:
+        for query, count in [("How do I save a patch?", 5), ("What is the LFO rate?", 3), ("Reset to factory", 1)]:
+            for _ in range(count):
+                service._record_query(query, 5, None)
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            rankings = list(executor.map(lambda _: service.popular_queries(2), range(200)))
+        expected = [("how do i save a patch?", 5), ("what is the lfo rate?", 3)]
+        assert all([(entry["query"], entry["count"]) for entry in ranking] == expected for ranking in rankings)
+
+        day_keys = list(service.redis_client.scan_iter(match=f"{service.POPULAR_KEY_PREFIX}*"))
+        assert len(day_keys) == 1 and not any("combined" in key for key in day_keys)
+        print("✅ 200 concurrent rankings identical, no combined keys left")
+    finally:
+        cleanup(service)
+
+
+def test_warmup_can_be_cancelled():
+    """A warm-up waiting between language model calls stops as soon as it is cancelled."""
+    print("\n🔍 Testing warm-up cancellation...")
+    service = make_service()
+    if not service:
+        return
+
+    try:
+        for query in ["How do I save a patch?", "What is the LFO rate?", "Reset to factory"]:
+            service._record_query(query, 5, None)
+        # One call every 10 seconds: without cancellation the run would take 20 seconds
+        service.warmup_rate = 0.1
+        for entry in service.popular_queries(3):
+            service.redis_client.delete(service._get_query_cache_key(entry["query"], entry["top_k"], entry["filters"]))
+
+        stop = threading.Event()
+        threading.Timer(0.5, stop.set).start()
+        started = time.monotonic()
+        summary = service.warm_cache(3, stop=stop)
+        elapsed = time.monotonic() - started
+
+        assert summary["stopped"] == "cancelled"
+        assert summary["warmed"] + summary["errors"] == 1
+        assert elapsed < 3
+        print(f"✅ Warm-up cancelled after {elapsed:.1f}s: {summary}")
+    finally:
+        cleanup(service)
+
+
+def test_query_counts_are_trimmed_and_sent_with_the_lookup():
+    """A query is counted in the cache lookup's round trip, and each day keeps only the top questions."""
+    print("\n🔍 Testing popularity counting...")
+    service = make_service()
+    if not service:
+        return
+
+    question = f"Where is the tempo knob {uuid.uuid4().hex[:8]}?"
+    try:
+        service.popular_query_max_members = 2
+        for query, count in [("How do I save a patch?", 3), ("What is the LFO rate?", 2), ("Reset to factory", 1)]:
+            for _ in range(count):
+                service._record_query(query, 5, None)
+        day_key = next(service.redis_client.scan_iter(match=f"{service.POPULAR_KEY_PREFIX}*"))
+        assert service.redis_client.zcard(day_key) == 2
+        assert 0 < service.redis_client.ttl(day_key) <= service.popular_query_days * 86400
+        assert [entry["query"] for entry in service.popular_queries(3)] == \
+            ["how do i save a patch?", "what is the lfo rate?"]
+
+        service.popular_query_max_members = 10000
+        service.document_processor.find_similar_chunks = lambda query, top_k=5, filters=None: []
+        service.process_query(question)
+        executed = []
+        for client in (service.redis_client, service.binary_client):
+            pipeline = client.pipeline
+            client.pipeline = lambda *args, _pipeline=pipeline, **kwargs: executed.append(1) or _pipeline(*args, **kwargs)
+        assert service.process_query(question)["cached"] is True
+        assert executed == [1]
+        counts = dict(service.redis_client.zrange(day_key, 0, -1, withscores=True))
+        assert counts[json.dumps({"filters": None, "query": question.lower(), "top_k": 5}, sort_keys=True)] == 2
+        print("✅ Counted in the lookup's pipeline, day trimmed to 2 questions")
+    finally:
+        for client in (service.redis_client, service.binary_client):
+            client.__dict__.pop("pipeline", None)
+        service.document_processor.__dict__.pop("find_similar_chunks", None)
+        service.binary_client.delete(service._get_query_cache_key(question, 5, None))
+        cleanup(service)
+
+
+if __name__ == "__main__":
+    test_concurrent_popular_queries()
+    test_warmup_can_be_cancelled()
+    test_query_counts_are_trimmed_and_sent_with_the_lookup()
+    print("\n🎉 Query warm-up tests passed!")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test script for the MCP server's token bucket rate limiter.
+Checks the burst size, refilling over time and the per-process fallback when
+Redis is down. The shared bucket checks need a Redis server at REDIS_HOST /
+REDIS_PORT.
+"""
+
+import sys
+import os
+import asyncio
+import time
+import uuid
+
+# Add the project root and the MCP server to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "mcp_server"))
+
+import redis
+
+from rate_limiter import LocalTokenBucket, RedisRateLimiter
+from tests_support import delete_keys, redis_available
+
+REDIS_URL = (f"redis://{os.getenv('REDIS_HOST', 'localhost')}:{os.getenv('REDIS_PORT', 6379)}"
+             f"/{os.getenv('REDIS_DB', 0)}")
+
+
+async def take(limiter: RedisRateLimiter, count: int, key: str = "global"):
+    return [await limiter.acquire(key) for _ in range(count)]
+
+
+def test_local_bucket_burst_and_refill():
+    """A full bucket allows its burst at once, then refills at the per-second rate."""
+    print("🔍 Testing local token bucket...")
+
+    bucket = LocalTokenBucket(capacity=3, rate=10.0)
+    assert [bucket.acquire()[0] for _ in range(3)] == [True, True, True]
+    allowed, retry_ms = bucket.acquire()
+    assert not allowed and 0 < retry_ms <= 100
+
+    # Backdating the last update stands in for 250 ms passing: 2.5 tokens come back
+    bucket.updated -= 0.25
+    assert [bucket.acquire()[0] for _ in range(3)] == [True, True, False]
+
+    # Refilling stops at the bucket size, however long it was idle
+    bucket.updated -= 3600
+    assert [bucket.acquire()[0] for _ in range(4)] == [True, True, True, False]
+    print("✅ Burst of 3, refilled at 10 tokens per second")
+
+
+def test_shared_bucket_burst_and_refill():
+    """Replicas share one Redis bucket: the burst is spent across them and refills over time."""
+    print("\n🔍 Testing shared Redis token bucket...")
+    client = redis.Redis.from_url(REDIS_URL)
+    if not redis_available(client):
+        return
+
+    prefix = f"test:{uuid.uuid4().hex[:8]}:rate_limit:"
+    # 120 per minute is two tokens per second
+    replicas = [RedisRateLimiter(120, burst=4, redis_url=REDIS_URL, key_prefix=prefix) for _ in range(2)]
+
+    async def scenario():
+        results = await take(replicas[0], 3) + await take(replicas[1], 2)
+        assert [allowed for allowed, _ in results] == [True, True, True, True, False]
+        assert 0 < results[-1][1] <= 500
+
+        # Other keys have buckets of their own
+        assert (await replicas[1].acquire("other-client"))[0]
+
+        await asyncio.sleep(1.1)
+        refilled = await take(replicas[1], 3)
+        assert [allowed for allowed, _ in refilled] == [True, True, False]
+
+    try:
+        asyncio.run(scenario())
+        assert not any(replica._redis_failed for replica in replicas)
+        print("✅ Burst of 4 shared by two replicas, 2 tokens back after a second")
+    finally:
+        delete_keys(client, f"{prefix}*")
+
+
+def test_redis_down_falls_back_to_local_bucket():
+    """With Redis unreachable, requests are limited by the in-process bucket instead of failing."""
+    print("\n🔍 Testing fallback when Redis is down...")
+
+    # Nothing listens on port 1, so every script call fails to connect
+    limiter = RedisRateLimiter(60, burst=2, redis_url="redis://localhost:1/0")
+
+    async def scenario():
+        started = time.monotonic()
+        results = await take(limiter, 3)
+        assert [allowed for allowed, _ in results] == [True, True, False]
+        assert 0 < results[-1][1] <= 1000
+        assert time.monotonic() - started < 5
+        assert limiter._redis_failed
+
+    asyncio.run(scenario())
+    print("✅ Limited per process while Redis is down")
+
+
+if __name__ == "__main__":
+    test_local_bucket_burst_and_refill()
+    test_shared_bucket_burst_and_refill()
+    test_redis_down_falls_back_to_local_bucket()
+    print("\n🎉 Rate limiter tests passed!")
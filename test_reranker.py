@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test script for cross-encoder re-ranking.
+Checks that a fast model reorders the candidates by its scores, and that a
+model too slow for the time budget leaves the retrieval order unchanged
+without holding the query past the budget.
+"""
+
+import sys
+import os
+import time
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services import reranker
+from services.reranker import CrossEncoderReranker
+
+
+class KeywordCrossEncoder:
+    """Stand-in cross-encoder scoring a pair by how often the query's words occur in the chunk."""
+
+    delay = 0.0
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        time.sleep(self.delay)
+        return [sum(text.lower().count(word) for word in query.lower().split()) for query, text in pairs]
+
+
+class SlowCrossEncoder(KeywordCrossEncoder):
+    delay = 0.5
+
+
+CHUNKS = [
+    {"chunk_text": "Connect the power adaptor before switching on."},
+    {"chunk_text": "The arpeggiator follows the tempo."},
+    {"chunk_text": "Select the vocoder, then hold a vocoder key and speak into the mic."},
+    {"chunk_text": "Press WRITE to save the vocoder patch."},
+]
+QUERY = "vocoder"
+
+
+def make_reranker(model_class, **kwargs) -> CrossEncoderReranker:
+    saved = reranker.CrossEncoder
+    reranker.CrossEncoder = model_class
+    try:
+        return CrossEncoderReranker(**kwargs)
+    finally:
+        reranker.CrossEncoder = saved
+
+
+def test_fast_model_reorders_candidates():
+    """Within the budget every candidate is scored and the best ones come first."""
+    print("🔍 Testing re-ranking with a fast model...")
+
+    ranked = make_reranker(KeywordCrossEncoder, batch_size=2).rerank(QUERY, CHUNKS, top_n=3)
+    assert [chunk["chunk_text"] for chunk in ranked] == [
+        CHUNKS[2]["chunk_text"], CHUNKS[3]["chunk_text"], CHUNKS[0]["chunk_text"]
+    ]
+    assert [chunk["rerank_score"] for chunk in ranked] == [2.0, 1.0, 0.0]
+    print("✅ Candidates reordered by cross-encoder score")
+
+
+def test_slow_model_keeps_retrieval_order_within_budget():
+    """A model slower than the budget is abandoned and the retrieval order is returned on time."""
+    print("\n🔍 Testing re-ranking with a model slower than the budget...")
+
+    slow = make_reranker(SlowCrossEncoder, batch_size=2, time_budget_ms=50)
+    started = time.perf_counter()
+    ranked = slow.rerank(QUERY, CHUNKS, top_n=3)
+    elapsed = time.perf_counter() - started
+
+    assert ranked == CHUNKS[:3]
+    assert elapsed < SlowCrossEncoder.delay / 2, elapsed
+    print(f"✅ Retrieval order returned after {elapsed * 1000:.0f} ms (budget 50 ms)")
+
+
+if __name__ == "__main__":
+    test_fast_model_reorders_candidates()
+    test_slow_model_keeps_retrieval_order_within_budget()
+    print("\n🎉 Re-ranker tests passed!")
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Test script for the /search rate limit.
+Checks that a client gets 429 once it has used SEARCH_RATE_LIMIT_PER_MINUTE
+searches. Counters live in Redis when it is reachable, in memory otherwise.
+"""
+
+import sys
+import os
+import random
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+os.environ["LLM_PROVIDER"] = "stub"
+
+import main
+
+
+def test_search_returns_429_at_the_limit():
+    """The search after the last allowed one in a minute is rejected with 429."""
+    print("🔍 Testing /search rate limit...")
+
+    limit = int(main.SEARCH_RATE_LIMIT.split("/")[0])
+    assert limit == int(os.getenv("SEARCH_RATE_LIMIT_PER_MINUTE", 30))
+
+    main.document_processor.find_similar_chunks = lambda query, top_k=5, filters=None: []
+    # A documentation address of its own, so earlier runs' counters do not count
+    address = f"2001:db8::{random.getrandbits(32):x}"
+    client = TestClient(main.app, client=(address, 50000))
+    try:
+        statuses = [client.post("/search", json={"question": "How do I save a patch?"}).status_code
+                    for _ in range(limit + 1)]
+        assert statuses[:limit] == [200] * limit, statuses
+        assert statuses[limit] == 429
+        print(f"✅ {limit} searches allowed, then 429")
+    finally:
+        main.document_processor.__dict__.pop("find_similar_chunks", None)
+
+
+if __name__ == "__main__":
+    test_search_returns_429_at_the_limit()
+    print("\n🎉 Search rate limit tests passed!")
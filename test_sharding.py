@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Test script for the sharded index.
+Checks that manuals are partitioned stably, that filtered queries only go to
+the shards holding matching manuals, that scatter-gather merges the
+shards' results while leaving out a shard that misses the deadline or
+serves another index version, and that hybrid results are fused once over
+the shards' merged rankings. The shard service's API key and result limits
+are checked against the service itself.
+"""
+
+import sys
+import os
+import json
+import threading
+import time
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from services.index_snapshot import IndexSnapshot
+from fastapi.testclient import TestClient
+
+import shard_server
+from services.sharding import (ShardClient, catalog_snapshot, fuse_shard_candidates, partition_documents,
+                               route_shards, shard_for)
+
+MANUALS = ["SYSTEM-8_eng01_W.pdf", "SYSTEM-8_eng02_W.pdf", "JUPITER-X_eng01_W.pdf", "FANTOM_eng01_W.pdf"]
+
+
+def start_shard(results, delay: float = 0.0, version: str = "v1") -> ThreadingHTTPServer:
+    """Local stand-in for shard_server.py answering every search with fixed results from one index version."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            self.server.api_keys.append(self.headers.get("X-API-Key"))
+            time.sleep(delay)
+            body = json.dumps({"version": version, "results": results[:payload["top_k"]]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.api_keys = []
+    server.daemon_threads = True
+    # The client hangs up on a slow shard, which is expected here
+    server.handle_error = lambda request, client_address: None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_partition_and_routing():
+    """Each manual always lands on the same shard, and filters skip shards without matches."""
+    print("🔍 Testing shard partitioning and routing...")
+
+    documents = [
+        {"file_name": name, "chunks": [f"{name} chunk"], "embeddings": np.ones((1, 4), dtype=np.float32)}
+        for name in MANUALS
+    ]
+    shards = partition_documents(documents, 3)
+    assert sum(len(shard) for shard in shards) == len(MANUALS)
+    for shard, shard_documents in enumerate(shards):
+        assert all(shard_for(doc_data["file_name"], 3) == shard for doc_data in shard_documents)
+
+    snapshots = [IndexSnapshot.from_documents("v1", shard_documents) for shard_documents in shards]
+    catalog = catalog_snapshot("v1", snapshots)
+    assert sorted(catalog.file_names) == sorted(MANUALS)
+    assert catalog.stats["shards"] == 3 and len(catalog.chunks) == 0
+
+    assert route_shards(catalog, 3) == [0, 1, 2]
+    assert route_shards(catalog, 3, {"instrument": "JUPITER-X"}) == [shard_for("JUPITER-X_eng01_W.pdf", 3)]
+    assert route_shards(catalog, 3, {"instrument": "TR-8S"}) == []
+    print("✅ Stable partitioning and filter routing")
+
+
+def test_scatter_gather_with_slow_shard():
+    """Results are merged by score, and a shard that misses the deadline is left out."""
+    print("🔍 Testing scatter-gather under a deadline...")
+
+    fast = start_shard([{"chunk_text": "a", "similarity": 0.9}, {"chunk_text": "c", "similarity": 0.5}])
+    other = start_shard([{"chunk_text": "b", "similarity": 0.7}])
+    slow = start_shard([{"chunk_text": "slow", "similarity": 1.0}], delay=1.0)
+    urls = [f"http://127.0.0.1:{server.server_port}" for server in (fast, other, slow)]
+    client = ShardClient(urls, deadline_ms=300)
+
+    results, missing = client.search({"query": "q", "embedding": [0.0], "top_k": 2}, shards=[0, 1])
+    assert [r["chunk_text"] for r in results] == ["a", "b"] and missing == []
+
+    started = time.monotonic()
+    results, missing = client.search({"query": "q", "embedding": [0.0], "top_k": 3})
+    elapsed = time.monotonic() - started
+    assert [r["chunk_text"] for r in results] == ["a", "b", "c"]
+    assert missing == [2]
+    assert elapsed < 0.8
+    assert client.partial_searches == 1
+    print(f"✅ Slow shard left out after {elapsed * 1000:.0f} ms")
+
+    for server in (fast, other, slow):
+        server.shutdown()
+
+
+def test_shard_on_another_version_is_left_out():
+    """A shard answering from another index version than the catalog's counts as missing."""
+    print("\n🔍 Testing shards on different index versions...")
+
+    current = start_shard([{"chunk_text": "new", "similarity": 0.6}], version="v2")
+    lagging = start_shard([{"chunk_text": "old", "similarity": 0.9}], version="v1")
+    client = ShardClient([f"http://127.0.0.1:{server.server_port}" for server in (current, lagging)],
+                         api_key="shard-secret")
+    try:
+        results, missing = client.search({"version": "v2", "query": "q", "embedding": [0.0], "top_k": 2})
+        assert [r["chunk_text"] for r in results] == ["new"] and missing == [1]
+        assert client.partial_searches == 1
+        assert current.api_keys == lagging.api_keys == ["shard-secret"]
+        print("✅ Lagging shard left out, API key sent to every shard")
+    finally:
+        for server in (current, lagging):
+            server.shutdown()
+
+
+def test_shard_service_requires_key_and_clamps_results():
+    """The shard service refuses searches without the API key and returns at most MAX_TOP_K chunks."""
+    print("\n🔍 Testing shard service key and limits...")
+
+    embeddings = np.eye(4, dtype=np.float32)[np.arange(200) % 4]
+    snapshot = IndexSnapshot.from_documents("v1", [
+        {"file_name": MANUALS[0], "chunks": [f"chunk {row}" for row in range(200)], "embeddings": embeddings}
+    ])
+    shard_server.shard_index = SimpleNamespace(shard=0, snapshot=snapshot)
+    saved = shard_server.API_KEY, shard_server.MAX_TOP_K
+    shard_server.API_KEY, shard_server.MAX_TOP_K = "shard-secret", 10
+    client = TestClient(shard_server.app)
+    try:
+        payload = {"version": "v1", "query": "chunk", "embedding": [1.0, 0.0, 0.0, 0.0], "top_k": 150}
+        assert client.post("/search", json=payload).status_code == 401
+        assert client.post("/search", json=payload, headers={"X-API-Key": "wrong"}).status_code == 401
+
+        response = client.post("/search", json=payload, headers={"X-API-Key": "shard-secret"})
+        assert response.status_code == 200 and response.json()["version"] == "v1"
+        assert len(response.json()["results"]) == 10
+        assert client.post("/search", json={**payload, "top_k": 0},
+                           headers={"X-API-Key": "shard-secret"}).status_code == 422
+        print("✅ 401 without the key, top_k 150 clamped to 10")
+    finally:
+        shard_server.API_KEY, shard_server.MAX_TOP_K = saved
+        shard_server.shard_index = None
+
+
+def test_hybrid_fusion_across_shards():
+    """Candidates are ranked by raw scores across shards before a single rank fusion."""
+    print("\n🔍 Testing hybrid fusion across shards...")
+
+    # Each shard's best chunk gets the same fused score on its own; merged, shard 0's are better twice over
+    shard_results = [
+        {"chunk_text": "a1", "similarity": 0.9, "dense_score": 0.9, "bm25_score": 9.0},
+        {"chunk_text": "a2", "similarity": 0.8, "dense_score": 0.8, "bm25_score": 8.0},
+        {"chunk_text": "b1", "similarity": 0.5, "dense_score": 0.5, "bm25_score": 2.0},
+        {"chunk_text": "b2", "similarity": 0.1, "bm25_score": 5.0}
+    ]
+    fused = fuse_shard_candidates(shard_results, candidates=4, top_k=4, rrf_k=60)
+    assert [r["chunk_text"] for r in fused] == ["a1", "a2", "b1", "b2"]
+    assert fused[0]["fused_score"] == 2 / 61 and fused[3]["fused_score"] == 1 / 63
+    # Only the best candidates across all shards make each ranking
+    assert [r["chunk_text"] for r in fuse_shard_candidates(shard_results, candidates=1, top_k=4)] == ["a1"]
+    assert all("dense_score" not in r and "bm25_score" not in r for r in fused)
+
+    # Over one shard's candidates, fusing in the API matches fusing in the snapshot
+    rng = np.random.default_rng(7)
+    words = ["filter", "envelope", "arpeggio", "chorus", "tempo", "patch", "vocoder", "sequencer"]
+    # Chunks of different lengths, so no two BM25 scores tie
+    chunks = [" ".join(rng.choice(words, size=3 + row)) for row in range(60)]
+    embeddings = rng.standard_normal((60, 16)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    snapshot = IndexSnapshot.from_documents("v1", [
+        {"file_name": MANUALS[0], "chunks": chunks[:30], "embeddings": embeddings[:30]},
+        {"file_name": MANUALS[1], "chunks": chunks[30:], "embeddings": embeddings[30:]}
+    ])
+    query = embeddings[0] + 0.5 * embeddings[1]
+    expected = snapshot.hybrid_search("arpeggio tempo", query, top_k=5, candidates=10)
+    candidates = snapshot.hybrid_candidates("arpeggio tempo", query, candidates=10)
+    assert len(candidates) >= 10
+    merged = fuse_shard_candidates(candidates, candidates=10, top_k=5)
+    assert [(r["file_name"], r["chunk_index"], r["fused_score"]) for r in merged] == \
+        [(r["file_name"], r["chunk_index"], r["fused_score"]) for r in expected]
+    print("✅ One fusion over the merged dense and BM25 rankings")
+
+
+if __name__ == "__main__":
+    test_partition_and_routing()
+    test_scatter_gather_with_slow_shard()
+    test_shard_on_another_version_is_left_out()
+    test_shard_service_requires_key_and_clamps_results()
+    test_hybrid_fusion_across_shards()
+    print("\n🎉 Sharding tests passed!")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test script for stale-while-revalidate query caching.
+Needs a Redis server (REDIS_HOST / REDIS_PORT) and answers with the stub
+language model. Checks that an answer past QUERY_CACHE_SOFT_TTL is still
+served from the cache and regenerated exactly once in the background.
+"""
+
+import sys
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from tests_support import make_query_service
+
+
+def make_service():
+    """Query service with a one-minute soft TTL, or None when Redis is not reachable."""
+    service = make_query_service()
+    if not service:
+        return None
+    service.cache_soft_ttl = 60
+
+    # Count regenerations without changing what they do
+    service.answers = []
+    answer_query = service._answer_query
+
+    def counting_answer_query(*args, **kwargs):
+        service.answers.append(threading.current_thread().name)
+        return answer_query(*args, **kwargs)
+
+    service._answer_query = counting_answer_query
+    return service
+
+
+def store_answer(service, query: str, age: float) -> str:
+    cache_key = service._get_query_cache_key(query, 5)
+    service.cache_codec.setex(service.binary_client, cache_key, 3600, {
+        "query": query,
+        "response": "Cached answer",
+        "sources": [],
+        "confidence": "high",
+        "total_sources": 0,
+        "cached_at": time.time() - age
+    }, "query_cache")
+    return cache_key
+
+
+def cleanup(service, cache_key: str):
+    service.redis_client.delete(cache_key, f"query_refresh:{cache_key.split(':', 1)[1]}")
+
+
+def test_fresh_hit_is_not_refreshed():
+    """An answer younger than the soft TTL is served without scheduling a refresh."""
+    print("🔍 Testing fresh cache hit...")
+    service = make_service()
+    if not service:
+        return
+
+    query = f"fresh question {uuid.uuid4().hex}"
+    cache_key = store_answer(service, query, age=10)
+    try:
+        result = service.process_query(query, record=False)
+        service.refresh_executor.shutdown(wait=True)
+        assert result["cached"] is True and result["response"] == "Cached answer"
+        assert "cached_at" not in result
+        assert service.answers == []
+        print("✅ Fresh answer served, nothing refreshed")
+    finally:
+        cleanup(service, cache_key)
+
+
+def test_stale_hit_schedules_one_refresh():
+    """Concurrent hits on a stale answer all get the cached answer, and one refresh runs."""
+    print("\n🔍 Testing stale cache hit...")
+    service = make_service()
+    if not service:
+        return
+
+    query = f"stale question {uuid.uuid4().hex}"
+    cache_key = store_answer(service, query, age=120)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: service.process_query(query, record=False), range(20)))
+        service.refresh_executor.shutdown(wait=True)
+
+        assert len(service.answers) == 1
+        assert service.answers[0].startswith("query-refresh")
+
+        # The refresh replaced the entry with a fresh answer; hits racing it get either one
+        refreshed = service.cache_codec.get(service.binary_client, cache_key)
+        assert refreshed["response"] != "Cached answer"
+        assert time.time() - refreshed["cached_at"] < 60
+        assert any(result["response"] == "Cached answer" for result in results)
+        assert all(result["cached"] is True and result["response"] in ("Cached answer", refreshed["response"])
+                   for result in results)
+        print("✅ Stale answer served 20 times, refreshed once in the background")
+    finally:
+        cleanup(service, cache_key)
+
+
+if __name__ == "__main__":
+    test_fresh_hit_is_not_refreshed()
+    test_stale_hit_schedules_one_refresh()
+    print("\n🎉 Stale-while-revalidate tests passed!")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test script for the /status endpoint.
+Checks that unchanged polls are answered with 304 through the ETag, and that
+a failing index load reports an unhealthy status instead of an error.
+"""
+
+import sys
+import os
+import json
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import redis
+from fastapi.testclient import TestClient
+
+os.environ["LLM_PROVIDER"] = "stub"
+
+import main
+from services.index_snapshot import IndexSnapshot
+
+
+def make_snapshot(version: str) -> IndexSnapshot:
+    return IndexSnapshot.from_documents(version, [
+        {"file_name": "SYSTEM-8_eng02_W.pdf", "chunks": ["save a patch"], "embeddings": np.ones((1, 4), dtype=np.float32)}
+    ])
+
+
+def with_status(get_snapshot, ping):
+    """Client for the app with the index load and Redis ping replaced, and the ping result forgotten."""
+    main.document_processor.get_snapshot = get_snapshot
+    main.query_service.binary_client.ping = ping
+    main._redis_health.update(status="unknown", checked_at=float("-inf"))
+    return TestClient(main.app)
+
+
+def restore():
+    for obj, name in ((main.document_processor, "get_snapshot"), (main.query_service.binary_client, "ping")):
+        obj.__dict__.pop(name, None)
+    main._redis_health.update(status="unknown", checked_at=float("-inf"))
+
+
+def test_unchanged_status_is_not_modified():
+    """A poll carrying the current ETag gets 304 without a body; a new index version changes the ETag."""
+    print("🔍 Testing /status ETag...")
+
+    snapshot = {"current": make_snapshot("v1")}
+    client = with_status(lambda: snapshot["current"], lambda: True)
+    try:
+        first = client.get("/status")
+        assert first.status_code == 200 and first.headers["cache-control"] == "no-cache"
+        assert first.json()["status"] == "healthy" and first.json()["index_version"] == "v1"
+        etag = first.headers["etag"]
+
+        again = client.get("/status", headers={"If-None-Match": etag})
+        assert again.status_code == 304 and again.content == b""
+        assert again.headers["etag"] == etag
+
+        snapshot["current"] = make_snapshot("v2")
+        changed = client.get("/status", headers={"If-None-Match": etag})
+        assert changed.status_code == 200 and changed.headers["etag"] != etag
+        assert changed.json()["index_version"] == "v2"
+        print(f"✅ 304 for ETag {etag}, 200 with a new ETag after publishing")
+    finally:
+        restore()
+
+
+def test_index_load_failure_is_unhealthy():
+    """With Redis down, /status still answers 200 with the unhealthy document."""
+    print("\n🔍 Testing /status with Redis down...")
+
+    def refused(*args, **kwargs):
+        raise redis.ConnectionError("Error 111 connecting to localhost:1. Connection refused.")
+
+    client = with_status(refused, refused)
+    try:
+        response = client.get("/status")
+        assert response.status_code == 200
+        status = json.loads(response.content)
+        assert status["status"] == "unhealthy" and status["redis_status"] == "disconnected"
+        assert "Connection refused" in status["error"]
+        print(f"✅ Unhealthy status reported: {status}")
+    finally:
+        restore()
+
+
+if __name__ == "__main__":
+    test_unchanged_status_is_not_modified()
+    test_index_load_failure_is_unhealthy()
+    print("\n🎉 Status endpoint tests passed!")
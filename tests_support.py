@@ -0,0 +1,64 @@
+"""
+Helpers shared by the test scripts: deterministic embeddings, services built
+with temporary settings, a query service answering with the stub language
+model, and Redis availability checks and cleanup.
+"""
+
+import os
+import zlib
+from contextlib import contextmanager
+from typing import Iterator
+
+import numpy as np
+
+
+def embed(texts, dimensions: int = 16) -> np.ndarray:
+    """Deterministic unit vectors seeded by each text, so identical texts get identical embeddings."""
+    vectors = []
+    for text in texts:
+        rng = np.random.default_rng(zlib.crc32(text.encode()))
+        vector = rng.standard_normal(dimensions).astype(np.float32)
+        vectors.append(vector / np.linalg.norm(vector))
+    return np.array(vectors).reshape(-1, dimensions)
+
+
+@contextmanager
+def settings(**values: str) -> Iterator[None]:
+    """Set environment variables for the duration of the block, leaving the environment as it was."""
+    saved = {name: os.environ.get(name) for name in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name)
+            else:
+                os.environ[name] = value
+
+
+def redis_available(client) -> bool:
+    """Ping the client; print a skip notice when Redis is not reachable."""
+    try:
+        client.ping()
+        return True
+    except Exception as e:
+        print(f"⚠️ Redis not available, skipping: {e}")
+        return False
+
+
+def delete_keys(client, pattern: str):
+    """Delete every key matching the pattern."""
+    keys = list(client.scan_iter(match=pattern))
+    if keys:
+        client.delete(*keys)
+
+
+def make_query_service():
+    """Query service answering with the stub language model, or None when Redis is not reachable."""
+    # Imported here so scripts that only need embeddings do not load the query stack
+    from services.query_service import QueryService
+
+    with settings(LLM_PROVIDER="stub", STUB_LLM_LATENCY_MS="0"):
+        service = QueryService()
+    return service if redis_available(service.redis_client) else None
@@ -0,0 +1,133 @@
+"""
+ManualMind ingestion worker.
+Consumes document processing jobs queued by the API so that PDF extraction and
+batch embedding never run inside the API workers, then warms the query cache
+for the new index with the most popular questions in the background.
+"""
+
+import logging
+import time
+import threading
+from typing import Dict, Any, Optional
+from dotenv import load_dotenv
+
+from services.document_processor import DocumentProcessor
+from services.ingestion_queue import IngestionQueue
+from services.query_service import QueryService
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("ingestion-worker")
+
+
+def summarize_results(results: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce process_media_folder output to something small enough for a job record."""
+    if "error" in results and not isinstance(results["error"], dict):
+        return {"error": results["error"]}
+
+    files = {}
+    for file_name, doc_data in results.items():
+        if "error" in doc_data:
+            files[file_name] = {"error": doc_data["error"]}
+        else:
+            files[file_name] = {"total_chunks": doc_data.get("total_chunks", 0)}
+    return {"files": files}
+
+
+def run_job(document_processor: DocumentProcessor, queue: IngestionQueue, job: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a single ingestion job, record its outcome and return the updated job."""
+    job_id = job["job_id"]
+    logger.info(f"Starting ingestion job {job_id}")
+    start = time.time()
+
+    try:
+        results = document_processor.process_media_folder(job.get("media_path", "media"))
+        summary = summarize_results(results)
+        status = "failed" if "error" in summary else "completed"
+        job = queue.update_job(job_id, job, status=status, finished_at=time.time(),
+                               duration=round(time.time() - start, 3), **summary)
+        logger.info(f"Ingestion job {job_id} {status} in {time.time() - start:.1f}s")
+    except Exception as e:
+        logger.error(f"Ingestion job {job_id} failed: {e}")
+        job = queue.update_job(job_id, job, status="failed", finished_at=time.time(), error=str(e))
+    return job
+
+
+def warm_query_cache(query_service: QueryService, stop: Optional[threading.Event] = None) -> Dict[str, Any]:
+    """Pre-answer popular questions against the current index; failures never fail the job."""
+    try:
+        summary = query_service.warm_cache(stop=stop)
+    except Exception as e:
+        logger.error(f"Query cache warm-up failed: {e}")
+        return {"error": str(e)}
+    logger.info(f"Query cache warm-up: {summary}")
+    return summary
+
+
+class CacheWarmup:
+    """Runs query cache warm-ups in a background thread so the worker keeps taking jobs.
+
+    Only one warm-up runs at a time. Starting a new one, after the next index is
+    published, stops the previous run, whose answers are keyed to an older index.
+    """
+
+    def __init__(self, query_service: QueryService, queue: IngestionQueue):
+        self.query_service = query_service
+        self.queue = queue
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self, job: Optional[Dict[str, Any]] = None):
+        if self._thread and self._thread.is_alive():
+            self._stop.set()
+            self._thread.join()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(job, self._stop), daemon=True,
+                                        name="query-cache-warmup")
+        self._thread.start()
+
+    def _run(self, job: Optional[Dict[str, Any]], stop: threading.Event):
+        summary = warm_query_cache(self.query_service, stop)
+        if job:
+            try:
+                self.queue.update_job(job["job_id"], job, warmup=summary)
+            except Exception as e:
+                logger.error(f"Could not record warm-up of job {job['job_id']}: {e}")
+
+
+def main():
+    """Consume ingestion jobs forever."""
+    # The query service's processor does the ingestion, so the worker loads one embedding model
+    query_service = QueryService()
+    document_processor = query_service.document_processor
+    queue = IngestionQueue()
+
+    requeued = queue.requeue_unfinished()
+    if requeued:
+        logger.warning(f"Re-queued {requeued} ingestion job(s) left unfinished by a previous run")
+
+    warmup = CacheWarmup(query_service, queue)
+    # Answers cached before a restart may have expired
+    if query_service.warmup_top_n > 0:
+        warmup.start()
+    logger.info("Ingestion worker started, waiting for jobs...")
+
+    while True:
+        try:
+            job = queue.dequeue()
+        except Exception as e:
+            logger.error(f"Queue error: {e}")
+            time.sleep(5)
+            continue
+
+        if job:
+            job = run_job(document_processor, queue, job)
+            queue.complete(job["job_id"])
+            # Every cached answer is keyed to the old index version, so refill the popular ones
+            if job.get("status") == "completed" and query_service.warmup_top_n > 0:
+                warmup.start(job)
+
+
+if __name__ == "__main__":
+    main()